@@ -1,18 +1,30 @@
 import streamlit as st
 import os
+import pandas as pd
 import shutil
 import zipfile
 from math import ceil
 from pathlib import Path
-from utils.io import load_data, DATA_PATH
-from utils.prep import preprocess_data, date_str, count_user_messages
+from utils.io import DATA_PATH, ENRICHED_PATH, ZIP_IMPORT_PATH, LOAD_DATA_FIELDS
+from utils import export_fs
+from utils.extract import extract_zip, safe_target, EXTRACT_FILTERS
+from utils.ingest import load_fields_incremental, field_snapshot_files
+from utils.snapshot import export_fingerprint, snapshot_cached, snapshot_tables
+from utils.sql_engine import SqlEngine, sql_available, SQL_PAGE_SIZE
+from utils.manifest import export_manifest, invalidate_manifest, manifest_key, manifest_summary
+from utils.prep import PREP_STEPS, preprocess_data, date_str, count_user_messages
+from utils.timecube import CUBE_INPUTS, build_cube, media_month
+from utils.timeindex import TimeIndexed
 from utils.w2v_model import generate_clusters
+from utils.thumbnails import get_thumbnails
+from utils.media_meta import MediaScan
+from utils.dedup import find_duplicates, duplicate_summary
 from utils.data_enrichement import enrich_companies
 from utils.viz.activities import total_activities_over_time, plot_duo_participation, group_vs_duo_conv_pie, plot_duo_reel_vs_nonreel, request_corr0, scroll_hist, saved_media_by_time, website_bar
-from utils.viz.media import media_cumulative_line, media_type_bar, media_frequency_histogram
+from utils.viz.media import media_cumulative_line, media_type_bar, media_frequency_histogram, media_map
 from utils.viz.ads import ads_bar, ads_countries_map, ads_enriched_missing_values, ads_inception_year
 from utils.viz.preferences import clusters_podium, clusters_grid
-from utils.viz.security import login_logout_hist, cookies_pie, password_activity_bar
+from utils.viz.security import login_logout_hist, cookies_pie, password_activity_bar, user_agent_breakdown_bar
 from utils.viz.connections import upset, plot_venn, plot_follow_time_series_altair, follows_pie
 from utils.viz.personal_info import devices_over_times
 
@@ -34,12 +46,12 @@ def check_data_exists():
     """Check if Instagram data folder exists and contains data"""
     if DATA_PATH is None:
         return False
-    data_path = Path(DATA_PATH)
-    if not data_path.exists():
+    # DATA_PATH can be the extracted folder or the export ZIP itself
+    if not export_fs.exists(DATA_PATH):
         return False
     # Check if there are at least some key folders/files
     key_folders = ['connections', 'personal_information', 'your_instagram_activity']
-    return any((data_path / folder).exists() for folder in key_folders)
+    return any(export_fs.exists(f"{DATA_PATH}/{folder}") for folder in key_folders)
 
 def show_upload_prompt(tab_name: str):
     """Display upload prompt for tabs when no data is loaded"""
@@ -63,17 +75,38 @@ def show_upload_prompt(tab_name: str):
     )
     
     if uploaded_file is not None:
+        keep_zip = st.toggle("Read directly from the ZIP (no extraction)", value=True, key=f"keep_zip_{tab_name}",
+                             help="The archive is stored as-is and read in place: no extraction step and no second copy of your media on disk.")
+        skip = [] if keep_zip else st.multiselect("Leave out of the extraction", list(EXTRACT_FILTERS), key=f"skip_{tab_name}",
+                                                  help="Skipped files are not written to disk; the related charts and the gallery will be empty.")
         if st.button("📥 Import Data", type="primary", key=f"import_{tab_name}"):
-            with st.spinner("Extracting and importing your data..."):
+            with st.spinner("Importing your data..." if keep_zip else "Extracting and importing your data..."):
                 try:
                     # Create data directory if it doesn't exist
                     target_path = Path("./data")
                     target_path.mkdir(parents=True, exist_ok=True)
                     
-                    # Extract the ZIP file
-                    with zipfile.ZipFile(uploaded_file, 'r') as zip_ref:
-                        zip_ref.extractall(target_path)
+                    if keep_zip:
+                        # Store the archive; utils/export_fs.py reads members from it on demand.
+                        # Only the central directory is checked here: a corrupt member fails when it is read
+                        with zipfile.ZipFile(uploaded_file, 'r') as zip_ref:
+                            for info in zip_ref.infolist():
+                                safe_target(str(target_path), info.filename)
+                        uploaded_file.seek(0)
+                        with open(ZIP_IMPORT_PATH, 'wb') as f:
+                            shutil.copyfileobj(uploaded_file, f)
+                    else:
+                        # Extract the ZIP file on a worker pool, member paths are validated first
+                        bar = st.progress(0.0, text="Extracting...")
+                        def on_progress(done, total, done_bytes, total_bytes):
+                            if done == total or done % 50 == 0:
+                                bar.progress(done_bytes / total_bytes if total_bytes else 1.0,
+                                             text=f"Extracting... {done}/{total} files ({done_bytes / 1024**2:.0f} MB)")
+                        extract_zip(uploaded_file.getvalue(), str(target_path), skip=skip, progress=on_progress)
+                    invalidate_manifest()
                     
+                    if keep_zip and DATA_PATH != ZIP_IMPORT_PATH:
+                        st.info(f"Set `DATA_PATH='{ZIP_IMPORT_PATH}'` in your `.env` (or leave it unset) and restart the app to use the archive.")
                     st.success("✅ Data imported successfully! Please refresh the page to load your data.")
                     st.balloons()
                     st.rerun()
@@ -97,54 +130,132 @@ def show_upload_prompt(tab_name: str):
     
     st.caption("💬 For any issues or questions, please contact the project maintainers or open an issue on the GitHub repository.")
 
+# Each dataset is loaded (and preprocessed) the first time a tab asks for it, then cached
 @st.cache_data(show_spinner="Loading your data...")
-def get_data():
-    return load_data()
+def get_dataset(name):
+    """One load_data() field; only the sections producing it are read (see utils/ingest.py)"""
+    return load_fields_incremental([name], DATA_PATH)[name]
+
+def get_datasets(*names):
+    return tuple(get_dataset(name) for name in names)
+
+def _preprocess(name):
+    if name.startswith("cube_"):
+        source = name[len("cube_"):]
+        inputs = {n: get_prepped(n) if n in PREP_STEPS else get_dataset(n) for n in CUBE_INPUTS[source]}
+        return build_cube(source, **inputs)
+    if name == "messages_count":
+        return count_user_messages(get_dataset("df_all_conversations"), get_dataset("signup_details").get('Username'))
+    dataset = PREP_STEPS[name]
+    return preprocess_data(**{dataset: get_dataset(dataset)})
+
+@st.cache_data(show_spinner=False)
+def get_fingerprint(key):
+    """export_fingerprint() of the export, recomputed only when its manifest_key changes"""
+    return export_fingerprint(DATA_PATH, extra_files=[ENRICHED_PATH])
+
+@st.cache_data(show_spinner=False)
+def get_export_stats(key):
+    """manifest_summary() of the export, recomputed only when its manifest_key changes"""
+    return manifest_summary(export_manifest(DATA_PATH))
+
+def current_fingerprint():
+    # stats the export folders only; files rewritten in place are picked up by "Rescan export files"
+    return get_fingerprint(manifest_key(DATA_PATH, extra_files=[ENRICHED_PATH]))
 
 @st.cache_data(show_spinner="Preprocessing your data...")
-def preprocess_all_data(df_follows, df_contacts, df_media, df_link_history, df_locations_of_interest, df_last_known_location, df_devices, df_all_conversations, df_time_spent_on_ig):
+def get_prepped(name):
     """Cache preprocessing to avoid re-execution on every interaction"""
-    clean_follows = preprocess_data(df_follows=df_follows)
-    clean_contacts = preprocess_data(df_contacts=df_contacts)
-    df_media_prep = preprocess_data(df_media=df_media)
-    df_link_history_prep = preprocess_data(df_link_history=df_link_history)
-    df_locations_of_interest_prep = preprocess_data(df_locations_of_interest=df_locations_of_interest)
-    df_last_known_location_prep = preprocess_data(df_last_known_location=df_last_known_location)
-    df_devices_prep = preprocess_data(df_devices=df_devices)
-    df_time_spent_on_ig_prep = preprocess_data(df_time_spent_on_ig=df_time_spent_on_ig)
-    messages_sent, messages_received = count_user_messages(df_all_conversations)
-    return clean_follows, clean_contacts, df_media_prep, df_link_history_prep, df_locations_of_interest_prep, df_last_known_location_prep, df_devices_prep, df_time_spent_on_ig_prep, messages_sent, messages_received
+    fingerprint = current_fingerprint()
+    return snapshot_cached(f"prep-{name}", lambda: (_preprocess(name),), (name,), fingerprint)[0]
+
+def get_prepped_many(*names):
+    return tuple(get_prepped(name) for name in names)
+
+@st.cache_data(show_spinner=False)
+def get_time_index(name):
+    """Prepped dataset sorted by time, for date range slicing"""
+    if name == "df_media_prep":
+        df = get_prepped(name)
+        return TimeIndexed(df, times=media_month(df))
+    raise KeyError(name)
+
+def get_cube(source):
+    """Per-day event counts of one source (see CUBE_INPUTS), built once and snapshotted like the prep steps"""
+    return get_prepped(f"cube_{source}")
+
+@st.cache_resource(show_spinner=False)
+def get_media_scan(fingerprint):
+    """Background EXIF/MP4 metadata scan of the media files, one per export, shared by every session"""
+    df = get_prepped("df_media_prep")
+    return MediaScan(f"{DATA_PATH}/media", df["relative_path"] if "relative_path" in df.columns else [])
+
+@st.cache_data(show_spinner=False)
+def get_media_meta(fingerprint, done):
+    """Metadata read so far (`done` files scanned: recomputed while the scan progresses)"""
+    return get_media_scan(fingerprint).results()
+
+@st.cache_data(show_spinner=False)
+def get_media_day_cube(fingerprint, done):
+    """Media cube at day resolution, from the capture dates read so far"""
+    return build_cube("media", df_media_prep=get_prepped("df_media_prep"), media_meta=get_media_meta(fingerprint, done))
+
+@st.cache_data(show_spinner="Looking for duplicate pictures...")
+def get_duplicates(fingerprint):
+    """Near-duplicate groups of the export pictures (perceptual hashes, cached on disk per file)"""
+    return find_duplicates(get_prepped("df_media_prep"), f"{DATA_PATH}/media")
+
+def _sql_raw_tables(name, fingerprint):
+    """SQL source of one load_data field: its section snapshot files, or the frame itself"""
+    value = get_dataset(name)  # makes sure the section snapshot is up to date
+    files = field_snapshot_files([name]) if fingerprint else {}
+    if name in files:
+        return {name: files[name]}
+    return {name: value} if isinstance(value, pd.DataFrame) and len(value.columns) else {}
+
+def _sql_prep_tables(name, fingerprint):
+    """SQL sources of one preprocess_data step (dict outputs give one table per key)"""
+    value = get_prepped(name)
+    # prep snapshots are only current when the export has a fingerprint
+    tables = snapshot_tables(f"prep-{name}") if fingerprint else {}
+    if not tables:
+        frames = value.items() if isinstance(value, dict) else [(None, value)]
+        tables = {f"{name}.{key}" if key else name: frame for key, frame in frames
+                  if isinstance(frame, pd.DataFrame) and len(frame.columns)}
+    return {table: [source] if isinstance(source, str) else source for table, source in tables.items()}
+
+@st.cache_resource(show_spinner=False)
+def get_sql_engine(fingerprint):
+    """DuckDB tables over every load_data/preprocess_data dataset, each loaded when a query first uses it"""
+    engine = SqlEngine()
+    for name in LOAD_DATA_FIELDS:
+        engine.register_lazy(name, lambda name=name: _sql_raw_tables(name, fingerprint))
+    for name in PREP_STEPS:
+        engine.register_lazy(name, lambda name=name: _sql_prep_tables(name, fingerprint))
+    return engine
 
 st.title("Personal Instagram Dashboard")
 
 # Check if data exists
 data_loaded = check_data_exists()
 
-if data_loaded:
-    # Load data (spinner handled by @st.cache_data decorator)
-    (df_contacts, df_media, df_follows, df_devices, df_camera_info, df_locations_of_interest, possible_emails, profile_based_in, df_link_history, recommended_topics, signup_details, password_change_activity, df_last_known_location, df_logs, df_all_ads, substriction_status, information_youve_submitted_to_advertisers, advertisers_using_your_activity_or_information, other_categories_used_to_reach_you, advertisers_enriched,
-            df_all_comments, df_liked_comments, df_liked_posts, df_all_conversations,
-            df_time_spent_on_ig, df_your_information_download_requests, 
-            df_saved_collections, df_saved_locations, df_saved_posts, df_saved_music,
-            df_story_likes) = get_data()
-
-    # Preprocess data (spinner handled by @st.cache_data decorator)
-    clean_follows, clean_contacts, df_media_prep, df_link_history_prep, df_locations_of_interest_prep, df_last_known_location, df_devices_prep, df_time_spent_on_ig_prep, messages_sent, messages_received = preprocess_all_data(
-        df_follows, df_contacts, df_media, df_link_history, df_locations_of_interest, df_last_known_location, df_devices, df_all_conversations, df_time_spent_on_ig
-    )
-
-home, connections_tab, media_tab, preferences_tab, activity_tab, ads_tab, personal_info_tab, security_tab = st.tabs(["Welcome !", "Connections", "Media", "Preferences","Your activity", 'Ads Info', "Personnal Information", "Security Insights"])
+TAB_NAMES = ["Welcome !", "Connections", "Media", "Preferences","Your activity", 'Ads Info', "Personnal Information", "Security Insights", "SQL console"]
+# Only the selected tab runs (st.tabs would execute every tab, and load every dataset, on each rerun)
+selected_tab = st.segmented_control("Section", TAB_NAMES, default=TAB_NAMES[0], key="selected_tab", label_visibility="collapsed") or TAB_NAMES[0]
 
 
 with st.sidebar:
     st.header("Filters")
     if data_loaded:
         date_range = st.date_input("Date range", [])
+        if st.button("🔄 Rescan export files", help="Pick up export files edited in place (new, removed or renamed files are detected on their own)"):
+            invalidate_manifest(DATA_PATH)
+            st.cache_data.clear()  # sections and prep steps come back from their snapshots when unchanged
     else:
         st.info("📂 No data loaded yet. Upload your Instagram data to enable filters.")
         date_range = []
 
-with home:
+if selected_tab == "Welcome !":
     st.markdown("""
     ### Welcome to your personal Instagram data analysis platform!
     
@@ -155,17 +266,17 @@ with home:
     if data_loaded:
         st.subheader("Project Overview")
         col1, col2, col3 = st.columns(3)
+        # one cached walk of the export serves the three metrics
+        export_stats = get_export_stats(manifest_key(DATA_PATH))
         
         with col1:
-            st.metric("📁 Data Folder Size", f"{sum(f.stat().st_size for f in Path(DATA_PATH).rglob('*') if f.is_file()) / (1024**2):.1f} MB")
+            st.metric("📁 Data Folder Size", f"{export_stats['total_size'] / (1024**2):.1f} MB")
         
         with col2:
-            total_files = len(list(Path(DATA_PATH).rglob('*')))
-            st.metric("Total Files", f"{total_files}")
+            st.metric("Total Files", f"{export_stats['file_count']}")
         
         with col3:
-            image_files = len([f for f in Path(DATA_PATH).rglob('*') if f.suffix.lower() in ['.jpg', '.jpeg', '.png']])
-            st.metric("Images", f"{image_files}")
+            st.metric("Images", f"{export_stats['image_count']}")
         
 
         # Technologies Used
@@ -225,11 +336,13 @@ with home:
         # Show upload prompt on home when no data
         show_upload_prompt("Home")
 
-with connections_tab:
+if selected_tab == "Connections":
     if not data_loaded:
         show_upload_prompt("Connections")
     else:
         st.header("Connections")
+        df_follows, df_contacts, signup_details = get_datasets("df_follows", "df_contacts", "signup_details")
+        clean_follows, clean_contacts = get_prepped_many("clean_follows", "clean_contacts")
         with st.expander("Show raw datas"):
             st.write("Followers and Following")
             st.write(df_follows)
@@ -276,8 +389,9 @@ with connections_tab:
             st.subheader("Followers / Followings across time")
             mode = st.radio("Mode", ["Cumulative", "Daily"], horizontal=True)
             cum = (mode == "Cumulative")
-            if not clean_follows["timeseries"].empty:
-                chart2 = plot_follow_time_series_altair(clean_follows["timeseries"], cumulative=cum, date_range=date_range)
+            follows_cube = get_cube("follows")
+            if not follows_cube.empty:
+                chart2 = plot_follow_time_series_altair(follows_cube, cumulative=cum, date_range=date_range)
                 if chart2:
                     st.altair_chart(chart2, use_container_width=True)
             else:
@@ -315,11 +429,13 @@ with connections_tab:
             else:
                 st.info("📊 No follow data available.")
 
-with media_tab:
+if selected_tab == "Media":
     if not data_loaded:
         show_upload_prompt("Media")
     else:
         st.header("Media Dashboard")
+        df_media = get_dataset("df_media")
+        df_media_prep = get_prepped("df_media_prep")
         with st.expander("Show raw data"):
             st.write("Media")
             st.write(df_media)
@@ -330,12 +446,21 @@ with media_tab:
                 "It also adds helper columns such as filename, extension, and a year_month date to make temporal analysis easier.")
             st.write(df_media_prep)
         
+        # capture dates/places read from the files themselves, in the background (see utils/media_meta.py)
+        fingerprint = current_fingerprint()
+        media_scan = get_media_scan(fingerprint)
+        media_meta = get_media_meta(fingerprint, media_scan.done)
+        dated = int(media_meta["taken_at"].notna().sum()) if not media_meta.empty else 0
+
         st.header("Insights")
         col1, col2 = st.columns([1,1], gap="large")
         with col1 : 
             st.subheader("Posting over the years")
             if not df_media_prep.empty:
-                chart = media_cumulative_line(df_media_prep, date_range=date_range)
+                if dated:
+                    chart = media_cumulative_line(get_media_day_cube(fingerprint, media_scan.done), date_range=date_range, freq="D")
+                else:
+                    chart = media_cumulative_line(get_cube("media"), date_range=date_range)
                 if chart:
                     st.altair_chart(chart, use_container_width=True)
                 
@@ -347,13 +472,29 @@ with media_tab:
                 
                 st.write(f"You currently have {posts_count} pictures in your posts, {archived_count} archived posts pictures, "
                         f"{profile_count} profile picture, {stories_count} stories and {deleted_count} recently deleted pictures")
+
+                # the same picture is often under posts, archived_posts, recently_deleted and stories
+                if 'find_duplicates' not in st.session_state:
+                    st.session_state['find_duplicates'] = False
+                if not st.session_state['find_duplicates']:
+                    if st.button("Find duplicate pictures", key="find_duplicates_button"):
+                        st.session_state['find_duplicates'] = True
+                        st.rerun()
+                else:
+                    dup_summary = duplicate_summary(get_duplicates(fingerprint))
+                    dup_c1, dup_c2 = st.columns(2)
+                    dup_c1.metric("Duplicate copies", dup_summary["duplicate_files"],
+                                  help=f"{dup_summary['groups']} pictures are stored more than once")
+                    share = dup_summary["duplicate_bytes"] / dup_summary["total_bytes"] if dup_summary["total_bytes"] else 0
+                    dup_c2.metric("Duplicate bytes", f"{dup_summary['duplicate_bytes'] / (1024**2):.1f} MB",
+                                  help=f"{share:.0%} of the pictures' size is redundant")
             else:
                 st.info("📊 No media data available.")
                 
         with col2 :
             st.subheader("Media types distribution")
             if not df_media_prep.empty:
-                chart = media_type_bar(df_media_prep, date_range=date_range)
+                chart = media_type_bar(df_media_prep, date_range=date_range, index=get_time_index("df_media_prep"))
                 if chart:
                     st.altair_chart(chart, use_container_width=True)
             else:
@@ -362,7 +503,7 @@ with media_tab:
             st.subheader("Stories frequencies")
         if not df_media_prep.empty:
             by_stories = st.radio("Grouped by:", ["years","months","weeks"], index=1, horizontal=True, key="stories_hist")
-            chart = media_frequency_histogram(df_media_prep, by_stories, date_range=date_range)
+            chart = media_frequency_histogram(get_cube("media"), by_stories, date_range=date_range)
             if chart:
                 st.altair_chart(chart, use_container_width=True)
         else:
@@ -371,12 +512,34 @@ with media_tab:
         st.subheader("Posts & Archived Posts frequencies")
         if not df_media_prep.empty:
             by_posts = st.radio("Grouped by:", ["years","months","weeks"], index=1, horizontal=True, key="posts_hist")
-            chart = media_frequency_histogram(df_media_prep, by_posts, media_type=["archived_posts", "posts"], color='blues', date_range=date_range)
+            chart = media_frequency_histogram(get_cube("media"), by_posts, media_type=["archived_posts", "posts"], color='blues', date_range=date_range)
             if chart:
                 st.altair_chart(chart, use_container_width=True)
         else:
             st.info("📊 No posts data available.")
 
+        st.subheader("Where your media were taken")
+        if df_media_prep.empty:
+            st.info("📊 No media data available.")
+        else:
+            if media_scan.running:
+                st.progress(media_scan.done / max(media_scan.total, 1),
+                            text=f"Reading photo and video metadata... {media_scan.done}/{media_scan.total} files")
+                st.button("Refresh", key="media_meta_refresh")
+            elif not media_scan.started and len(media_meta) < media_scan.total:
+                st.caption(f"Capture dates, GPS positions and cameras are read from the files themselves "
+                           f"({len(media_meta)}/{media_scan.total} already read). This runs in the background.")
+                if st.button("Read media metadata", key="media_meta_start"):
+                    media_scan.start()
+                    st.rerun()
+            if media_scan.error:
+                st.warning(f"Metadata scan stopped: {media_scan.error}")
+            if not media_meta.empty:
+                chart = media_map(media_meta, date_range=date_range)
+                st.altair_chart(chart, use_container_width=True)
+                st.caption(f"{dated} of {len(media_meta)} files have a capture date, "
+                           f"{int(media_meta['lat'].notna().sum())} a GPS position.")
+
         # ------------gallery ---------------
         st.header("Gallery")
         
@@ -416,6 +579,14 @@ with media_tab:
                         
                 with controls[2]:
                     batch_size = st.select_slider("Batch size:", range(10, 110, 10), key='batch_slider')
+
+                # only offered once the duplicates were searched: the toggle alone must not start hashing
+                if st.session_state.get('find_duplicates') and st.toggle(
+                        "Collapse duplicates", key="collapse_duplicates", help="Show each picture once, even when it is in several folders"):
+                    dups = get_duplicates(fingerprint)
+                    hidden = dups.loc[~dups["keep"], "relative_path"]
+                    df_media_prep_filtered = df_media_prep_filtered[~df_media_prep_filtered["relative_path"].isin(hidden)]
+                    st.caption(f"{len(hidden)} duplicate copies hidden.")
                 
                 if df_media_prep_filtered.empty:
                     st.info("📊 No media in selected date range.")
@@ -438,24 +609,43 @@ with media_tab:
                 col = 0
 
 
-                # Loop over the batch and display images/videos
-                for _, media in batch.iterrows():
-                    media_path = media['relative_path']
-                    media_ext = media['ext']
-                    media_file = f'{DATA_PATH}/media/{media_path}'
+                # Thumbnails for the whole page are built in one go (process pool, cached on disk)
+                media_files = [f'{DATA_PATH}/media/{media_path}' for media_path in batch['relative_path']]
+                with st.spinner("Preparing thumbnails..."):
+                    thumbs = get_thumbnails(media_files)
+
+                # Loop over the batch and display thumbnails, full size only on demand
+                for i, (media_file, media_ext) in enumerate(zip(media_files, batch['ext'])):
+                    thumb = thumbs.get(media_file)
                     with grid[col]:
                         if media_ext in ['jpg', 'jpeg', 'png']:
-                            st.image(media_file, caption='Media')
+                            st.image(thumb or export_fs.as_image_source(media_file), caption='Media')
+                            # the full-size file is only read and sent when asked for
+                            if st.toggle("Full size", key=f"full_{page}_{i}"):
+                                st.image(export_fs.as_image_source(media_file))
                         elif media_ext == 'mp4':
-                            st.video(media_file)
+                            if thumb:
+                                st.image(thumb, caption='Video')
+                                if st.toggle("Play", key=f"play_{page}_{i}"):
+                                    st.video(export_fs.as_image_source(media_file))
+                            else:
+                                st.video(export_fs.as_image_source(media_file))
 
                     col = (col + 1) % row_size
 
-with activity_tab:
+if selected_tab == "Your activity":
     if not data_loaded:
         show_upload_prompt("Your Activity")
     else:
         st.header("Your activity")
+        (df_all_comments, df_liked_comments, df_liked_posts, df_all_conversations, df_time_spent_on_ig,
+         df_your_information_download_requests, df_saved_collections, df_saved_locations, df_saved_posts,
+         df_saved_music, df_story_likes, df_link_history) = get_datasets(
+            "df_all_comments", "df_liked_comments", "df_liked_posts", "df_all_conversations", "df_time_spent_on_ig",
+            "df_your_information_download_requests", "df_saved_collections", "df_saved_locations", "df_saved_posts",
+            "df_saved_music", "df_story_likes", "df_link_history")
+        df_link_history_prep, df_time_spent_on_ig_prep, (messages_sent, messages_received) = get_prepped_many(
+            "df_link_history_prep", "df_time_spent_on_ig_prep", "messages_count")
         with st.expander("Show raw datas"):
             st.subheader("All comments")
             st.write(df_all_comments)
@@ -529,12 +719,7 @@ with activity_tab:
         
         if has_activity_data:
             chart = total_activities_over_time(
-                df_all_comments,
-                df_liked_comments,
-                df_liked_posts,
-                df_story_likes,
-                df_saved_posts,
-                df_all_conversations,
+                get_cube("activity"),
                 cumulative=cum,
                 monthly=True,
                 title="Activities over time",
@@ -587,7 +772,7 @@ with activity_tab:
         st.subheader("Time spent on Instagram")
         if df_time_spent_on_ig_prep is not None :
             if not df_time_spent_on_ig_prep.empty:
-                chart = scroll_hist(df_time_spent_on_ig_prep, date_range=date_range)
+                chart = scroll_hist(get_cube("screen_time"), date_range=date_range)
                 if chart:
                     st.altair_chart(chart, use_container_width=True)
         else:
@@ -602,7 +787,7 @@ with activity_tab:
         
         if has_saved_data:
             by_saved = st.radio("Grouped by:", ["days","months","weeks"], index=1, horizontal=True, key="saved_hist")
-            chart = saved_media_by_time(df_saved_collections, df_saved_posts, df_saved_music, by_saved, date_range=date_range)
+            chart = saved_media_by_time(get_cube("saved"), by_saved, date_range=date_range)
             if chart:
                 st.altair_chart(chart)
         else:
@@ -620,17 +805,19 @@ with activity_tab:
         st.subheader("Link history")
         if df_link_history_prep is not None :
             if not df_link_history_prep.empty:
-                chart = website_bar(df_link_history_prep)
+                by_link = st.radio("Grouped by:", ["website", "domain"], horizontal=True, key="links_bar")
+                chart = website_bar(df_link_history_prep, by="domain" if by_link == "domain" else "Website_name")
                 if chart:
                     st.altair_chart(chart)
         else:
             st.info("📊 No link history data available.")
 
-with preferences_tab:
+if selected_tab == "Preferences":
     if not data_loaded:
         show_upload_prompt("Preferences")
     else:
         st.header("Your recommended topics")
+        recommended_topics = get_dataset("recommended_topics")
         with st.expander("Show raw data"):
             st.write("Recommended topics")
             st.write(recommended_topics)
@@ -667,11 +854,15 @@ with preferences_tab:
                 if chart2:
                     st.altair_chart(chart2)
 
-with ads_tab:
+if selected_tab == "Ads Info":
     if not data_loaded:
         show_upload_prompt("Ads Info")
     else:
         st.header("Ads information")
+        (advertisers_using_your_activity_or_information, other_categories_used_to_reach_you, substriction_status,
+         information_youve_submitted_to_advertisers, advertisers_enriched, signup_details) = get_datasets(
+            "advertisers_using_your_activity_or_information", "other_categories_used_to_reach_you", "substriction_status",
+            "information_youve_submitted_to_advertisers", "advertisers_enriched", "signup_details")
         with st.expander("Show raw data"):
             st.subheader("Advertisers using your activity or information")
             st.write(advertisers_using_your_activity_or_information)
@@ -700,7 +891,7 @@ with ads_tab:
                 with st.spinner(f"Enriching your advertisers data... Browsing the advertisers name on Wikidata... This may take a moment (~{seconds//60}min {seconds%60}sec)"):
                     try:
                         advertisers_enriched = enrich_companies(advertisers_using_your_activity_or_information, name_col="advertiser_name")
-                        advertisers_enriched.to_csv("./data/advertisers_enriched.csv")
+                        advertisers_enriched.to_csv(ENRICHED_PATH)
                         st.success("✅ Data enriched successfully!")
                     except Exception as e:
                         st.error(f"Error scraping the data: {e}")
@@ -734,11 +925,15 @@ with ads_tab:
             if chart3:
                 st.altair_chart(chart3)
 
-with personal_info_tab:
+if selected_tab == "Personnal Information":
     if not data_loaded:
         show_upload_prompt("Personal Information")
     else :
         st.header("Personal Information")
+        (df_devices, df_camera_info, df_locations_of_interest, profile_based_in, possible_emails, signup_details) = get_datasets(
+            "df_devices", "df_camera_info", "df_locations_of_interest", "profile_based_in", "possible_emails", "signup_details")
+        df_devices_prep, df_locations_of_interest_prep, df_last_known_location = get_prepped_many(
+            "df_devices_prep", "df_locations_of_interest_prep", "df_last_known_location_prep")
         st.write("What does Instagram know about you?")
         with st.expander("Show raw data"):
             st.write("Your devices")
@@ -754,7 +949,7 @@ with personal_info_tab:
             st.info("The preprocessing of the devices pandas DataFrame was made possible with the user-agents python library.")
             st.write(df_devices_prep)
             st.write("Locations of interest")
-            st.info("This dataframe was encoded in utf-8. Latitude and longitude were also added thanks to **geopy** library")
+            st.info("This dataframe was encoded in utf-8. Latitude and longitude were added from an offline **GeoNames** gazetteer, with **geopy** (Nominatim) as a fallback")
             st.write(df_locations_of_interest_prep)
     
         col1, col2 = st.columns([1,1], gap="large")
@@ -786,11 +981,14 @@ with personal_info_tab:
             else:
                 st.info("📊 No device data available.")
 
-with security_tab:
+if selected_tab == "Security Insights":
     if not data_loaded:
         show_upload_prompt("Security")
     else :
         st.header("Security and log information")
+        df_logs, signup_details, password_change_activity, possible_emails = get_datasets(
+            "df_logs", "signup_details", "password_change_activity", "possible_emails")
+        df_logs_prep = get_prepped("df_logs_prep")
         st.caption("The security dashboard shows the connection logs to your account and their information as well as your signup details.")
         with st.expander("Show raw data"):
             st.write("Logs Data")
@@ -834,7 +1032,7 @@ with security_tab:
 
             st.subheader("Login / Logout")
             if not df_logs.empty:
-                chart = login_logout_hist(df_logs, by=by, date_range=date_range)
+                chart = login_logout_hist(get_cube("logs"), by=by, date_range=date_range)
                 if chart:
                     st.altair_chart(chart, use_container_width=True)
             else:
@@ -848,6 +1046,57 @@ with security_tab:
             else:
                 st.info("📊 No cookie data available.")
 
+        st.subheader("Devices, systems and browsers used to log in")
+        if df_logs_prep is not None and not df_logs_prep.empty and "device_type" in df_logs_prep.columns:
+            ua_cols = st.columns(3)
+            for ua_col, (ua_field, ua_title) in zip(ua_cols, [("device_type", "Device type"), ("os_family", "Operating system"), ("browser_family", "Browser")]):
+                with ua_col:
+                    st.write(f"**{ua_title}**")
+                    chart = user_agent_breakdown_bar(df_logs_prep, by=ua_field)
+                    if chart:
+                        st.altair_chart(chart, use_container_width=True)
+        else:
+            st.info("📊 No user-agent data available in your logs.")
+
+if selected_tab == "SQL console":
+    if not data_loaded:
+        show_upload_prompt("SQL console")
+    elif not sql_available():
+        st.info("🦆 The SQL console needs the optional `duckdb` package: `pip install duckdb`")
+    else:
+        st.header("SQL console")
+        engine = get_sql_engine(current_fingerprint())
+        st.caption("Every raw table (`df_follows`, `df_logs`, `df_all_conversations`...) and preprocessed table "
+                   "(`df_media_prep`, `clean_follows_df`...) is queried in place by DuckDB; only the displayed page is loaded. "
+                   "A dataset is read the first time a query names it. Only SELECT queries can be run.")
+        with st.expander("Tables and columns"):
+            st.dataframe(engine.schema(), hide_index=True)
+
+        query = st.text_area(
+            "Query",
+            "SELECT follows_type, count(*) AS accounts\nFROM df_follows\nGROUP BY follows_type\nORDER BY accounts DESC",
+            height=160, key="sql_query",
+        )
+        controls = st.columns(2)
+        with controls[0]:
+            page_size = st.selectbox("Rows per page", [SQL_PAGE_SIZE, 500, 1000], key="sql_page_size")
+        with controls[1]:
+            page = st.number_input("Page", min_value=1, value=1, step=1, key="sql_page") - 1
+
+        if st.button("Run", type="primary"):
+            st.session_state["sql_submitted"] = query
+        submitted = st.session_state.get("sql_submitted")
+        if submitted:
+            try:
+                with st.spinner("Running the query (tables used for the first time are loaded)..."):
+                    result = engine.query(submitted, page=page, page_size=page_size)
+            except Exception as e:
+                st.error(f"❌ {e}")
+            else:
+                pages = max(1, -(-result["total_rows"] // page_size))
+                st.caption(f"{result['total_rows']:,} rows · page {page + 1}/{pages} · {result['elapsed'] * 1000:.1f} ms")
+                st.dataframe(result["rows"], hide_index=True)
+
 st.markdown("---")
 st.caption("This dashboard respects your privacy - all data processing happens locally on your machine.")
 
@@ -0,0 +1,245 @@
+# headless batch run: load -> preprocess -> (enrichment) -> (clustering) for many exports, one process per export
+#
+#   python batch.py ./exports/*.zip ./more_exports/ --out ./data/batch --workers 8
+#
+# Every input is an export folder, an export ZIP, or a folder holding several of them.
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import traceback
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Optional
+
+import pandas as pd
+
+import utils.io as io
+from utils.prep import PREP_STEPS, preprocess_data, count_user_messages
+from utils.timecube import CUBE_INPUTS, build_cube
+from utils.manifest import export_manifest, manifest_summary
+
+BATCH_OUT = os.getenv("BATCH_OUT", "./data/batch")
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", os.cpu_count() or 1))
+# top-level folders that identify an Instagram export
+EXPORT_SECTIONS = {"connections", "your_instagram_activity", "personal_information", "media",
+                   "security_and_login_information", "preferences", "ads_information", "logged_information"}
+
+SUMMARY_COLUMNS = ["export", "path", "status", "seconds", "files", "size_mb", "followers", "followings",
+                   "media", "conversations", "messages_sent", "messages_received", "logins", "links", "error"]
+
+# ------------- Inputs --------------------------------------------------------
+
+def _is_export_dir(path: Path) -> bool:
+    try:
+        return any(child.name in EXPORT_SECTIONS for child in path.iterdir() if child.is_dir())
+    except OSError:
+        return False
+
+def find_exports(inputs: List[str]) -> List[str]:
+    """Expand the command line inputs to export folders and ZIPs (sorted, without duplicates)."""
+    exports = []
+    for raw in inputs:
+        path = Path(raw)
+        if path.is_file() and path.suffix.lower() == ".zip":
+            exports.append(path)
+        elif path.is_dir() and _is_export_dir(path):
+            exports.append(path)
+        elif path.is_dir():
+            exports.extend(child for child in sorted(path.iterdir())
+                           if (child.is_file() and child.suffix.lower() == ".zip") or (child.is_dir() and _is_export_dir(child)))
+        else:
+            print(f"⚠️ Warning: {raw} is not an export folder, a ZIP or a folder of exports, skipped")
+    return sorted(dict.fromkeys(str(p.resolve()) for p in exports))
+
+def export_name(path: str) -> str:
+    """Output folder name of an export ('exports/jane_2024.zip' -> 'jane_2024')."""
+    name = Path(path).name
+    name = name[:-4] if name.lower().endswith(".zip") else name
+    return re.sub(r"[^\w.-]", "_", name)
+
+# ------------- Outputs -------------------------------------------------------
+
+def _write_parquet(df: pd.DataFrame, path: Path) -> None:
+    df = df.reset_index(drop=True)
+    df.columns = [str(c) for c in df.columns]
+    try:
+        df.to_parquet(path, index=False)
+        return
+    except Exception:
+        pass
+    # dict/set/mixed cells: stored as JSON text so the file stays readable by any parquet reader
+    df = df.copy()
+    for col in df.columns[df.dtypes == object]:
+        df[col] = df[col].map(lambda v: v if v is None or isinstance(v, str) else json.dumps(v, default=str, ensure_ascii=False))
+    df.to_parquet(path, index=False)
+
+def write_outputs(values: dict, folder: Path) -> None:
+    """DataFrames -> <name>.parquet (dicts of frames -> <name>.<key>.parquet), everything else -> values.json."""
+    folder.mkdir(parents=True, exist_ok=True)
+    others = {}
+    for name, value in values.items():
+        items = value.items() if isinstance(value, dict) and any(isinstance(v, pd.DataFrame) for v in value.values()) else [(None, value)]
+        for key, item in items:
+            label = f"{name}.{key}" if key else name
+            if isinstance(item, pd.DataFrame):
+                _write_parquet(item, folder / (re.sub(r"[^\w.-]", "_", label) + ".parquet"))
+            else:
+                others[label] = item
+    with open(folder / "values.json", "w", encoding="utf-8") as f:
+        json.dump(others, f, default=lambda v: sorted(v, key=str) if isinstance(v, (set, frozenset)) else str(v), ensure_ascii=False, indent=1)
+
+# ------------- One export ----------------------------------------------------
+
+def _rows(df, mask=None) -> int:
+    if not isinstance(df, pd.DataFrame):
+        return 0
+    return int(mask.sum()) if mask is not None else len(df)
+
+def process_export(path: str, out: str, enrich: bool = False, cluster: bool = False) -> dict:
+    """
+    Run the whole pipeline on one export (in a worker process) and write its outputs to out/<export name>/.
+
+    Returns:
+        One summary row (SUMMARY_COLUMNS)
+    """
+    start = time.perf_counter()
+    name = export_name(path)
+    folder = Path(out) / name
+    row = dict.fromkeys(SUMMARY_COLUMNS)
+    row.update(export=name, path=path, status="ok")
+    try:
+        # the enriched advertisers section reads this module global: point it at this export's output
+        io.ENRICHED_PATH = str(folder / "advertisers_enriched.csv")
+
+        manifest = export_manifest(path)
+        summary = manifest_summary(manifest)
+        raw = io.merge_sections(io.load_sections(max_workers=1, data_path=path))
+
+        prepped = {prep: preprocess_data(**{field: raw.get(field)}) for prep, field in PREP_STEPS.items()}
+        username = raw.get("signup_details", {}).get("Username") if isinstance(raw.get("signup_details"), dict) else None
+        sent, received = count_user_messages(raw.get("df_all_conversations", pd.DataFrame()), username)
+        available = {**raw, **prepped}
+        cubes = {f"cube_{source}": build_cube(source, **{n: available.get(n) for n in inputs})
+                 for source, inputs in CUBE_INPUTS.items()}
+
+        extra = {}
+        advertisers = raw.get("advertisers_using_your_activity_or_information")
+        if enrich and isinstance(advertisers, pd.DataFrame) and not advertisers.empty:
+            from utils.data_enrichement import enrich_companies
+            extra["advertisers_enriched"] = enrich_companies(advertisers.copy(), name_col="advertiser_name", save_every=None)
+        topics = raw.get("recommended_topics")
+        if cluster and topics:
+            from utils.w2v_model import generate_clusters
+            cluster_data, clusters = generate_clusters(recommended_topics=topics)
+            extra["topic_clusters"] = pd.DataFrame(cluster_data)
+            extra["topic_cluster_members"] = pd.DataFrame(
+                [(label, topic) for label, members in clusters.items() for topic in members], columns=["cluster", "topic"])
+
+        write_outputs({**raw, **prepped, **cubes, **extra, "messages_count": {"sent": sent, "received": received}}, folder)
+
+        follows = raw.get("df_follows")
+        follows_type = follows["follows_type"] if isinstance(follows, pd.DataFrame) and "follows_type" in follows.columns else None
+        logs = raw.get("df_logs")
+        row.update(
+            files=summary["file_count"],
+            size_mb=round(summary["total_size"] / 1e6, 2),
+            followers=_rows(follows, follows_type.eq("followers")) if follows_type is not None else 0,
+            followings=_rows(follows, follows_type.eq("followings")) if follows_type is not None else 0,
+            media=_rows(raw.get("df_media")),
+            conversations=_rows(raw.get("df_all_conversations")),
+            messages_sent=sent,
+            messages_received=received,
+            logins=_rows(logs, logs["log_type"].eq("login")) if isinstance(logs, pd.DataFrame) and "log_type" in logs.columns else 0,
+            links=_rows(raw.get("df_link_history")),
+        )
+    except Exception as e:
+        row.update(status="error", error=f"{type(e).__name__}: {e}")
+        traceback.print_exc()
+    row["seconds"] = round(time.perf_counter() - start, 2)
+    return row
+
+def _failed_row(path: str, error: BaseException) -> dict:
+    """Summary row of an export whose worker process died (out of memory, crash in a native library...)."""
+    row = dict.fromkeys(SUMMARY_COLUMNS)
+    row.update(export=export_name(path), path=path, status="error", error=f"{type(error).__name__}: {error}")
+    return row
+
+def _result(future, path: str) -> dict:
+    # process_export catches its own errors: only a dead worker (BrokenProcessPool) raises here
+    try:
+        return future.result()
+    except Exception as e:
+        print(f"⚠️ Warning: worker processing {path} failed: {type(e).__name__}: {e}")
+        return _failed_row(path, e)
+
+# ------------- Batch ---------------------------------------------------------
+
+def run_batch(exports: List[str], out: str = BATCH_OUT, max_workers: int = BATCH_WORKERS,
+              enrich: bool = False, cluster: bool = False) -> pd.DataFrame:
+    """
+    Process exports in parallel (one process each) and write out/summary.parquet, summary.csv and report.json.
+
+    Returns:
+        The summary table, one row per export
+    """
+    Path(out).mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+    rows = []
+    if max_workers <= 1:
+        results = (process_export(path, out, enrich, cluster) for path in exports)
+    else:
+        pool = ProcessPoolExecutor(max_workers=min(max_workers, len(exports) or 1))
+        futures = {pool.submit(process_export, path, out, enrich, cluster): path for path in exports}
+        results = (_result(future, futures[future]) for future in as_completed(futures))
+    try:
+        for row in results:
+            rows.append(row)
+            elapsed = time.perf_counter() - start
+            took = f" ({row['seconds']}s)" if row["seconds"] is not None else ""
+            print(f"[{len(rows)}/{len(exports)}] {row['export']}: {row['status']}{took} "
+                  f"· {len(rows) / elapsed * 60:.1f} exports/min")
+    finally:
+        if max_workers > 1:
+            pool.shutdown()
+
+    elapsed = time.perf_counter() - start
+    summary = pd.DataFrame(rows, columns=SUMMARY_COLUMNS).sort_values("export").reset_index(drop=True)
+    summary.to_parquet(Path(out) / "summary.parquet", index=False)
+    summary.to_csv(Path(out) / "summary.csv", index=False)
+    report = {
+        "exports": len(rows),
+        "ok": int((summary["status"] == "ok").sum()),
+        "failed": int((summary["status"] != "ok").sum()),
+        "workers": max_workers,
+        "elapsed_s": round(elapsed, 2),
+        "exports_per_minute": round(len(rows) / elapsed * 60, 2) if elapsed else None,
+        # exports whose worker died have no duration
+        "mean_export_s": round(float(summary["seconds"].mean()), 2) if summary["seconds"].notna().any() else None,
+    }
+    with open(Path(out) / "report.json", "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1)
+    print(f"Done: {report['ok']}/{report['exports']} exports in {report['elapsed_s']}s "
+          f"({report['exports_per_minute']} exports/min, {max_workers} worker(s)) -> {out}")
+    return summary
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Process many Instagram exports without the dashboard.")
+    parser.add_argument("inputs", nargs="+", help="Export folders, export ZIPs, or folders containing several of them")
+    parser.add_argument("--out", default=BATCH_OUT, help=f"Output folder (default: {BATCH_OUT})")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS, help="Exports processed in parallel (default: cpu count)")
+    parser.add_argument("--enrich", action="store_true", help="Enrich advertisers (Wikipedia/Wikidata... requests)")
+    parser.add_argument("--clusters", action="store_true", help="Cluster recommended topics (needs the word2vec model)")
+    args = parser.parse_args(argv)
+
+    exports = find_exports(args.inputs)
+    if not exports:
+        print("No export found.")
+        return 1
+    summary = run_batch(exports, args.out, args.workers, args.enrich, args.clusters)
+    return 0 if (summary["status"] == "ok").all() else 2
+
+if __name__ == "__main__":
+    sys.exit(main())
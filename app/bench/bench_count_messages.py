@@ -0,0 +1,88 @@
+# count_user_messages: previous iterrows version vs the vectorized one, on synthetic conversations
+#
+#   python bench/bench_count_messages.py --conversations 100000 --contacts 5000
+#
+# Run from 'app/'. Both versions must return the same (sent, received) totals.
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from utils.prep import count_user_messages
+
+OWNER = "jane.doe"
+
+def make_conversations(n: int, contacts: int, duo_share: float = 0.8, seed: int = 0) -> pd.DataFrame:
+    """df_all_conversations-like frame: `duo_share` of 1:1 chats with the owner, the rest are groups of 3 to 8."""
+    rng = random.Random(seed)
+    names = [f"contact_{i}" for i in range(contacts)]
+    participants, participation = [], []
+    for _ in range(n):
+        if rng.random() < duo_share:
+            people = [OWNER, rng.choice(names)]
+        else:
+            people = [OWNER] + rng.sample(names, rng.randint(2, 7))
+        participants.append(people)
+        participation.append({p: rng.randint(0, 200) for p in people})
+    return pd.DataFrame({"participants": participants, "participants_participation": participation})
+
+def count_user_messages_iterrows(df_all_conversations: pd.DataFrame) -> tuple:
+    """count_user_messages as it was before the vectorization (reference)."""
+    candidate_users = {}
+    for _, row in df_all_conversations.iterrows():
+        participants = row.get("participants")
+        if not isinstance(participants, list) or len(participants) != 2:
+            continue
+        for user in participants:
+            candidate_users[user] = candidate_users.get(user, 0) + 1
+    main_user = max(candidate_users, key=candidate_users.get) if candidate_users else "Unknown User"
+
+    messages_envoyes = 0
+    messages_recus = 0
+    for _, row in df_all_conversations.iterrows():
+        participation = row.get("participants_participation")
+        if not participation or not isinstance(participation, dict):
+            continue
+        if main_user in participation:
+            messages_envoyes += participation[main_user]
+        for user, count in participation.items():
+            if user != main_user:
+                messages_recus += count
+    return messages_envoyes, messages_recus
+
+def _timed(fn, *args, repeat: int = 1) -> tuple:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark count_user_messages on synthetic conversations.")
+    parser.add_argument("--conversations", type=int, default=100_000)
+    parser.add_argument("--contacts", type=int, default=5_000)
+    parser.add_argument("--repeat", type=int, default=3, help="runs of the vectorized versions (best time is kept)")
+    args = parser.parse_args(argv)
+
+    df = make_conversations(args.conversations, args.contacts)
+    print(f"{len(df):,} conversations, {args.contacts:,} contacts")
+
+    reference, t_ref = _timed(count_user_messages_iterrows, df)
+    vectorized, t_vec = _timed(count_user_messages, df, None, repeat=args.repeat)
+    with_name, t_name = _timed(count_user_messages, df, OWNER, repeat=args.repeat)
+
+    print(f"iterrows            {t_ref:7.2f}s  {reference}")
+    print(f"vectorized          {t_vec:7.2f}s  {vectorized}  x{t_ref / t_vec:.1f}")
+    print(f"vectorized+username {t_name:7.2f}s  {with_name}  x{t_ref / t_name:.1f}")
+    if not (reference == vectorized == with_name):
+        print("⚠️ Warning: the totals differ")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
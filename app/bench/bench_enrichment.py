@@ -0,0 +1,54 @@
+# enrich_companies throughput against the local stub server, sequential vs thread pool
+#
+#   python bench/bench_enrichment.py --companies 300 --latency 0.05 --workers 1 8
+#
+# Run from 'app/'. The persistent response cache is disabled so every lookup reaches the stub.
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import utils.data_enrichement as enrichment
+from enrich_stub_server import start_stub_server, stub_endpoints
+
+def make_advertisers(n: int) -> pd.DataFrame:
+    return pd.DataFrame({"advertiser_name": [f"Advertiser {i:05d}" for i in range(n)]})
+
+def _reset_caches() -> None:
+    for cache in (enrichment._cache_qid, enrichment._cache_props, enrichment._cache_domain, enrichment._cache_oc_country):
+        cache.clear()
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark enrich_companies against a local stub server.")
+    parser.add_argument("--companies", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated network latency per request (s)")
+    parser.add_argument("--pause", type=float, default=0.0, help="per-service rate limit (s between requests)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 8])
+    args = parser.parse_args(argv)
+
+    server = start_stub_server(latency=args.latency)
+    enrichment.ENDPOINTS.update(stub_endpoints(server.base_url))
+    enrichment.ENRICH_CACHE_PATH = ""  # no persistent cache: measure the requests
+    print(f"stub {server.base_url}, {args.companies} companies, latency {args.latency}s, pause {args.pause}s")
+
+    try:
+        for workers in args.workers:
+            _reset_caches()
+            server.requests.clear()
+            df = make_advertisers(args.companies)
+            start = time.perf_counter()
+            enrichment.enrich_companies(df, pause=args.pause, save_every=None, max_workers=workers)
+            elapsed = time.perf_counter() - start
+            filled = int(df[["qid", "country", "website"]].notna().all(axis=1).sum())
+            print(f"workers={workers:<3} {elapsed:7.2f}s  {args.companies / elapsed:8.1f} companies/s  "
+                  f"{sum(server.requests.values())} requests {dict(server.requests)}  filled {filled}/{len(df)}")
+    finally:
+        server.shutdown()
+        server.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+# local stand-in for the enrichment services (Wikipedia, Wikidata SPARQL, Clearbit, OpenCorporates)
+#
+#   python bench/enrich_stub_server.py --port 8765 --latency 0.05
+#
+# Answers are deterministic fakes shaped like the real APIs. Point utils.data_enrichement at it with
+# stub_endpoints(base_url), which returns an ENDPOINTS override.
+import re
+import sys
+import json
+import time
+import zlib
+import argparse
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from typing import Dict
+
+_QID = re.compile(r"wd:(Q\d+)")
+_COUNTRIES = ["France", "United States", "Germany", "Italy", "Spain", "Netherlands"]
+_INDUSTRIES = ["retail", "software", "fashion", "food", "media", "travel"]
+
+def stub_endpoints(base_url: str) -> Dict[str, str]:
+    """ENDPOINTS override for a stub server listening at base_url ('http://127.0.0.1:8765')."""
+    base_url = base_url.rstrip("/")
+    return {
+        "wikipedia": f"{base_url}/wikipedia/{{lang}}/w/api.php",
+        "wikidata": f"{base_url}/wikidata/sparql",
+        "clearbit": f"{base_url}/clearbit/suggest",
+        "opencorporates": f"{base_url}/opencorporates/search",
+    }
+
+def _qid(title: str) -> str:
+    return f"Q{zlib.crc32(title.encode('utf-8')) % 10_000_000}"
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "", name.lower()) or "company"
+
+def _wikipedia(params: Dict[str, str]):
+    if params.get("list") == "search":
+        return {"query": {"search": [{"title": params.get("srsearch", "")}]}}
+    return {"query": {"pages": {"1": {"pageprops": {"wikibase_item": _qid(params.get("titles", ""))}}}}}
+
+def _wikidata(params: Dict[str, str]):
+    bindings = []
+    for qid in _QID.findall(params.get("query", "")):
+        n = int(qid[1:])
+        bindings.append({
+            "c": {"value": f"http://www.wikidata.org/entity/{qid}"},
+            "countryLabel": {"value": _COUNTRIES[n % len(_COUNTRIES)]},
+            "industryLabel": {"value": _INDUSTRIES[n % len(_INDUSTRIES)]},
+            "inception": {"value": f"{1900 + n % 120}-01-01T00:00:00Z"},
+        })
+    return {"results": {"bindings": bindings}}
+
+def _clearbit(params: Dict[str, str]):
+    return [{"domain": f"{_slug(params.get('query', ''))}.com"}]
+
+def _opencorporates(params: Dict[str, str]):
+    return {"results": {"companies": [{"company": {"jurisdiction_code": "fr", "name": params.get("q", "")}}]}}
+
+ROUTES = {"wikipedia": _wikipedia, "wikidata": _wikidata, "clearbit": _clearbit, "opencorporates": _opencorporates}
+
+class StubServer(ThreadingHTTPServer):
+    """Threaded HTTP server counting the requests it answers per service."""
+
+    daemon_threads = True
+
+    def __init__(self, address, latency: float = 0.0):
+        super().__init__(address, _Handler)
+        self.latency = latency
+        self.requests = Counter()
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        service = url.path.strip("/").split("/", 1)[0]
+        route = ROUTES.get(service)
+        if route is None:
+            self.send_error(404)
+            return
+        with self.server.lock:
+            self.server.requests[service] += 1
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        body = json.dumps(route({k: v[0] for k, v in parse_qs(url.query).items()})).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # one line per request would drown the benchmark output
+
+def start_stub_server(host: str = "127.0.0.1", port: int = 0, latency: float = 0.0) -> StubServer:
+    """Serve in a daemon thread (port 0 picks a free port); stop with server.shutdown()."""
+    server = StubServer((host, port), latency=latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Stub of the enrichment services.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every answer")
+    args = parser.parse_args(argv)
+
+    server = StubServer((args.host, args.port), latency=args.latency)
+    print(f"Enrichment stub on {server.base_url}")
+    print(json.dumps(stub_endpoints(server.base_url), indent=2))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(dict(server.requests))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+# checks for utils/cache.py: per-file cache hits and misses, older layouts, the chunked pool runner
+#
+#   python -m pytest -q tests/test_cache.py   (from 'app/')
+import os
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from utils.cache import FileCache, SqliteStore, file_keys, run_chunks
+
+def _text_cache(path: Path, version: int = 1) -> FileCache:
+    return FileCache(str(path), "lengths", ["length INTEGER"], version,
+                     encode=lambda n: (n,), decode=lambda row: row[0], label="test cache")
+
+def _lengths(paths):
+    return [len(Path(p).read_text()) for p in paths]
+
+def test_file_cache_misses_changed_files_and_other_versions(tmp_path):
+    files = [tmp_path / f"{i}.txt" for i in range(3)]
+    for f in files:
+        f.write_text("abc")
+    keys = file_keys([str(f) for f in files] + [str(tmp_path / "missing.txt")])
+    assert list(keys) == [str(f) for f in files]
+
+    cache = _text_cache(tmp_path / "cache.sqlite")
+    cache.put_many({key: 3 for key in keys.values()})
+    assert cache.get_many(list(keys.values())) == {key: 3 for key in keys.values()}
+
+    files[0].write_text("abcdef")
+    os.utime(files[0], ns=(1, 1))
+    fresh = file_keys([str(f) for f in files])
+    assert set(cache.get_many(list(fresh.values()))) == {fresh[str(files[1])], fresh[str(files[2])]}
+    assert _text_cache(tmp_path / "cache.sqlite", version=2).get_many(list(fresh.values())) == {}
+
+def test_file_cache_rebuilds_an_older_layout(tmp_path):
+    db = tmp_path / "cache.sqlite"
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE lengths (path TEXT, size INTEGER, mtime_ns INTEGER, length INTEGER)")
+    conn.execute("INSERT INTO lengths VALUES ('a', 1, 1, 1)")
+    conn.commit()
+    conn.close()
+
+    cache = _text_cache(db)
+    cache.put_many({("b", 2, 2): 5})
+    assert cache.get_many([("a", 1, 1), ("b", 2, 2)]) == {("b", 2, 2): 5}
+
+def test_store_without_path_is_disabled(tmp_path):
+    store = SqliteStore(lambda: "", lambda conn: None, "test cache")
+    assert store.connection() is None
+
+def test_run_chunks_covers_every_item(tmp_path):
+    paths = []
+    for i in range(10):
+        path = tmp_path / f"{i}.txt"
+        path.write_text("x" * i)
+        paths.append(str(path))
+    for workers in (1, 3):
+        results = {}
+        for chunk, lengths in run_chunks(_lengths, paths, 3, workers):
+            results.update(zip(chunk, lengths))
+        assert results == {p: i for i, p in enumerate(paths)}
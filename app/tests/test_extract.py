@@ -0,0 +1,60 @@
+# regression checks for utils/extract.py: zip-slip members are refused, archive handles are closed
+#
+#   python -m pytest -q tests/test_extract.py   (from 'app/')
+import io
+import sys
+import zipfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from utils import extract
+from utils.extract import extract_zip, safe_target
+
+def _zip_bytes(names) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        for name in names:
+            zf.writestr(name, b"{}")
+    return buffer.getvalue()
+
+@pytest.mark.parametrize("name", [
+    "../evil.json",
+    "connections/../../evil.json",
+    "/etc/evil.json",
+    "C:/evil.json",
+    "..\\evil.json",
+])
+def test_safe_target_refuses_paths_outside_target(tmp_path, name):
+    with pytest.raises(ValueError):
+        safe_target(str(tmp_path), name)
+
+def test_safe_target_keeps_members_inside(tmp_path):
+    dest = safe_target(str(tmp_path), "connections/followers_and_following/following.json")
+    assert Path(dest) == tmp_path.resolve() / "connections" / "followers_and_following" / "following.json"
+
+@pytest.mark.parametrize("evil", ["../evil.json", "/tmp/evil.json"])
+def test_extract_zip_writes_nothing_for_unsafe_archive(tmp_path, evil):
+    target = tmp_path / "export"
+    with pytest.raises(ValueError):
+        extract_zip(_zip_bytes(["connections/contacts/synced_contacts.json", evil]), str(target), max_workers=2)
+    # members are validated before anything is written
+    assert not target.exists()
+    assert not (tmp_path / "evil.json").exists()
+
+def test_extract_zip_closes_every_worker_archive(tmp_path, monkeypatch):
+    opened = []
+    real_zipfile = zipfile.ZipFile
+
+    def tracking_zipfile(*args, **kwargs):
+        zf = real_zipfile(*args, **kwargs)
+        opened.append(zf)
+        return zf
+
+    monkeypatch.setattr(extract.zipfile, "ZipFile", tracking_zipfile)
+    names = [f"media/posts/202401/{i}.jpg" for i in range(32)]
+    stats = extract_zip(_zip_bytes(names), str(tmp_path / "export"), max_workers=4)
+
+    assert stats["files"] == len(names)
+    assert opened and all(zf.fp is None for zf in opened)
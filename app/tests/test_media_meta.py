@@ -0,0 +1,39 @@
+# regression checks for utils/media_meta.py: image metadata comes from the headers, never the pixels
+#
+#   python -m pytest -q tests/test_media_meta.py   (from 'app/')
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from utils.media_meta import extract_metadata
+
+def _noise_png(path: Path, width: int, height: int, exif: Image.Exif = None) -> None:
+    # random pixels don't compress: the file is about width * height * 3 bytes
+    pixels = np.random.default_rng(0).integers(0, 256, (height, width, 3), dtype=np.uint8)
+    Image.fromarray(pixels).save(path, exif=exif if exif is not None else Image.Exif())
+
+def test_large_png_reads_size_within_byte_cap(tmp_path):
+    path = tmp_path / "large.png"
+    _noise_png(path, 2000, 1500)
+    assert path.stat().st_size > 8 << 20
+
+    meta = extract_metadata(str(path), max_bytes=64 << 10)
+    assert meta["error"] is None
+    assert (meta["width"], meta["height"]) == (2000, 1500)
+
+def test_png_exif_chunk_is_read(tmp_path):
+    exif = Image.Exif()
+    exif[0x010F] = "Canon"  # Make
+    exif[0x0132] = "2023:07:14 18:02:11"  # DateTime
+    path = tmp_path / "exif.png"
+    _noise_png(path, 1000, 800, exif)
+
+    meta = extract_metadata(str(path), max_bytes=64 << 10)
+    assert meta["error"] is None
+    assert meta["camera_make"] == "Canon"
+    assert pd.Timestamp(meta["taken_at"]) == pd.Timestamp("2023-07-14 18:02:11")
+    assert (meta["width"], meta["height"]) == (1000, 800)
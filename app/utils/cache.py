@@ -0,0 +1,151 @@
+# on-disk caches shared by the utils modules: lazily opened SQLite databases, (path, size, mtime)-keyed
+# tables of per-file results, and the chunked process-pool runner that fills them
+import sqlite3
+import threading
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from utils.export_fs import stat
+
+FileKey = Tuple[str, int, int]  # (path, size, mtime_ns)
+
+# ------------- SQLite database -----------------------------------------------
+
+class SqliteStore:
+    """
+    One SQLite database, opened on first use and shared by every thread of the process.
+    Statements must run under `lock`; connection() returns None when the database can't be used.
+    """
+
+    def __init__(self, path: Union[str, Callable[[], str]], setup: Callable[[sqlite3.Connection], None], label: str):
+        """
+        Args:
+            path: Database file, or a function returning it (read on first use, so the module setting
+                can still be changed before); an empty path disables the store
+            setup: Creates (or migrates) the tables of a new connection
+            label: What the database holds, for the warning shown when it can't be opened
+        """
+        self.path, self.setup, self.label = path, setup, label
+        self.lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._failed = False
+
+    def connection(self) -> Optional[sqlite3.Connection]:
+        if self._conn is None and not self._failed:
+            with self.lock:
+                if self._conn is None and not self._failed:
+                    self._conn = self._open()
+        return self._conn
+
+    def _open(self) -> Optional[sqlite3.Connection]:
+        path = self.path() if callable(self.path) else self.path
+        if not path:
+            return None
+        try:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(path, check_same_thread=False)
+            self.setup(conn)
+            conn.commit()
+            return conn
+        except (OSError, sqlite3.Error) as e:
+            print(f"⚠️ Warning: {self.label} disabled ({path}): {e}")
+            self._failed = True
+            return None
+
+# ------------- Per-file cache ------------------------------------------------
+
+def file_keys(paths: Iterable[str]) -> Dict[str, FileKey]:
+    """{path: (path, size, mtime_ns)} of the files that exist (on disk or inside the export ZIP), in order."""
+    keys = {}
+    for path in dict.fromkeys(paths):
+        try:
+            keys[path] = (path, *stat(path))
+        except OSError:
+            continue
+    return keys
+
+class FileCache:
+    """
+    Results computed from a file, stored per (path, size, mtime_ns) and per version: a file
+    changed since, or a result of an older version, is a miss.
+    """
+
+    def __init__(self, path: Union[str, Callable[[], str]], table: str, columns: Sequence[str], version: int,
+                 encode: Callable[[Any], tuple], decode: Callable[[tuple], Any], label: str):
+        """
+        Args:
+            path: Database file (see SqliteStore)
+            table: Table name
+            columns: Value columns with their SQLite type (e.g. ['digest TEXT'])
+            version: Bump it when the stored values change meaning
+            encode: Value -> tuple aligned with `columns`
+            decode: Row of `columns` -> value
+            label: What the cache holds, for warnings
+        """
+        self.table, self.columns, self.version = table, list(columns), version
+        self.encode, self.decode = encode, decode
+        self.store = SqliteStore(path, self._setup, label)
+
+    def _setup(self, conn: sqlite3.Connection) -> None:
+        names = ["path", "size", "mtime_ns", "version"] + [c.split()[0] for c in self.columns]
+        existing = [row[1] for row in conn.execute(f"PRAGMA table_info({self.table})")]
+        if existing and existing != names:
+            conn.execute(f"DROP TABLE {self.table}")  # a cache: an older layout is rebuilt, not migrated
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} (path TEXT, size INTEGER, mtime_ns INTEGER, version INTEGER, "
+            f"{', '.join(self.columns)}, PRIMARY KEY (path, size, mtime_ns, version))"
+        )
+
+    def get_many(self, keys: List[FileKey], chunk_size: int = 300) -> Dict[FileKey, Any]:
+        """Stored values of the keys that have one."""
+        conn = self.store.connection()
+        if conn is None:
+            return {}
+        values = ", ".join(c.split()[0] for c in self.columns)
+        found = {}
+        with self.store.lock:
+            for i in range(0, len(keys), chunk_size):
+                chunk = keys[i:i + chunk_size]
+                rows = conn.execute(
+                    f"SELECT path, size, mtime_ns, {values} FROM {self.table} "
+                    f"WHERE version = ? AND path IN ({','.join('?' * len(chunk))})",
+                    (self.version, *(path for path, _, _ in chunk)),
+                ).fetchall()
+                wanted = set(chunk)
+                found.update((tuple(row[:3]), self.decode(row[3:])) for row in rows if tuple(row[:3]) in wanted)
+        return found
+
+    def put_many(self, results: Dict[FileKey, Any]) -> None:
+        conn = self.store.connection()
+        if conn is None or not results:
+            return
+        with self.store.lock:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} VALUES ({', '.join('?' * (4 + len(self.columns)))})",
+                [(*key, self.version, *self.encode(value)) for key, value in results.items()],
+            )
+            conn.commit()
+
+# ------------- Chunked process pool ------------------------------------------
+
+def run_chunks(func: Callable[..., list], items: List, chunk_size: int, max_workers: int,
+               *args) -> Iterator[Tuple[list, list]]:
+    """
+    Yield (chunk, func(chunk, *args)) for each chunk of `items`, as soon as it is done.
+
+    Chunks run on a process pool when there are several and max_workers > 1 (in completion order),
+    otherwise in the current process. Closing the generator early cancels the chunks not started yet.
+    """
+    chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+    if max_workers <= 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            yield chunk, func(chunk, *args)
+        return
+    pool = ProcessPoolExecutor(max_workers=min(max_workers, len(chunks)))
+    try:
+        futures = {pool.submit(func, chunk, *args): chunk for chunk in chunks}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+    finally:
+        pool.shutdown(cancel_futures=True)
@@ -1,7 +1,13 @@
+import os
+import json
 import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict, Any, Optional, Iterable
 import requests
 import pandas as pd
+from utils.cache import SqliteStore
 
 # ------------- Config for enrichement --------------------------------------------------------
 UA = {"User-Agent": "Lou-CompanyEnricher/0.1 (contact: you@example.com)"}
@@ -11,12 +17,94 @@ JURIS_MAP = {
     "nl": "Netherlands", "de": "Germany", "at": "Austria", "ch": "Switzerland",
     "it": "Italy", "es": "Spain", "be": "Belgium"
 }
-# polite rate-limit between external requests (seconds)
+# polite rate-limit between external requests to the same service (seconds)
 REQUEST_PAUSE = 0.2
+# number of advertisers enriched concurrently
+ENRICH_WORKERS = 8
 
-# ------------- HTTP utils (shared session + retry/backoff) -------------------
-_session = requests.Session()
-_session.headers.update(UA)
+# Service endpoints (override to point the engine at a local stub server)
+ENDPOINTS = {
+    "wikipedia": "https://{lang}.wikipedia.org/w/api.php",
+    "wikidata": "https://query.wikidata.org/sparql",
+    "clearbit": "https://autocomplete.clearbit.com/v1/companies/suggest",
+    "opencorporates": "https://api.opencorporates.com/v0.4/companies/search",
+}
+
+# Persistent response cache (survives restarts), entries expire after the TTL
+ENRICH_CACHE_PATH = os.getenv("ENRICH_CACHE_PATH", "./data/.cache/enrichment.sqlite")
+ENRICH_CACHE_TTL = float(os.getenv("ENRICH_CACHE_TTL", 30 * 24 * 3600))
+
+# ------------- Rate limiting (one token bucket per service) ------------------
+class TokenBucket:
+    """Thread-safe token bucket: `rate` requests per second, bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+_buckets: Dict[str, TokenBucket] = {}
+
+def set_request_pause(pause: float) -> None:
+    """(Re)create one bucket per service allowing one request every `pause` seconds."""
+    rate = 1.0 / pause if pause and pause > 0 else float("inf")
+    for service in ENDPOINTS:
+        _buckets[service] = TokenBucket(rate)
+
+set_request_pause(REQUEST_PAUSE)
+
+# ------------- Response cache (SQLite) ---------------------------------------
+# an empty ENRICH_CACHE_PATH disables it
+_response_cache = SqliteStore(
+    lambda: ENRICH_CACHE_PATH,
+    lambda conn: conn.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, body TEXT, fetched_at REAL)"),
+    "enrichment cache",
+)
+
+def _cache_key(url: str, params: Optional[Dict[str, Any]], headers: Optional[Dict[str, str]]) -> str:
+    raw = json.dumps([url, sorted((params or {}).items()), (headers or {}).get("Accept")], default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+def _cache_read(key: str) -> Any:
+    conn = _response_cache.connection()
+    if conn is None:
+        return None
+    with _response_cache.lock:
+        row = conn.execute("SELECT body, fetched_at FROM responses WHERE key = ?", (key,)).fetchone()
+    if row is None or time.time() - row[1] > ENRICH_CACHE_TTL:
+        return None
+    return json.loads(row[0])
+
+def _cache_write(key: str, value: Any) -> None:
+    conn = _response_cache.connection()
+    if conn is None:
+        return
+    with _response_cache.lock:
+        conn.execute("INSERT OR REPLACE INTO responses (key, body, fetched_at) VALUES (?, ?, ?)", (key, json.dumps(value), time.time()))
+        conn.commit()
+
+# ------------- HTTP utils (per-thread session + retry/backoff) ---------------
+_local = threading.local()
+
+def _session() -> requests.Session:
+    if not hasattr(_local, "session"):
+        _local.session = requests.Session()
+        _local.session.headers.update(UA)
+    return _local.session
 
 RETRYABLE = {429, 500, 502, 503, 504}
 
@@ -26,23 +114,35 @@ def _json(
     headers: Optional[Dict[str, str]] = None,
     retries: int = 3,
     timeout: int = 20,
+    service: Optional[str] = None,
 ) -> Any:
-    hdrs = {**(_session.headers or {}), **(headers or {})}
+    key = _cache_key(url, params, headers)
+    cached = _cache_read(key)
+    if cached is not None:
+        return cached
+
+    session = _session()
+    hdrs = {**(session.headers or {}), **(headers or {})}
+    bucket = _buckets.get(service)
     for k in range(retries):
-        r = _session.get(url, params=params, headers=hdrs, timeout=timeout)
+        if bucket is not None:
+            bucket.acquire()
+        r = session.get(url, params=params, headers=hdrs, timeout=timeout)
         if r.status_code in RETRYABLE:
             # exponential-ish backoff
             time.sleep(1.2 * (k + 1))
             continue
         r.raise_for_status()
         try:
-            return r.json()
+            out = r.json()
         except Exception:
             raise RuntimeError(f"Non-JSON from {url} (status {r.status_code})")
+        _cache_write(key, out)
+        return out
     raise RuntimeError(f"Failed after {retries} attempts: {url}")
 
 # ------------- Providers -----------------------------------------------------
-# (simple in-memory caches to avoid repeated calls on same names/qids)
+# (in-memory caches on top of the persistent response cache, to avoid repeated calls on same names/qids)
 _cache_qid: Dict[str, Optional[str]] = {}
 _cache_props: Dict[str, Dict[str, Any]] = {}
 _cache_domain: Dict[str, Optional[str]] = {}
@@ -50,40 +150,37 @@ _cache_oc_country: Dict[str, Optional[str]] = {}
 
 def wikipedia_qid(name: str, langs: Iterable[str] = WIKIPEDIA_LANGS) -> Optional[str]:
     """Find best Wikipedia page then return its Wikidata QID."""
+    langs = tuple(langs)
     key = f"{name}|{'-'.join(langs)}"
     if key in _cache_qid:
         return _cache_qid[key]
     for lang in langs:
         data = _json(
-            f"https://{lang}.wikipedia.org/w/api.php",
+            ENDPOINTS["wikipedia"].format(lang=lang),
             {"action": "query", "list": "search", "srsearch": name, "srlimit": 1, "format": "json"},
+            service="wikipedia",
         )
         hits = data.get("query", {}).get("search", [])
         if not hits:
             continue
         title = hits[0]["title"]
         data2 = _json(
-            f"https://{lang}.wikipedia.org/w/api.php",
+            ENDPOINTS["wikipedia"].format(lang=lang),
             {"action": "query", "titles": title, "prop": "pageprops", "format": "json"},
+            service="wikipedia",
         )
         pages = data2.get("query", {}).get("pages", {})
         for _, p in pages.items():
             qid = p.get("pageprops", {}).get("wikibase_item")
             if qid:
                 _cache_qid[key] = qid
-                time.sleep(REQUEST_PAUSE)
                 return qid
-        time.sleep(REQUEST_PAUSE)
     _cache_qid[key] = None
     return None
 
-def wikidata_props(qid: str) -> Dict[str, Any]:
-    """Return selected props for a Wikidata entity."""
-    if qid in _cache_props:
-        return _cache_props[qid]
-    sparql = f"""
-    SELECT ?countryLabel ?industryLabel ?hqLabel ?inception ?website WHERE {{
-      VALUES ?c {{ wd:{qid} }}
+WIKIDATA_PROPS_SPARQL = """
+    SELECT ?c ?countryLabel ?industryLabel ?hqLabel ?inception ?website WHERE {{
+      VALUES ?c {{ {values} }}
       OPTIONAL {{ ?c wdt:P17  ?country.   }}
       OPTIONAL {{ ?c wdt:P452 ?industry.  }}
       OPTIONAL {{ ?c wdt:P159 ?hq.        }}
@@ -92,41 +189,63 @@ def wikidata_props(qid: str) -> Dict[str, Any]:
       SERVICE wikibase:label {{ bd:serviceParam wikibase:language "en,fr". }}
     }}
     """
-    js = _json(
-        "https://query.wikidata.org/sparql",
-        params={"query": sparql},
-        headers={"Accept": "application/sparql-results+json"},
-        timeout=25,
-    )
-    rows = js.get("results", {}).get("bindings", [])
-    if not rows:
-        _cache_props[qid] = {}
-        return {}
-    r = rows[0]
-    getv = lambda k: r[k]["value"] if k in r else None
-    out = {
-        "country": getv("countryLabel"),
-        "industry": getv("industryLabel"),
-        "hq_location": getv("hqLabel"),
-        "inception": getv("inception"),
-        "website": getv("website"),
-    }
-    _cache_props[qid] = out
-    time.sleep(REQUEST_PAUSE)
-    return out
+# QIDs per SPARQL query in wikidata_props_batch
+WIKIDATA_BATCH_SIZE = 50
+
+def wikidata_props(qid: str) -> Dict[str, Any]:
+    """Return selected props for a Wikidata entity."""
+    if qid in _cache_props:
+        return _cache_props[qid]
+    return wikidata_props_batch([qid]).get(qid, {})
+
+def wikidata_props_batch(qids: Iterable[str], chunk_size: int = WIKIDATA_BATCH_SIZE) -> Dict[str, Dict[str, Any]]:
+    """
+    Return selected props for many Wikidata entities, one SPARQL `VALUES` query per chunk.
+    Results are fanned out into `_cache_props` (entities without data get an empty dict).
+    """
+    qids = [q for q in dict.fromkeys(qids) if q]
+    todo = [q for q in qids if q not in _cache_props]
+    for i in range(0, len(todo), max(1, chunk_size)):
+        chunk = todo[i:i + max(1, chunk_size)]
+        js = _json(
+            ENDPOINTS["wikidata"],
+            params={"query": WIKIDATA_PROPS_SPARQL.format(values=" ".join(f"wd:{q}" for q in chunk))},
+            headers={"Accept": "application/sparql-results+json"},
+            timeout=25,
+            service="wikidata",
+        )
+        # OPTIONAL joins can yield several rows per entity: keep the first one
+        first: Dict[str, Dict[str, Any]] = {}
+        for r in js.get("results", {}).get("bindings", []):
+            q = r.get("c", {}).get("value", "").rsplit("/", 1)[-1]
+            first.setdefault(q, r)
+        for q in chunk:
+            r = first.get(q)
+            if r is None:
+                _cache_props[q] = {}
+                continue
+            getv = lambda k: r[k]["value"] if k in r else None
+            _cache_props[q] = {
+                "country": getv("countryLabel"),
+                "industry": getv("industryLabel"),
+                "hq_location": getv("hqLabel"),
+                "inception": getv("inception"),
+                "website": getv("website"),
+            }
+    return {q: _cache_props.get(q, {}) for q in qids}
 
 def clearbit_domain(name: str) -> Optional[str]:
     """Clearbit autocomplete to guess website from company name."""
     if name in _cache_domain:
         return _cache_domain[name]
     js = _json(
-        "https://autocomplete.clearbit.com/v1/companies/suggest",
+        ENDPOINTS["clearbit"],
         params={"query": name},
+        service="clearbit",
     )
     dom = js[0].get("domain") if js else None
     out = f"https://{dom}" if dom else None
     _cache_domain[name] = out
-    time.sleep(REQUEST_PAUSE)
     return out
 
 def opencorporates_country(name: str) -> Optional[str]:
@@ -134,8 +253,9 @@ def opencorporates_country(name: str) -> Optional[str]:
     if name in _cache_oc_country:
         return _cache_oc_country[name]
     js = _json(
-        "https://api.opencorporates.com/v0.4/companies/search",
+        ENDPOINTS["opencorporates"],
         params={"q": name, "per_page": 1},
+        service="opencorporates",
     )
     comps = js.get("results", {}).get("companies", [])
     if not comps:
@@ -146,13 +266,11 @@ def opencorporates_country(name: str) -> Optional[str]:
     if juris and juris[:2] in JURIS_MAP:
         out = JURIS_MAP[juris[:2]]
         _cache_oc_country[name] = out
-        time.sleep(REQUEST_PAUSE)
         return out
     addr = c.get("registered_address", {})
     if isinstance(addr, dict) and addr.get("country"):
         out = addr.get("country")
         _cache_oc_country[name] = out
-        time.sleep(REQUEST_PAUSE)
         return out
     _cache_oc_country[name] = None
     return None
@@ -160,9 +278,21 @@ def opencorporates_country(name: str) -> Optional[str]:
 # ------------- Row-level backfill -------------------------------------------
 NEEDED_COLS = ["qid", "country", "industry", "hq_location", "inception", "website"]
 
-def backfill_from_services(row: pd.Series, name_col: str) -> Dict[str, Any]:
+def _is_missing(value: Any) -> bool:
+    return pd.isna(value) or not str(value).strip()
+
+def resolve_qid(name: str) -> Optional[str]:
+    """Wikidata QID for a company name, trying both Wikipedia language orders."""
+    q = wikipedia_qid(name)
+    if not q:
+        # try other order if needed
+        q = wikipedia_qid(name, langs=reversed(WIKIPEDIA_LANGS))
+    return q
+
+def backfill_from_services(row: pd.Series, name_col: str, qid: Optional[str] = None) -> Dict[str, Any]:
     """
     Given a row, try to fill missing NEEDED_COLS using providers.
+    `qid` can carry a QID already resolved for this row (skips the Wikipedia lookup).
     Returns a dict of {col: new_value, ...} for what changed.
     """
     out: Dict[str, Any] = {}
@@ -171,26 +301,23 @@ def backfill_from_services(row: pd.Series, name_col: str) -> Dict[str, Any]:
         return out
 
     # QID (then Wikidata props)
-    if pd.isna(row.get("qid")) or not str(row.get("qid")).strip():
-        q = wikipedia_qid(name)
-        if not q:
-            # try other order if needed
-            q = wikipedia_qid(name, langs=reversed(WIKIPEDIA_LANGS))
+    if _is_missing(row.get("qid")):
+        q = qid or resolve_qid(name)
         if q:
             out["qid"] = q
             props = wikidata_props(q)
             for k, v in props.items():
-                if k in NEEDED_COLS and (pd.isna(row.get(k)) or not str(row.get(k)).strip()) and v:
+                if k in NEEDED_COLS and _is_missing(row.get(k)) and v:
                     out[k] = v
 
     # Website from Clearbit (only if still missing or not set by Wikidata)
-    if (pd.isna(row.get("website")) or not str(row.get("website")).strip()):
+    if _is_missing(row.get("website")):
         w = clearbit_domain(name)
         if w:
             out.setdefault("website", w)
 
     # Country from OpenCorporates (if still missing)
-    if (pd.isna(row.get("country")) or not str(row.get("country")).strip()):
+    if _is_missing(row.get("country")):
         co = opencorporates_country(name)
         if co:
             out.setdefault("country", co)
@@ -205,6 +332,7 @@ def enrich_companies(
     save_every: Optional[int] = 100,
     save_path: str = "enriched_partial.csv",
     only_if_missing: bool = True,
+    max_workers: int = ENRICH_WORKERS,
 ) -> pd.DataFrame:
     """
     Enrich a DataFrame in-place and return it.
@@ -216,13 +344,15 @@ def enrich_companies(
     name_col : str
         Column with company names (defaults to 'advertiser_name').
     pause : float
-        Sleep between external requests (politeness).
+        Minimum delay between two requests to the same service (politeness).
     save_every : int or None
         If set, saves a partial CSV every N processed rows.
     save_path : str
         Path for partial saves.
     only_if_missing : bool
         If True, process only rows where at least one of NEEDED_COLS is missing.
+    max_workers : int
+        Rows enriched concurrently; each service keeps its own rate limit.
 
     Returns
     -------
@@ -244,25 +374,51 @@ def enrich_companies(
     else:
         idxs = df.index
 
+    set_request_pause(pause)
+
+    # rows are copied out up front; workers only call the providers and df is written from this thread
+    rows = {idx: df.loc[idx] for idx in idxs}
+
+    def _try_resolve_qid(name):
+        try:
+            return resolve_qid(name)
+        except Exception:
+            return None  # retried (and reported) by backfill_from_services
+
     updated = 0
-    for i, idx in enumerate(idxs, 1):
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        # Phase 1: resolve every missing QID
+        need_qid = {
+            idx: str(row.get(name_col) or "").strip()
+            for idx, row in rows.items()
+            if _is_missing(row.get("qid")) and str(row.get(name_col) or "").strip()
+        }
+        qids = dict(zip(need_qid, pool.map(_try_resolve_qid, need_qid.values())))
+
+        # Phase 2: fetch the Wikidata props of all of them in batched SPARQL queries
         try:
-            changes = backfill_from_services(df.loc[idx], name_col=name_col)
-            if changes:
-                for k, v in changes.items():
-                    df.at[idx, k] = v
-                updated += 1
+            wikidata_props_batch(q for q in qids.values() if q)
         except Exception as e:
-            df.at[idx, "enrich_error"] = str(e)[:200]
-        finally:
-            # brief pause to avoid hammering APIs
-            time.sleep(pause)
+            print(f"⚠️ Batched Wikidata lookup failed, falling back to per-QID queries: {e}")
 
-        if save_every and i % save_every == 0:
+        # Phase 3: per-row backfill (props now come from the cache)
+        futures = {pool.submit(backfill_from_services, row, name_col, qids.get(idx)): idx for idx, row in rows.items()}
+        for i, future in enumerate(as_completed(futures), 1):
+            idx = futures[future]
             try:
-                df.to_csv(save_path, index=False)
-            except Exception:
-                pass  # best effort
+                changes = future.result()
+                if changes:
+                    for k, v in changes.items():
+                        df.at[idx, k] = v
+                    updated += 1
+            except Exception as e:
+                df.at[idx, "enrich_error"] = str(e)[:200]
+
+            if save_every and i % save_every == 0:
+                try:
+                    df.to_csv(save_path, index=False)
+                except Exception:
+                    pass  # best effort
 
     print(f"Rows updated: {updated} / {len(idxs)}")
     return df
@@ -0,0 +1,226 @@
+# near-duplicate pictures across posts / archived_posts / recently_deleted / stories, by perceptual hash
+# hashes are computed on a process pool and cached on disk per (path, size, mtime); lookups go through a BK-tree
+import os
+import numpy as np
+import pandas as pd
+from typing import Iterable, List, Optional, Tuple
+
+from PIL import Image, ImageOps
+from utils.cache import FileCache, file_keys, run_chunks
+from utils.export_fs import open_binary
+
+# ------------- Config --------------------------------------------------------
+HASH_CACHE_PATH = os.getenv("HASH_CACHE_PATH", "./data/.cache/image_hashes.sqlite")
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", min(8, os.cpu_count() or 1)))
+DUP_MAX_DISTANCE = int(os.getenv("DUP_MAX_DISTANCE", 6))  # bits out of 64 (dHash and pHash must both be that close)
+DUP_MAX_COLOR_DIFF = 24  # per RGB channel, on the mean colour (the hashes are grayscale: recoloured posts look alike)
+HASH_CHUNK = 64
+IMAGE_EXTS = {"jpg", "jpeg", "png", "webp"}
+# which copy of a duplicate group is kept when they are collapsed (then the oldest)
+KEEP_ORDER = ["posts", "archived_posts", "stories", "profile", "recently_deleted"]
+_HASH_VERSION = 1
+
+# ------------- Hashing -------------------------------------------------------
+
+def _dct_matrix(n: int = 32) -> np.ndarray:
+    k = np.arange(n)
+    m = np.cos(np.pi * (2 * k[None, :] + 1) * k[:, None] / (2 * n)) * np.sqrt(2 / n)
+    m[0] /= np.sqrt(2)
+    return m
+
+_DCT32 = _dct_matrix(32)
+
+def _bits(mask: np.ndarray) -> int:
+    return int.from_bytes(np.packbits(mask.ravel()).tobytes(), "big")
+
+def dhash(img: Image.Image) -> int:
+    """64-bit difference hash: is each pixel brighter than its right neighbour, on a 9x8 grayscale."""
+    px = np.asarray(img.convert("L").resize((9, 8), Image.Resampling.LANCZOS), dtype=np.int16)
+    return _bits(px[:, 1:] > px[:, :-1])
+
+def phash(img: Image.Image) -> int:
+    """64-bit DCT hash: low frequencies of a 32x32 grayscale above their median."""
+    px = np.asarray(img.convert("L").resize((32, 32), Image.Resampling.LANCZOS), dtype=np.float64)
+    low = (_DCT32 @ px @ _DCT32.T)[:8, :8].ravel()
+    return _bits(low > np.median(low[1:]))
+
+def mean_color(img: Image.Image) -> int:
+    """Average colour as 0xRRGGBB."""
+    r, g, b = (int(round(c)) for c in np.asarray(img.convert("RGB").resize((16, 16)), dtype=np.float64).reshape(-1, 3).mean(axis=0))
+    return (r << 16) | (g << 8) | b
+
+def color_diff(a: int, b: int) -> int:
+    """Largest per-channel difference between two mean_color values."""
+    return max(abs(((a >> shift) & 0xFF) - ((b >> shift) & 0xFF)) for shift in (16, 8, 0))
+
+def hash_image(path: str) -> Tuple[Optional[int], Optional[int], Optional[int]]:
+    """(dhash, phash, mean colour) of an image file, Nones if it can't be decoded."""
+    try:
+        with open_binary(path) as f, Image.open(f) as img:
+            img.draft("RGB", (64, 64))  # JPEG: decode at 1/8 scale at most
+            img = ImageOps.exif_transpose(img)
+            return dhash(img), phash(img), mean_color(img)
+    except Exception:
+        return None, None, None
+
+def _hash_chunk(paths: List[str]) -> List[Tuple[Optional[int], Optional[int], Optional[int]]]:
+    return [hash_image(path) for path in paths]
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+# ------------- BK-tree -------------------------------------------------------
+
+class BKTree:
+    """Metric tree over 64-bit hashes: finds every hash within a Hamming radius without comparing all pairs."""
+
+    def __init__(self):
+        self.root: Optional[list] = None  # [hash, items, {distance: child}]
+        self.size = 0
+
+    def add(self, h: int, item) -> None:
+        self.size += 1
+        if self.root is None:
+            self.root = [h, [item], {}]
+            return
+        node = self.root
+        while True:
+            d = hamming(h, node[0])
+            if d == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(d)
+            if child is None:
+                node[2][d] = [h, [item], {}]
+                return
+            node = child
+
+    def search(self, h: int, radius: int) -> List[tuple]:
+        """(distance, item) of every entry within `radius` bits of h."""
+        found, stack = [], [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            d = hamming(h, node[0])
+            if d <= radius:
+                found.extend((d, item) for item in node[1])
+            # triangle inequality: only children at distance d±radius can hold matches
+            for dist, child in node[2].items():
+                if d - radius <= dist <= d + radius:
+                    stack.append(child)
+        return found
+
+# ------------- Persistent cache (SQLite) -------------------------------------
+
+def _signed(h: Optional[int]) -> Optional[int]:
+    return None if h is None else (h - (1 << 64) if h >= 1 << 63 else h)
+
+def _unsigned(h: Optional[int]) -> Optional[int]:
+    return None if h is None else h & ((1 << 64) - 1)
+
+# hashes are stored as signed 64-bit integers (SQLite INTEGER)
+_hash_cache = FileCache(lambda: HASH_CACHE_PATH, "hashes", ["dhash INTEGER", "phash INTEGER", "color INTEGER"], _HASH_VERSION,
+                        encode=lambda h: (_signed(h[0]), _signed(h[1]), h[2]),
+                        decode=lambda row: (_unsigned(row[0]), _unsigned(row[1]), row[2]),
+                        label="image hash cache")
+
+# ------------- Public functions ----------------------------------------------
+
+def hash_images(paths: Iterable[str], max_workers: int = HASH_WORKERS) -> pd.DataFrame:
+    """
+    Perceptual hashes of image files, computed only for the files not in cache.
+
+    Args:
+        paths: Image files (on disk or inside the export ZIP)
+        max_workers: Worker processes; 1 hashes in the current process
+
+    Returns:
+        DataFrame with path, size, dhash, phash, color (Python ints, None when undecodable)
+    """
+    keys = file_keys(paths)
+    found = _hash_cache.get_many(list(keys.values()))
+    todo = [path for path, key in keys.items() if key not in found]
+    for chunk, hashes in run_chunks(_hash_chunk, todo, HASH_CHUNK, max_workers):
+        fresh = {keys[path]: h for path, h in zip(chunk, hashes)}
+        _hash_cache.put_many(fresh)
+        found.update(fresh)
+
+    rows = [(path, key[1], *found[key]) for path, key in keys.items()]
+    # object columns: 64-bit hashes must not go through float64 when some are missing
+    df = pd.DataFrame(rows, columns=["path", "size", "dhash", "phash", "color"], dtype=object)
+    df["size"] = df["size"].astype("int64")
+    return df
+
+def find_duplicates(df_media_prep: pd.DataFrame, root: str, max_distance: int = DUP_MAX_DISTANCE,
+                    max_workers: int = HASH_WORKERS) -> pd.DataFrame:
+    """
+    Group the pictures of the export that are the same image (re-encoded, resized or identical copies).
+
+    Args:
+        df_media_prep: Output of preprocess_data(df_media=...)
+        root: Folder relative_path is relative to (DATA_PATH/media)
+        max_distance: Max Hamming distance, on both hashes, between two copies
+        max_workers: Worker processes for hashing
+
+    Returns:
+        One row per picture: relative_path, media_type, size, group (id of its duplicate group, -1 when unique),
+        group_size, keep (the copy kept when duplicates are collapsed)
+    """
+    columns = ["relative_path", "media_type", "size", "group", "group_size", "keep"]
+    if df_media_prep is None or df_media_prep.empty or "relative_path" not in df_media_prep.columns:
+        return pd.DataFrame(columns=columns)
+    media = df_media_prep[df_media_prep["ext"].isin(IMAGE_EXTS)] if "ext" in df_media_prep.columns else df_media_prep
+    media = media.dropna(subset=["relative_path"]).drop_duplicates("relative_path")
+    paths = {f"{root}/{rel}": rel for rel in media["relative_path"]}
+
+    hashes = hash_images(paths, max_workers).dropna(subset=["dhash", "phash"])
+    hashes["relative_path"] = hashes["path"].map(paths)
+    hashes = hashes.merge(media[["relative_path", "media_type", "timestamp"]], on="relative_path", how="left")
+    if hashes.empty:
+        return pd.DataFrame(columns=columns)
+
+    # identical dHashes share a tree node; only the distinct ones are searched
+    tree = BKTree()
+    dh, ph, color = hashes["dhash"].tolist(), hashes["phash"].tolist(), hashes["color"].tolist()
+    for i, h in enumerate(dh):
+        tree.add(h, i)
+
+    parent = list(range(len(hashes)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    searched = set()
+    for i, h in enumerate(dh):
+        if h in searched:
+            continue
+        searched.add(h)
+        group = [j for _, j in tree.search(h, max_distance)]
+        for j in group:
+            for k in group:
+                # dHash finds the candidates, pHash and the mean colour confirm them
+                if (j < k and hamming(ph[j], ph[k]) <= max_distance and color_diff(color[j], color[k]) <= DUP_MAX_COLOR_DIFF
+                        and find(j) != find(k)):
+                    parent[find(k)] = find(j)
+
+    hashes["group"] = [find(i) for i in range(len(hashes))]
+    hashes["group_size"] = hashes.groupby("group")["group"].transform("size")
+    hashes.loc[hashes["group_size"] == 1, "group"] = -1
+
+    rank = hashes["media_type"].astype(object).map({t: i for i, t in enumerate(KEEP_ORDER)}).fillna(len(KEEP_ORDER))
+    order = hashes.assign(_rank=rank).sort_values(["_rank", "timestamp", "relative_path"], na_position="last")
+    first = order.drop_duplicates("group").index
+    hashes["keep"] = (hashes["group"] == -1) | hashes.index.isin(first)
+    return hashes[columns].reset_index(drop=True)
+
+def duplicate_summary(dups: pd.DataFrame) -> dict:
+    """Copies that collapsing would hide, and their size on disk."""
+    extra = dups[~dups["keep"]] if not dups.empty else dups
+    return {
+        "groups": int(dups.loc[dups["group"] >= 0, "group"].nunique()) if not dups.empty else 0,
+        "duplicate_files": len(extra),
+        "duplicate_bytes": int(extra["size"].sum()) if not extra.empty else 0,
+        "total_bytes": int(dups["size"].sum()) if not dups.empty else 0,
+    }
@@ -0,0 +1,121 @@
+# read the export from a folder or straight from the downloaded ZIP ('export.zip/connections/...')
+import os
+import re
+import time
+import zipfile
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# '<something>.zip' followed by an optional member path
+_ZIP_PATH = re.compile(r"^(?P<archive>.*?\.zip)(?:/(?P<member>.*))?$", re.IGNORECASE)
+
+# archive path -> (archive mtime_ns, ZipFile, {member: ZipInfo}, {folder: [child names]}, pid)
+_archives: Dict[str, tuple] = {}
+_archives_lock = threading.Lock()
+
+# ------------- ZIP helpers ---------------------------------------------------
+
+def split_zip_path(path: str) -> Optional[Tuple[str, str]]:
+    """'data/export.zip/media/x.jpg' -> ('data/export.zip', 'media/x.jpg'); None for plain paths."""
+    path = str(path).replace("\\", "/")
+    m = _ZIP_PATH.match(path)
+    if not m or not os.path.isfile(m.group("archive")):
+        return None
+    return m.group("archive"), (m.group("member") or "").strip("/")
+
+def _archive(archive: str) -> tuple:
+    """Open an archive once and index its members; reopened when the file changes."""
+    mtime = os.stat(archive).st_mtime_ns
+    with _archives_lock:
+        cached = _archives.get(archive)
+        # forked pool workers must not share the parent's file offset
+        if cached is not None and cached[0] == mtime and cached[4] == os.getpid():
+            return cached
+        zf = zipfile.ZipFile(archive)
+        members, children = {}, {}
+        for info in zf.infolist():
+            name = info.filename.rstrip("/")
+            if not name:
+                continue
+            parts = name.split("/")
+            # register every parent folder, archives don't always have folder entries
+            for i in range(len(parts)):
+                parent, child = "/".join(parts[:i]), parts[i]
+                children.setdefault(parent, set()).add(child)
+            if not info.is_dir():
+                members[name] = info
+        cached = (mtime, zf, members, {k: sorted(v) for k, v in children.items()}, os.getpid())
+        _archives[archive] = cached
+        return cached
+
+def zip_mtime_ns(info: zipfile.ZipInfo) -> int:
+    return int(time.mktime(info.date_time + (0, 0, -1))) * 1_000_000_000
+
+# ------------- Public functions ----------------------------------------------
+
+def is_zip_path(path: str) -> bool:
+    return split_zip_path(path) is not None
+
+def open_binary(path: str):
+    """Open a file of the export for reading bytes, from disk or from inside the ZIP."""
+    split = split_zip_path(path)
+    if split is None:
+        return open(path, "rb")
+    archive, member = split
+    _, zf, members, _, _ = _archive(archive)
+    if member not in members:
+        raise FileNotFoundError(f"No such member in {archive}: {member}")
+    return zf.open(members[member])
+
+def read_bytes(path: str) -> bytes:
+    with open_binary(path) as f:
+        return f.read()
+
+def exists(path: str) -> bool:
+    split = split_zip_path(path)
+    if split is None:
+        return os.path.exists(path)
+    archive, member = split
+    _, _, members, children, _ = _archive(archive)
+    return member in members or member in children
+
+def is_dir(path: str) -> bool:
+    split = split_zip_path(path)
+    if split is None:
+        return os.path.isdir(path)
+    archive, member = split
+    return member in _archive(archive)[3]
+
+def list_dir(path: str) -> List[str]:
+    """Names of the files and folders directly under `path` (sorted); [] if it is not a folder."""
+    split = split_zip_path(path)
+    if split is None:
+        return sorted(os.listdir(path)) if os.path.isdir(path) else []
+    archive, member = split
+    return list(_archive(archive)[3].get(member, []))
+
+def stat(path: str) -> Tuple[int, int]:
+    """(size, mtime_ns) of a file of the export."""
+    split = split_zip_path(path)
+    if split is None:
+        st = os.stat(path)
+        return st.st_size, st.st_mtime_ns
+    archive, member = split
+    info = _archive(archive)[2].get(member)
+    if info is None:
+        raise FileNotFoundError(path)
+    return info.file_size, zip_mtime_ns(info)
+
+def zip_entries(path: str) -> List[Tuple[str, int, int]]:
+    """(path relative to `path`, size, mtime_ns) of every file below a folder of an archive."""
+    archive, member = split_zip_path(path)
+    prefix = f"{member}/" if member else ""
+    return [
+        (name[len(prefix):], info.file_size, zip_mtime_ns(info))
+        for name, info in _archive(archive)[2].items()
+        if name.startswith(prefix)
+    ]
+
+def as_image_source(path: str):
+    """What st.image/st.video accept: the path itself on disk, the member's bytes inside a ZIP."""
+    return read_bytes(path) if is_zip_path(path) else path
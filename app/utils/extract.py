@@ -0,0 +1,125 @@
+# parallel ZIP extraction with member filtering, path validation and progress reporting
+import io
+import os
+import shutil
+import zipfile
+import threading
+from fnmatch import fnmatch
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", min(8, os.cpu_count() or 1)))
+
+# categories the user can leave out of the extraction (patterns on member paths)
+EXTRACT_FILTERS: Dict[str, List[str]] = {
+    "Media (posts, stories, reels)": ["media/*"],
+    "Photos & videos sent in messages": ["your_instagram_activity/messages/*/*/photos/*",
+                                         "your_instagram_activity/messages/*/*/videos/*",
+                                         "your_instagram_activity/messages/*/*/audio/*"],
+}
+
+Source = Union[str, bytes]
+
+# ------------- Member selection ----------------------------------------------
+
+def safe_target(target: str, name: str) -> str:
+    """
+    Destination of a member inside `target`; raises ValueError for absolute paths,
+    drive letters or '..' components that would write outside of it (zip-slip).
+    """
+    clean = name.replace("\\", "/")
+    parts = clean.split("/")
+    if clean.startswith("/") or (parts and ":" in parts[0]) or ".." in parts:
+        raise ValueError(f"Unsafe path in archive: {name!r}")
+    root = os.path.realpath(target)
+    dest = os.path.realpath(os.path.join(root, *[p for p in parts if p]))
+    if os.path.commonpath([root, dest]) != root:
+        raise ValueError(f"Unsafe path in archive: {name!r}")
+    return dest
+
+def _is_skipped(name: str, patterns: Iterable[str]) -> bool:
+    # exports are sometimes wrapped in a top-level folder: test both forms
+    candidates = [name] + ([name.split("/", 1)[1]] if "/" in name else [])
+    return any(fnmatch(c, p) for c in candidates for p in patterns)
+
+def plan_extraction(zf: zipfile.ZipFile, target: str, skip: Iterable[str] = ()) -> List[zipfile.ZipInfo]:
+    """Members to extract (files only), after filtering; every path is validated first."""
+    patterns = [p for category in skip for p in EXTRACT_FILTERS.get(category, [category])]
+    members = []
+    for info in zf.infolist():
+        safe_target(target, info.filename)
+        if info.is_dir() or _is_skipped(info.filename, patterns):
+            continue
+        members.append(info)
+    return members
+
+# ------------- Extraction ----------------------------------------------------
+
+def _opener(source: Source) -> Tuple[Callable[[], zipfile.ZipFile], Callable[[], None]]:
+    """(get, close): get() returns this thread's ZipFile, close() closes every one that was opened."""
+    # one ZipFile per worker thread: ZipFile objects must not be shared for reading in parallel
+    local = threading.local()
+    opened: List[zipfile.ZipFile] = []
+    lock = threading.Lock()
+    def get():
+        if not hasattr(local, "zf"):
+            local.zf = zipfile.ZipFile(io.BytesIO(source) if isinstance(source, bytes) else source)
+            with lock:
+                opened.append(local.zf)
+        return local.zf
+    def close():
+        with lock:
+            while opened:
+                opened.pop().close()
+    return get, close
+
+def _extract_member(get_zip, info: zipfile.ZipInfo, target: str) -> int:
+    dest = safe_target(target, info.filename)
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    with get_zip().open(info) as src, open(dest, "wb") as out:
+        shutil.copyfileobj(src, out, 1 << 20)
+    return info.file_size
+
+def extract_zip(source: Source, target: str, skip: Iterable[str] = (), max_workers: int = EXTRACT_WORKERS,
+                progress: Optional[Callable[[int, int, int, int], None]] = None) -> dict:
+    """
+    Extract an export ZIP with a pool of threads (zlib and file writes release the GIL).
+
+    Args:
+        source: Path of the archive, or its bytes (e.g. an uploaded file's getvalue())
+        target: Destination folder
+        skip: Category names from EXTRACT_FILTERS (or raw fnmatch patterns) to leave out
+        max_workers: Worker threads; 1 extracts sequentially
+        progress: Called from the calling thread as progress(done_files, total_files, done_bytes, total_bytes)
+
+    Returns:
+        {'files', 'bytes', 'skipped'} counts
+    """
+    with zipfile.ZipFile(io.BytesIO(source) if isinstance(source, bytes) else source) as zf:
+        total_members = sum(1 for i in zf.infolist() if not i.is_dir())
+        members = plan_extraction(zf, target, skip)
+    # biggest members first so one large video doesn't end up last on a single worker
+    members.sort(key=lambda i: i.file_size, reverse=True)
+    total_bytes = sum(i.file_size for i in members)
+    os.makedirs(target, exist_ok=True)
+
+    done_files = done_bytes = 0
+    get_zip, close_zips = _opener(source)
+    try:
+        if max_workers <= 1:
+            for info in members:
+                done_bytes += _extract_member(get_zip, info, target)
+                done_files += 1
+                if progress:
+                    progress(done_files, len(members), done_bytes, total_bytes)
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                futures = [pool.submit(_extract_member, get_zip, info, target) for info in members]
+                for future in as_completed(futures):
+                    done_bytes += future.result()
+                    done_files += 1
+                    if progress:
+                        progress(done_files, len(members), done_bytes, total_bytes)
+    finally:
+        close_zips()  # after the pool has shut down: no worker is reading any more
+    return {"files": done_files, "bytes": done_bytes, "skipped": total_members - len(members)}
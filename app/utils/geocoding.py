@@ -0,0 +1,212 @@
+# place name -> (lat, lon) with a persistent cache, an offline gazetteer and an optional Nominatim fallback
+import os
+import re
+import csv
+import gzip
+import time
+import sqlite3
+import unicodedata
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from utils.cache import SqliteStore
+
+Coords = Optional[Tuple[float, float]]
+
+# ------------- Config --------------------------------------------------------
+GEOCODE_CACHE_PATH = os.getenv("GEOCODE_CACHE_PATH", "./data/.cache/geocode.sqlite")
+GAZETTEER_PATH = os.getenv(
+    "GAZETTEER_PATH",
+    str(Path(__file__).resolve().parent.parent / "assets" / "geonames" / "cities15000.txt.gz"),
+)
+# backends tried in order on a cache miss; drop "nominatim" on air-gapped machines
+GEOCODER_BACKENDS = [b.strip() for b in os.getenv("GEOCODER_BACKENDS", "gazetteer,nominatim").split(",") if b.strip()]
+NOMINATIM_USER_AGENT = "insta_dashboard"
+NOMINATIM_PAUSE = 1.0  # Nominatim usage policy: max 1 request per second
+GEOCODE_MISS_TTL = int(os.getenv("GEOCODE_MISS_TTL", 30 * 86_400))  # seconds before an unknown place is tried again
+
+# ------------- Normalization -------------------------------------------------
+
+def normalize_place(name: str) -> str:
+    """'  Île-de-France ' -> 'ile de france', 'Москва' -> 'москва' (diacritics, punctuation and case removed)."""
+    if not isinstance(name, str):
+        return ""
+    text = "".join(c for c in unicodedata.normalize("NFKD", name.casefold()) if not unicodedata.combining(c))
+    text = unicodedata.normalize("NFC", text)
+    text = re.sub(r"[^\w,]+|_", " ", text)
+    text = re.sub(r"\s*,\s*", ", ", text)
+    return text.strip(" ,")
+
+# ------------- Persistent cache (SQLite) -------------------------------------
+def _setup_cache(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS geocode ("
+        " key TEXT PRIMARY KEY, lat REAL, lon REAL, source TEXT, updated_at INTEGER, backends TEXT)"
+    )
+    # caches created before misses recorded the backends they tried
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(geocode)")}
+    if "backends" not in columns:
+        conn.execute("ALTER TABLE geocode ADD COLUMN backends TEXT")
+
+_cache = SqliteStore(lambda: GEOCODE_CACHE_PATH, _setup_cache, "geocode cache")
+
+def cache_get(key: str, backends: Iterable[str] = ()):
+    """
+    Return (found, coords). Misses are cached too, with NULL coordinates and the backends that were tried:
+    a miss only counts while it is younger than GEOCODE_MISS_TTL and covers every backend in `backends`.
+    """
+    conn = _cache.connection()
+    if conn is None:
+        return False, None
+    with _cache.lock:
+        row = conn.execute("SELECT lat, lon, updated_at, backends FROM geocode WHERE key = ?", (key,)).fetchone()
+    if row is None:
+        return False, None
+    lat, lon, updated_at, tried = row
+    if lat is not None:
+        return True, (lat, lon)
+    fresh = time.time() - (updated_at or 0) < GEOCODE_MISS_TTL
+    covered = tried is not None and set(backends) <= set(tried.split(","))
+    return (True, None) if fresh and covered else (False, None)
+
+def cache_put(key: str, coords: Coords, source: str, backends: Iterable[str] = ()) -> None:
+    conn = _cache.connection()
+    if conn is None:
+        return
+    lat, lon = coords if coords else (None, None)
+    with _cache.lock:
+        conn.execute(
+            "INSERT OR REPLACE INTO geocode (key, lat, lon, source, updated_at, backends) VALUES (?, ?, ?, ?, ?, ?)",
+            (key, lat, lon, source, int(time.time()), ",".join(sorted(set(backends))) or None),
+        )
+        conn.commit()
+
+# ------------- Offline gazetteer (GeoNames cities file) ----------------------
+# normalized name -> [(population, lat, lon, country_code), ...] sorted by population desc
+_gazetteer: Optional[Dict[str, List[Tuple[int, float, float, str]]]] = None
+_country_codes: Dict[str, str] = {}
+
+def _load_gazetteer(path: str = GAZETTEER_PATH) -> Dict[str, List[Tuple[int, float, float, str]]]:
+    """Index a GeoNames-format file (cities500/1000/15000.txt, optionally .gz) by name and ascii name."""
+    global _gazetteer
+    if _gazetteer is not None:
+        return _gazetteer
+    index: Dict[str, List[Tuple[int, float, float, str]]] = {}
+    try:
+        opener = gzip.open if str(path).endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            for row in csv.reader(f, delimiter="\t", quoting=csv.QUOTE_NONE):
+                if len(row) < 15:
+                    continue
+                try:
+                    entry = (int(row[14] or 0), float(row[4]), float(row[5]), row[8])
+                except ValueError:
+                    continue
+                names = {row[1], row[2], *[a for a in row[3].split(",") if a]}
+                for n in {normalize_place(n) for n in names}:
+                    if n:
+                        index.setdefault(n, []).append(entry)
+    except OSError as e:
+        print(f"⚠️ Warning: Could not load gazetteer {path}: {e}")
+    for entries in index.values():
+        entries.sort(reverse=True)
+    _gazetteer = index
+    return index
+
+def _country_code(name: str) -> Optional[str]:
+    """'france' -> 'FR' (pycountry), cached."""
+    if name not in _country_codes:
+        try:
+            import pycountry
+            _country_codes[name] = pycountry.countries.lookup(name).alpha_2
+        except (ImportError, LookupError):
+            _country_codes[name] = None
+    return _country_codes[name]
+
+def gazetteer_lookup(name: str) -> Coords:
+    """Look up a place ('Lyon' or 'Lyon, France'); the most populated match wins."""
+    index = _load_gazetteer()
+    key = normalize_place(name)
+    if key in index:
+        _, lat, lon, _ = index[key][0]
+        return lat, lon
+    parts = [p for p in key.split(", ") if p]
+    if not parts or parts[0] not in index:
+        return None
+    candidates = index[parts[0]]
+    # 'City, Country' / 'City, Region, Country': prefer a match in that country
+    country = _country_code(parts[-1]) if len(parts) > 1 else None
+    if country:
+        in_country = [c for c in candidates if c[3] == country]
+        if in_country:
+            candidates = in_country
+    _, lat, lon, _ = candidates[0]
+    return lat, lon
+
+# ------------- Online fallback (Nominatim) -----------------------------------
+_nominatim = None
+_nominatim_last_call = 0.0
+
+def nominatim_lookup(name: str) -> Coords:
+    """Geocode the place name as written with Nominatim (geopy), at most one request per NOMINATIM_PAUSE seconds."""
+    global _nominatim, _nominatim_last_call
+    if _nominatim is None:
+        from geopy.geocoders import Nominatim
+        _nominatim = Nominatim(user_agent=NOMINATIM_USER_AGENT)
+    wait = NOMINATIM_PAUSE - (time.monotonic() - _nominatim_last_call)
+    if wait > 0:
+        time.sleep(wait)
+    try:
+        location = _nominatim.geocode(name.strip())
+    finally:
+        _nominatim_last_call = time.monotonic()
+    return (location.latitude, location.longitude) if location else None
+
+BACKENDS: Dict[str, Callable[[str], Coords]] = {
+    "gazetteer": gazetteer_lookup,
+    "nominatim": nominatim_lookup,
+}
+
+# ------------- Public functions ----------------------------------------------
+
+def geocode(name: str, backends: Iterable[str] = None) -> Coords:
+    """
+    Resolve a place name to (lat, lon), or None.
+
+    Args:
+        name: Free-text place name (e.g. 'Paris, France')
+        backends: Backend names from BACKENDS, tried in order (defaults to GEOCODER_BACKENDS)
+
+    Returns:
+        (latitude, longitude) or None when no backend knows the place
+    """
+    key = normalize_place(name)
+    if not key:
+        return None
+    backends = [b for b in (GEOCODER_BACKENDS if backends is None else backends) if b in BACKENDS]
+    found, coords = cache_get(key, backends)
+    if found:
+        return coords
+
+    online_failed = False
+    for backend in backends:
+        try:
+            coords = BACKENDS[backend](name)
+        except Exception as e:
+            print(f"⚠️ Warning: {backend} could not geocode {name!r}: {e}")
+            online_failed = True
+            continue
+        if coords:
+            cache_put(key, coords, backend)
+            return coords
+
+    # remember the miss and what was tried, unless it may just be a network error
+    if not online_failed:
+        cache_put(key, None, "miss", backends)
+    return None
+
+def geocode_many(names: Iterable[str], backends: Iterable[str] = None) -> List[Coords]:
+    """geocode() each name once; duplicates share the same lookup."""
+    names = list(names)
+    resolved = {n: geocode(n, backends) for n in dict.fromkeys(n for n in names if isinstance(n, str) and n)}
+    return [resolved.get(n) if isinstance(n, str) else None for n in names]
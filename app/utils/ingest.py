@@ -0,0 +1,186 @@
+# incremental load_data(): each section is re-parsed only when its export files changed since the last run
+import re
+import time
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import pandas as pd
+from typing import Set
+
+from utils.io import (
+    DATA_PATH, LOAD_WORKERS, LOAD_DATA_FIELDS,
+    run_sections, merge_sections, placeholder_sections, sections_for_fields, section_paths, load_conversations,
+)
+from utils.manifest import export_manifest
+from utils.export_fs import open_binary
+from utils.snapshot import read_snapshot, save_snapshot, snapshot_tables
+
+_MANIFEST_FIELD = "__manifest__"
+_MESSAGES_PREFIX = "your_instagram_activity/messages/"
+
+# ------------- Manifest diff -------------------------------------------------
+
+def _file_sha1(path: str, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha1()
+    try:
+        with open_binary(path) as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                h.update(chunk)
+    except OSError:
+        return ""
+    return h.hexdigest()
+
+def with_digests(manifest: pd.DataFrame, data_path: str, previous: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Add a sha1 column for the non-media files. Re-extracting a ZIP resets every mtime,
+    so content digests are what tells a re-downloaded but identical JSON file apart.
+    Digests of files whose (size, mtime) did not move are taken from `previous`.
+    """
+    manifest = manifest.copy()
+    known = {}
+    if previous is not None and "sha1" in previous.columns:
+        known = {(p, s, m): d for p, s, m, d in zip(previous["path"], previous["size"], previous["mtime_ns"], previous["sha1"])}
+    manifest["sha1"] = [
+        "" if section == "media" else known.get((p, s, m)) or _file_sha1(f"{data_path}/{p}")
+        for p, s, m, section in zip(manifest["path"], manifest["size"], manifest["mtime_ns"], manifest["section"])
+    ]
+    return manifest
+
+def diff_manifests(old: pd.DataFrame, new: pd.DataFrame) -> Set[str]:
+    """Paths added, removed, or whose size/content changed between two export manifests."""
+    if old is None or old.empty:
+        return set(new["path"])
+    # media files are named after their id: path + size is enough for them
+    keys = ["path", "size", "sha1"]
+    merged = old[keys].merge(new[keys], on=keys, how="outer", indicator=True)
+    return set(merged.loc[merged["_merge"] != "both", "path"])
+
+def _changed_conversations(changed_paths) -> Set[str]:
+    """'<message_type>/<conversation>' ids touched by the changed files."""
+    ids = set()
+    for p in changed_paths:
+        if p.startswith(_MESSAGES_PREFIX):
+            parts = p[len(_MESSAGES_PREFIX):].split("/")
+            if len(parts) >= 3:
+                ids.add(f"{parts[0]}/{parts[1]}")
+    return ids
+
+def _merge_conversations(previous: pd.DataFrame, conv_ids: Set[str], data_path: str) -> pd.DataFrame:
+    """Swap the rows of `conv_ids` in the stored conversations table for freshly parsed ones."""
+    fresh = load_conversations(data_path, conv_ids)["df_all_conversations"]
+    kept = previous[~previous["conv_id"].isin(conv_ids)]
+    merged = pd.concat([kept, fresh], ignore_index=True)
+    return merged.sort_values("conv_id", kind="stable", ignore_index=True)
+
+def _section_manifest(manifest: pd.DataFrame, paths) -> pd.DataFrame:
+    """Rows of the export manifest read by one section."""
+    mask = pd.Series(False, index=manifest.index)
+    for entry in paths:
+        mask |= manifest["path"].str.startswith(entry) if entry.endswith("/") else manifest["path"] == entry
+    return manifest[mask].reset_index(drop=True)
+
+def _section_snapshot(name: str) -> str:
+    return "section-" + re.sub(r"[^\w.-]", "_", name)
+
+def load_section_incremental(name: str, manifest: pd.DataFrame, data_path: str):
+    """
+    Results of one section, from its snapshot when none of its files changed.
+
+    Returns:
+        ({field: value}, what was done: 'cached', 'parsed' or 'merged N conversation(s)')
+    """
+    paths = section_paths(name)
+    if paths is None:
+        return run_sections([name], max_workers=1, data_path=data_path), "parsed"
+
+    snapshot = _section_snapshot(name)
+    stored = read_snapshot(snapshot)
+    previous_manifest = stored.pop(_MANIFEST_FIELD, None) if stored else None
+    section_manifest = with_digests(_section_manifest(manifest, paths), data_path, previous_manifest)
+
+    status = "parsed"
+    if stored is not None and previous_manifest is not None:
+        changed = diff_manifests(previous_manifest, section_manifest)
+        if not changed:
+            return stored, "cached"
+        # conversations are merged folder by folder instead of re-parsing the whole inbox
+        previous_convs = stored.get("df_all_conversations")
+        if name == "conversations" and isinstance(previous_convs, pd.DataFrame) and "conv_id" in previous_convs.columns:
+            conv_ids = _changed_conversations(changed)
+            results = {"df_all_conversations": _merge_conversations(previous_convs, conv_ids, data_path)}
+            status = f"merged {len(conv_ids)} conversation(s)"
+        else:
+            results = run_sections([name], max_workers=1, data_path=data_path)
+    else:
+        results = run_sections([name], max_workers=1, data_path=data_path)
+
+    save_snapshot(snapshot, "incremental", list(results) + [_MANIFEST_FIELD], tuple(results.values()) + (section_manifest,))
+    return results, status
+
+# ------------- Public functions ----------------------------------------------
+
+def load_fields_incremental(fields, data_path: str = None, max_workers: int = LOAD_WORKERS, verbose: bool = True) -> dict:
+    """
+    Load only some load_data() fields, re-using each section's snapshot when its files did not change.
+
+    Args:
+        fields: Names from LOAD_DATA_FIELDS
+        data_path: Root of the Instagram export (DATA_PATH by default); the manifest and the loaders both read it
+        max_workers: Sections are loaded concurrently on this many threads
+        verbose: Print what was done for each section
+
+    Returns:
+        {field: value} for the requested fields
+    """
+    start = time.perf_counter()
+    fields = list(fields)
+    data_path = data_path or DATA_PATH
+    manifest = export_manifest(data_path)
+    names = sections_for_fields(fields)
+
+    results, report = placeholder_sections(), {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(names) or 1))) as pool:
+        futures = {pool.submit(load_section_incremental, name, manifest, data_path): name for name in names}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                section_results, report[name] = future.result()
+                results.update(section_results)
+            except Exception as e:
+                print(f"⚠️ Error loading section {name}: {e}")
+
+    if verbose and report:
+        done = ", ".join(f"{name}: {what}" for name, what in sorted(report.items()) if what != "cached") or "all cached"
+        print(f"Ingest: {done} ({time.perf_counter() - start:.2f}s)")
+    merged = merge_sections(results)
+    return {field: merged.get(field, pd.DataFrame()) for field in fields}
+
+def load_data_incremental(data_path: str = None, max_workers: int = LOAD_WORKERS, verbose: bool = True) -> tuple:
+    """load_data() where only the sections whose files changed since the last run are parsed again."""
+    loaded = load_fields_incremental(LOAD_DATA_FIELDS, data_path, max_workers, verbose)
+    return tuple(loaded[field] for field in LOAD_DATA_FIELDS)
+
+def field_snapshot_files(fields) -> dict:
+    """
+    Parquet files holding each load_data() field in the section snapshots (call after loading them).
+
+    Returns:
+        {field: [files]}; fields split over several sections (follows, logs) have one file per part,
+        fields with a part that is not stored as parquet are left out
+    """
+    files = {}
+    for field in fields:
+        parts, complete = [], True
+        for name in sections_for_fields([field]):
+            if section_paths(name) is None:
+                complete = False
+                break
+            stored = snapshot_tables(_section_snapshot(name))
+            # a section stores its fields under their own name, or under a part name ('follows:followers')
+            keys = [k for k in stored if k == field or (k != _MANIFEST_FIELD and k not in LOAD_DATA_FIELDS)]
+            if not keys:
+                complete = False
+                break
+            parts.extend(stored[k] for k in keys)
+        if complete and parts:
+            files[field] = parts
+    return files
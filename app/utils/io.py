@@ -1,14 +1,39 @@
 import os
-import glob
 import pandas as pd
 import json
 import re
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 from dotenv import load_dotenv
+from utils.manifest import export_manifest
+from utils.export_fs import open_binary, list_dir, is_dir
+
+try:
+    import ijson  # optional: streams message files instead of json.load
+except ImportError:
+    ijson = None
 
 load_dotenv()
-DATA_PATH = os.getenv("DATA_PATH")
+# an uploaded export kept as a ZIP (read in place, see utils/export_fs.py)
+ZIP_IMPORT_PATH = './data/instagram_export.zip'
+# DATA_PATH is the export folder, or the ZIP itself ('./data/export.zip')
+DATA_PATH = os.getenv("DATA_PATH") or (ZIP_IMPORT_PATH if os.path.isfile(ZIP_IMPORT_PATH) else None)
 HEADERS = os.getenv("HEADERS")
+ENRICHED_PATH = './data/advertisers_enriched.csv'
+# worker count for the per-section loaders in load_data() (1 = sequential)
+LOAD_WORKERS = int(os.getenv("LOAD_WORKERS", min(16, (os.cpu_count() or 1) * 2)))
+
+# Names of the objects returned by load_data(), in order
+LOAD_DATA_FIELDS = (
+    "df_contacts", "df_media", "df_follows", "df_devices", "df_camera_info", "df_locations_of_interest",
+    "possible_emails", "profile_based_in", "df_link_history", "recommended_topics", "signup_details",
+    "password_change_activity", "df_last_known_location", "df_logs", "df_all_ads", "substriction_status",
+    "information_youve_submitted_to_advertisers", "advertisers_using_your_activity_or_information",
+    "other_categories_used_to_reach_you", "advertisers_enriched",
+    "df_all_comments", "df_liked_comments", "df_liked_posts", "df_all_conversations",
+    "df_time_spent_on_ig", "df_your_information_download_requests",
+    "df_saved_collections", "df_saved_locations", "df_saved_posts", "df_saved_music",
+    "df_story_likes",
+)
 
 def safe_load_json(filepath, default=None):
     """
@@ -22,9 +47,9 @@ def safe_load_json(filepath, default=None):
         Loaded JSON data or default value
     """
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
+        with open_binary(filepath) as f:
             return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError, IOError) as e:
+    except (FileNotFoundError, json.JSONDecodeError, UnicodeDecodeError, IOError) as e:
         print(f"⚠️ Warning: Could not load {filepath}: {e}")
         return default if default is not None else {}
 
@@ -38,10 +63,94 @@ def safe_json_normalize(data, **kwargs):
         print(f"⚠️ Error normalizing data: {e}")
         return pd.DataFrame()
 
-def load_follows_type(filename, key, follows_type_name, username_field='value'):
+# --- label_values / string_map_data records ---
+# Most export files are lists of records that carry their fields as
+#   "label_values": [{"label": "Website link you visited", "value": "..."}, ...]  or
+#   "string_map_data": {"IP Address": {"value": "..."}, "Time": {"timestamp": ...}}
+# A schema lists the columns to pull out: (column, source, label, attribute, default), where
+# source is 'label_values', 'string_map_data' or 'record' (a top-level key of the record).
+RECORD_SCHEMAS = {
+    "link_history": [
+        ("timestamp", "record", "timestamp", None, None),
+        ("Website_link_you_visited", "label_values", "Website link you visited", "value", None),
+        ("Title of website page you visited", "label_values", "Title of website page you visited", "value", None),
+        ("Website session start time", "label_values", "Website session start time", "value", None),
+        ("Website session end time", "label_values", "Website session end time", "value", None),
+        ("fbid", "record", "fbid", None, None),
+    ],
+    "logs": [
+        ("cookie_name", "string_map_data", "Cookie Name", "value", ""),
+        ("ip_address", "string_map_data", "IP Address", "value", ""),
+        ("port", "string_map_data", "Port", "value", ""),
+        ("language", "string_map_data", "Language Code", "value", ""),
+        ("timestamp", "string_map_data", "Time", "timestamp", 0),
+        ("user_agent", "string_map_data", "User Agent", "value", ""),
+    ],
+    "signup_details": [
+        ("Username", "string_map_data", "Username", "value", "N/A"),
+        ("IP Address", "string_map_data", "IP Address", "value", "N/A"),
+        ("Time", "string_map_data", "Time", "timestamp", 0),
+        ("Email", "string_map_data", "Email", "value", "N/A"),
+        ("Phone Number", "string_map_data", "Phone Number", "value", "N/A"),
+        ("Device", "string_map_data", "Device", "value", "N/A"),
+    ],
+    "last_known_location": [
+        ("imprecise_latitude", "string_map_data", "Imprecise Latitude", "value", 0),
+        ("imprecise_longitude", "string_map_data", "Imprecise Longitude", "value", 0),
+        ("lat", "string_map_data", "Precise Latitude", "value", 0),
+        ("longitude", "string_map_data", "Precise Longitude", "value", 0),
+        ("gps_time_uploaded", "string_map_data", "GPS Time Uploaded", "timestamp", 0),
+    ],
+}
+
+def _record_getters(schema):
+    """One small function per column, reading a record whose label_values were indexed by label."""
+    getters = []
+    for _, source, label, attr, default in schema:
+        if source == "record":
+            getters.append(lambda rec, labels, label=label, default=default: rec.get(label, default))
+        elif source == "label_values":
+            getters.append(lambda rec, labels, label=label, attr=attr, default=default: (labels.get(label) or {}).get(attr, default))
+        else:
+            getters.append(lambda rec, labels, label=label, attr=attr, default=default: ((rec.get("string_map_data") or {}).get(label) or {}).get(attr, default))
+    return getters
+
+def _label_index(record):
+    # first entry wins when a label is repeated, like a next(...) search would
+    labels = {}
+    for lv in record.get("label_values") or ():
+        labels.setdefault(lv.get("label"), lv)
+    return labels
+
+def flatten_records(records, schema):
+    """
+    Flatten export records into a DataFrame, one pass over each record.
+
+    Args:
+        records: List of record dicts
+        schema: List of (column, source, label, attribute, default), e.g. RECORD_SCHEMAS["logs"]
+
+    Returns:
+        DataFrame with one column per schema entry (in order), one row per record
+    """
+    getters = _record_getters(schema)
+    uses_labels = any(source == "label_values" for _, source, *_ in schema)
+    columns = [[] for _ in schema]
+    for record in records:
+        labels = _label_index(record) if uses_labels else None
+        for column, get in zip(columns, getters):
+            column.append(get(record, labels))
+    return pd.DataFrame({name: values for (name, *_), values in zip(schema, columns)}, columns=[c[0] for c in schema])
+
+def flatten_record(record, schema):
+    """Single record -> {column: value} (e.g. the signup details)."""
+    labels = _label_index(record)
+    return {name: get(record, labels) for (name, *_), get in zip(schema, _record_getters(schema))}
+
+def load_follows_type(filename, key, follows_type_name, username_field='value', data_path=None):
     """Helper to load a specific follows type with error handling."""
     try:
-        data = safe_load_json(f'{DATA_PATH}/connections/followers_and_following/{filename}', {key: []})
+        data = safe_load_json(f'{data_path or DATA_PATH}/connections/followers_and_following/{filename}', {key: []})
         df = safe_json_normalize(
             data=data.get(key, []),
             record_path=['string_list_data'],
@@ -67,46 +176,73 @@ def load_follows_type(filename, key, follows_type_name, username_field='value'):
         print(f"⚠️ Error loading {follows_type_name}: {e}")
         return pd.DataFrame(columns=['follows_type', 'username', 'timestamp', 'href'])
 
-def load_data():
-    """Load all Instagram data with error tolerance."""
-    
-    # --- contacts ---
+# ------------- Section loaders -----------------------------------------------
+# Each section reads its own file(s) under the export root it is given and returns
+# {field: value}; they don't depend on each other so load_data() can run them concurrently.
+_SECTION_LOADERS = {}
+# section -> export-relative files/folders ('/'-terminated) it reads; None = always re-run
+_SECTION_PATHS = {}
+# section -> LOAD_DATA_FIELDS entries it feeds
+_SECTION_FIELDS = {}
+
+def section_loader(name, fields, paths=None):
+    """Register a function as a load_data() section producing `fields` from `paths` of the export."""
+    def register(fn):
+        _SECTION_LOADERS[name] = fn
+        _SECTION_FIELDS[name] = tuple(fields)
+        _SECTION_PATHS[name] = tuple(paths) if paths is not None else None
+        return fn
+    return register
+
+def sections_for_fields(fields):
+    """Names of the sections needed to build `fields`."""
+    fields = set(fields)
+    return [name for name, produced in _SECTION_FIELDS.items() if fields & set(produced)]
+
+def section_paths(name):
+    """Export paths read by a section (None: not tied to export files)."""
+    return _SECTION_PATHS[name]
+
+# (filename, json key, follows_type, username field), in df_follows order
+FOLLOWS_FILES = [
+    ('blocked_profiles.json', 'relationships_blocked_users', 'blocked_profiles', 'title'),
+    ('close_friends.json', 'relationships_close_friends', 'close_friends', 'value'),
+    ('followers_1.json', '', 'followers', 'value'),
+    ('following.json', 'relationships_following', 'followings', 'title'),
+    ('recently_unfollowed_profiles.json', 'relationships_unfollowed_users', 'recently_unfollowed_profiles', 'value'),
+    ('removed_suggestions.json', 'relationships_dismissed_suggested_users', 'removed_suggestions', 'value'),
+    ('recent_follow_requests.json', 'relationships_permanent_follow_requests', 'recent_follow_requests', 'value'),
+    ('restricted_profiles.json', 'relationships_restricted_users', 'restricted_profiles', 'value'),
+    ('pending_follow_requests.json', 'relationships_follow_requests_sent', 'pending_follow_requests', 'value'),
+]
+
+def _register_follows_loader(filename, key, follows_type_name, username_field):
+    @section_loader(f"follows:{follows_type_name}", ["df_follows"], paths=[f"connections/followers_and_following/{filename}"])
+    def _load(data_path):
+        return {f"follows:{follows_type_name}": load_follows_type(filename, key, follows_type_name, username_field, data_path)}
+    return _load
+
+for _args in FOLLOWS_FILES:
+    _register_follows_loader(*_args)
+
+@section_loader("contacts", ["df_contacts"], paths=["connections/contacts/synced_contacts.json"])
+def load_contacts(data_path):
     try:
-        contacts_data = safe_load_json(f'{DATA_PATH}/connections/contacts/synced_contacts.json', {"contacts_contact_info": []})
+        contacts_data = safe_load_json(f'{data_path}/connections/contacts/synced_contacts.json', {"contacts_contact_info": []})
         df_contacts = safe_json_normalize(contacts_data.get("contacts_contact_info", []), sep='_')
         if not df_contacts.empty:
             df_contacts = df_contacts.applymap(lambda x: x.get('value') if isinstance(x, dict) else x)
     except Exception as e:
         print(f"⚠️ Error loading contacts: {e}")
         df_contacts = pd.DataFrame()
+    return {"df_contacts": df_contacts}
 
-    # --- followers_and_following ---
-    df_restricted_profiles = load_follows_type('restricted_profiles.json', 'relationships_restricted_users', 'restricted_profiles')
-    df_removed_suggestions = load_follows_type('removed_suggestions.json', 'relationships_dismissed_suggested_users', 'removed_suggestions')
-    df_recently_unfollowed_profiles = load_follows_type('recently_unfollowed_profiles.json', 'relationships_unfollowed_users', 'recently_unfollowed_profiles')
-    df_recent_follow_requests = load_follows_type('recent_follow_requests.json', 'relationships_permanent_follow_requests', 'recent_follow_requests')
-    df_pending_follow_requests = load_follows_type('pending_follow_requests.json', 'relationships_follow_requests_sent', 'pending_follow_requests')
-    df_following = load_follows_type('following.json', 'relationships_following', 'followings', 'title')
-    df_followers = load_follows_type('followers_1.json', '', 'followers')
-    df_close_friends = load_follows_type('close_friends.json', 'relationships_close_friends', 'close_friends')
-    df_blocked_profiles = load_follows_type('blocked_profiles.json', 'relationships_blocked_users', 'blocked_profiles', 'title')
-
-    df_follows = pd.concat([
-        df_blocked_profiles,
-        df_close_friends,
-        df_followers,
-        df_following,
-        df_recently_unfollowed_profiles,
-        df_removed_suggestions,
-        df_recent_follow_requests,
-        df_restricted_profiles,
-        df_pending_follow_requests
-    ], ignore_index=True)
-
-    # --- media ---
+@section_loader("media", ["df_media"], paths=["media/"])
+def load_media(data_path):
     try:
-        media_files = glob.glob(f'{DATA_PATH}/media/**/*.*', recursive=True)
-        media_root = Path(f'{DATA_PATH}/media')
+        # media listing comes from the export manifest (one walk shared with the Welcome tab)
+        manifest = export_manifest(data_path)
+        media_files = [p for p in manifest.loc[manifest["section"] == "media", "path"] if "." in p.rsplit("/", 1)[-1]]
         
         pat = re.compile(
             r"""
@@ -122,12 +258,8 @@ def load_data():
         rows = []
 
         for f in media_files:
-            f = str(f)
-            m = pat.search(f)
-            try:
-                rel = str(Path(f).resolve().relative_to(media_root.resolve()))
-            except Exception:
-                rel = f.split("/media/")[-1] if "/media/" in f else f
+            m = pat.search(f"/{f}")
+            rel = f.split("/", 1)[1]
 
             if m:
                 ts = m.group("timestamp")
@@ -149,10 +281,12 @@ def load_data():
     except Exception as e:
         print(f"⚠️ Error loading media: {e}")
         df_media = pd.DataFrame(columns=['media_type', 'year', 'timestamp', 'relative_path'])
+    return {"df_media": df_media}
 
-    # --- device information ---
+@section_loader("devices", ["df_devices"], paths=["personal_information/device_information/devices.json"])
+def load_devices(data_path):
     try:
-        devices_data = safe_load_json(f'{DATA_PATH}/personal_information/device_information/devices.json', {"devices_devices": []})
+        devices_data = safe_load_json(f'{data_path}/personal_information/device_information/devices.json', {"devices_devices": []})
         df_devices = pd.json_normalize([
             {
                 "user_agent": d.get("string_map_data", {}).get("User Agent", {}).get("value"),
@@ -163,9 +297,12 @@ def load_data():
     except Exception as e:
         print(f"⚠️ Error loading devices: {e}")
         df_devices = pd.DataFrame(columns=['user_agent', 'last_login_timestamp'])
+    return {"df_devices": df_devices}
 
+@section_loader("camera_info", ["df_camera_info"], paths=["personal_information/device_information/camera_information.json"])
+def load_camera_info(data_path):
     try:
-        camera_data = safe_load_json(f'{DATA_PATH}/personal_information/device_information/camera_information.json', {"devices_camera": []})
+        camera_data = safe_load_json(f'{data_path}/personal_information/device_information/camera_information.json', {"devices_camera": []})
         df_camera_info = pd.json_normalize(
             [
                 {"key": k, **v}
@@ -176,51 +313,48 @@ def load_data():
     except Exception as e:
         print(f"⚠️ Error loading camera info: {e}")
         df_camera_info = pd.DataFrame()
+    return {"df_camera_info": df_camera_info}
 
-    # --- information about you ---
+@section_loader("information_about_you", ["possible_emails", "profile_based_in", "df_locations_of_interest"], paths=["personal_information/information_about_you/"])
+def load_information_about_you(data_path):
     try:
-        emails_data = safe_load_json(f'{DATA_PATH}/personal_information/information_about_you/possible_emails.json', {"inferred_data_inferred_emails": [{}]})
+        emails_data = safe_load_json(f'{data_path}/personal_information/information_about_you/possible_emails.json', {"inferred_data_inferred_emails": [{}]})
         possible_emails = emails_data.get("inferred_data_inferred_emails", [{}])[0].get("string_list_data", [{}])[0].get("value", "N/A")
     except Exception as e:
         print(f"⚠️ Error loading possible emails: {e}")
         possible_emails = "N/A"
 
     try:
-        profile_data = safe_load_json(f'{DATA_PATH}/personal_information/information_about_you/profile_based_in.json', {"inferred_data_primary_location": [{}]})
+        profile_data = safe_load_json(f'{data_path}/personal_information/information_about_you/profile_based_in.json', {"inferred_data_primary_location": [{}]})
         profile_based_in = profile_data.get("inferred_data_primary_location", [{}])[0].get("string_map_data", {}).get("City Name", {}).get("value", "N/A")
     except Exception as e:
         print(f"⚠️ Error loading profile location: {e}")
         profile_based_in = "N/A"
 
     try:
-        locations_data = safe_load_json(f'{DATA_PATH}/personal_information/information_about_you/locations_of_interest.json', {"label_values": [{"vec": []}]})
+        locations_data = safe_load_json(f'{data_path}/personal_information/information_about_you/locations_of_interest.json', {"label_values": [{"vec": []}]})
         locations = [item.get('value', '') for item in locations_data.get('label_values', [{}])[0].get('vec', [])]
         df_locations_of_interest = pd.DataFrame({'value': locations})
     except Exception as e:
         print(f"⚠️ Error loading locations of interest: {e}")
         df_locations_of_interest = pd.DataFrame(columns=['value'])
 
-    # --- link history ---
+    return {"possible_emails": possible_emails, "profile_based_in": profile_based_in, "df_locations_of_interest": df_locations_of_interest}
+
+@section_loader("link_history", ["df_link_history"], paths=["logged_information/link_history/link_history.json"])
+def load_link_history(data_path):
     try:
-        link_history_data = safe_load_json(f'{DATA_PATH}/logged_information/link_history/link_history.json', [])
-        df_link_history = pd.DataFrame([
-            {
-                'timestamp': row.get('timestamp'),
-                'Website_link_you_visited': next((lv['value'] for lv in row.get('label_values', []) if lv.get('label') == 'Website link you visited'), None),
-                'Title of website page you visited': next((lv['value'] for lv in row.get('label_values', []) if lv.get('label') == 'Title of website page you visited'), None),
-                'Website session start time': next((lv['value'] for lv in row.get('label_values', []) if lv.get('label') == 'Website session start time'), None),
-                'Website session end time': next((lv['value'] for lv in row.get('label_values', []) if lv.get('label') == 'Website session end time'), None),
-                'fbid': row.get('fbid')
-            }
-            for row in link_history_data
-        ])
+        link_history_data = safe_load_json(f'{data_path}/logged_information/link_history/link_history.json', [])
+        df_link_history = flatten_records(link_history_data, RECORD_SCHEMAS["link_history"])
     except Exception as e:
         print(f"⚠️ Error loading link history: {e}")
         df_link_history = pd.DataFrame(columns=['timestamp', 'Website_link_you_visited', 'Title of website page you visited', 'Website session start time', 'Website session end time', 'fbid'])
+    return {"df_link_history": df_link_history}
 
-    # --- preferences (recommended topics) ---
+@section_loader("recommended_topics", ["recommended_topics"], paths=["preferences/your_topics/recommended_topics.json"])
+def load_recommended_topics(data_path):
     try:
-        topics_data = safe_load_json(f'{DATA_PATH}/preferences/your_topics/recommended_topics.json', {"topics_your_topics": []})
+        topics_data = safe_load_json(f'{data_path}/preferences/your_topics/recommended_topics.json', {"topics_your_topics": []})
         df_recommended_topic = pd.DataFrame([
             {
                 'href': topic.get('string_map_data', {}).get('Name', {}).get('href', ''),
@@ -233,111 +367,291 @@ def load_data():
     except Exception as e:
         print(f"⚠️ Error loading recommended topics: {e}")
         recommended_topics = []
+    return {"recommended_topics": recommended_topics}
 
-    # --- security & login information ---
+@section_loader("signup_details", ["signup_details"], paths=["security_and_login_information/login_and_profile_creation/signup_details.json"])
+def load_signup_details(data_path):
     try:
-        signup_data = safe_load_json(f'{DATA_PATH}/security_and_login_information/login_and_profile_creation/signup_details.json', {"account_history_registration_info": [{"string_map_data": {}}]})
-        data = signup_data.get('account_history_registration_info', [{}])[0].get('string_map_data', {})
-        signup_details = {
-            'Username': data.get('Username', {}).get('value', 'N/A'),
-            'IP Address': data.get('IP Address', {}).get('value', 'N/A'),
-            'Time': data.get('Time', {}).get('timestamp', 0),
-            'Email': data.get('Email', {}).get('value', 'N/A'),
-            'Phone Number': data.get('Phone Number', {}).get('value', 'N/A'),
-            'Device': data.get('Device', {}).get('value', 'N/A')
-        }
+        signup_data = safe_load_json(f'{data_path}/security_and_login_information/login_and_profile_creation/signup_details.json', {"account_history_registration_info": [{"string_map_data": {}}]})
+        signup_details = flatten_record(signup_data.get('account_history_registration_info', [{}])[0], RECORD_SCHEMAS["signup_details"])
     except Exception as e:
         print(f"⚠️ Error loading signup details: {e}")
         signup_details = {'Username': 'N/A', 'IP Address': 'N/A', 'Time': 0, 'Email': 'N/A', 'Phone Number': 'N/A', 'Device': 'N/A'}
+    return {"signup_details": signup_details}
 
+@section_loader("password_change_activity", ["password_change_activity"], paths=["security_and_login_information/login_and_profile_creation/password_change_activity.json"])
+def load_password_change_activity(data_path):
     try:
-        password_data = safe_load_json(f'{DATA_PATH}/security_and_login_information/login_and_profile_creation/password_change_activity.json', {"account_history_password_change_history": []})
+        password_data = safe_load_json(f'{data_path}/security_and_login_information/login_and_profile_creation/password_change_activity.json', {"account_history_password_change_history": []})
         password_change_activity = [x.get('string_map_data', {}).get('Time', {}) for x in password_data.get('account_history_password_change_history', [])]
     except Exception as e:
         print(f"⚠️ Error loading password change activity: {e}")
         password_change_activity = []
+    return {"password_change_activity": password_change_activity}
 
+@section_loader("last_known_location", ["df_last_known_location"], paths=["security_and_login_information/login_and_profile_creation/last_known_location.json"])
+def load_last_known_location(data_path):
     try:
-        location_data = safe_load_json(f'{DATA_PATH}/security_and_login_information/login_and_profile_creation/last_known_location.json', {"account_history_imprecise_last_known_location": [{"string_map_data": {}}]})
-        location_info = location_data.get("account_history_imprecise_last_known_location", [{}])[0].get("string_map_data", {})
-        df_last_known_location = pd.DataFrame([{
-            "imprecise_latitude": location_info.get("Imprecise Latitude", {}).get("value", 0),
-            "imprecise_longitude": location_info.get("Imprecise Longitude", {}).get("value", 0),
-            "lat": location_info.get("Precise Latitude", {}).get("value", 0),
-            "longitude": location_info.get("Precise Longitude", {}).get("value", 0),
-            "gps_time_uploaded": location_info.get("GPS Time Uploaded", {}).get("timestamp", 0)
-        }])
+        location_data = safe_load_json(f'{data_path}/security_and_login_information/login_and_profile_creation/last_known_location.json', {"account_history_imprecise_last_known_location": [{"string_map_data": {}}]})
+        location = location_data.get("account_history_imprecise_last_known_location", [{}])[0]
+        df_last_known_location = pd.DataFrame([flatten_record(location, RECORD_SCHEMAS["last_known_location"])])
     except Exception as e:
         print(f"⚠️ Error loading last known location: {e}")
         df_last_known_location = pd.DataFrame(columns=['imprecise_latitude', 'imprecise_longitude', 'lat', 'longitude', 'gps_time_uploaded'])
+    return {"df_last_known_location": df_last_known_location}
 
-    # --- login/logout logs ---
+def _load_log_type(log_type, filename, key, data_path):
     try:
-        login_data = safe_load_json(f'{DATA_PATH}/security_and_login_information/login_and_profile_creation/login_activity.json', {"account_history_login_history": []})
-        df_login = pd.DataFrame([{
-            "log_type": "login",
-            "cookie_name": d.get("string_map_data", {}).get("Cookie Name", {}).get("value", ""),
-            "ip_address": d.get("string_map_data", {}).get("IP Address", {}).get("value", ""),
-            "port": d.get("string_map_data", {}).get("Port", {}).get("value", ""),
-            "language": d.get("string_map_data", {}).get("Language Code", {}).get("value", ""),
-            "timestamp": d.get("string_map_data", {}).get("Time", {}).get("timestamp", 0),
-            "user_agent": d.get("string_map_data", {}).get("User Agent", {}).get("value", "")
-        } for d in login_data.get("account_history_login_history", [])])
+        log_data = safe_load_json(f'{data_path}/security_and_login_information/login_and_profile_creation/{filename}', {key: []})
+        df = flatten_records(log_data.get(key, []), RECORD_SCHEMAS["logs"])
+        df.insert(0, "log_type", log_type)
+        return df
     except Exception as e:
-        print(f"⚠️ Error loading login activity: {e}")
-        df_login = pd.DataFrame(columns=["log_type", "cookie_name", "ip_address", "port", "language", "timestamp", "user_agent"])
+        print(f"⚠️ Error loading {log_type} activity: {e}")
+        return pd.DataFrame(columns=["log_type", "cookie_name", "ip_address", "port", "language", "timestamp", "user_agent"])
+
+@section_loader("logs:login", ["df_logs"], paths=["security_and_login_information/login_and_profile_creation/login_activity.json"])
+def load_login_activity(data_path):
+    return {"logs:login": _load_log_type("login", "login_activity.json", "account_history_login_history", data_path)}
+
+@section_loader("logs:logout", ["df_logs"], paths=["security_and_login_information/login_and_profile_creation/logout_activity.json"])
+def load_logout_activity(data_path):
+    return {"logs:logout": _load_log_type("logout", "logout_activity.json", "account_history_logout_history", data_path)}
+
+# --- messages (conversations) ---
+REEL_LINK = re.compile(r"instagram\.com/(reel|reels|clips)/", re.IGNORECASE)
 
+def fix_mojibake(text):
+    """Instagram exports UTF-8 text as latin-1 escaped code points ('Ã©' for 'é')."""
+    if not isinstance(text, str):
+        return text
     try:
-        logout_data = safe_load_json(f'{DATA_PATH}/security_and_login_information/login_and_profile_creation/logout_activity.json', {"account_history_logout_history": []})
-        df_logout = pd.DataFrame([{
-            "log_type": "logout",
-            "cookie_name": d.get("string_map_data", {}).get("Cookie Name", {}).get("value", ""),
-            "ip_address": d.get("string_map_data", {}).get("IP Address", {}).get("value", ""),
-            "port": d.get("string_map_data", {}).get("Port", {}).get("value", ""),
-            "language": d.get("string_map_data", {}).get("Language Code", {}).get("value", ""),
-            "timestamp": d.get("string_map_data", {}).get("Time", {}).get("timestamp", 0),
-            "user_agent": d.get("string_map_data", {}).get("User Agent", {}).get("value", "")
-        } for d in logout_data.get("account_history_logout_history", [])])
-    except Exception as e:
-        print(f"⚠️ Error loading logout activity: {e}")
-        df_logout = pd.DataFrame(columns=["log_type", "cookie_name", "ip_address", "port", "language", "timestamp", "user_agent"])
+        return text.encode('latin-1').decode('utf-8')
+    except (UnicodeEncodeError, UnicodeDecodeError):
+        return text
 
-    df_logs = pd.concat([df_login, df_logout], ignore_index=True)
+def _iter_message_file(filepath):
+    """
+    Yield ('participant', name), ('title', title) and ('message', sender, timestamp_ms, link)
+    records from one message_N.json, one message at a time.
+    Streams with ijson when installed, otherwise falls back to json.load for that single file.
+    """
+    if ijson is None:
+        data = safe_load_json(filepath, {})
+        for p in data.get('participants', []):
+            yield ('participant', p.get('name'))
+        if 'title' in data:
+            yield ('title', data.get('title'))
+        for m in data.get('messages', []):
+            yield ('message', m.get('sender_name'), m.get('timestamp_ms'), (m.get('share') or {}).get('link'))
+        return
 
-    # --- ads information ---
     try:
-        advertisers_enriched = pd.read_csv('./data/advertisers_enriched.csv')
+        with open_binary(filepath) as f:
+            cur = None
+            for prefix, event, value in ijson.parse(f):
+                if prefix == 'participants.item.name':
+                    yield ('participant', value)
+                elif prefix == 'title' and event == 'string':
+                    yield ('title', value)
+                elif prefix == 'messages.item':
+                    if event == 'start_map':
+                        cur = {'sender_name': None, 'timestamp_ms': None, 'link': None}
+                    elif event == 'end_map' and cur is not None:
+                        yield ('message', cur['sender_name'], cur['timestamp_ms'], cur['link'])
+                        cur = None
+                elif cur is not None:
+                    if prefix == 'messages.item.sender_name':
+                        cur['sender_name'] = value
+                    elif prefix == 'messages.item.timestamp_ms':
+                        cur['timestamp_ms'] = int(value)
+                    elif prefix == 'messages.item.share.link':
+                        cur['link'] = value
+    except (OSError, ijson.JSONError) as e:
+        print(f"⚠️ Warning: Could not load {filepath}: {e}")
+
+def _message_file_number(path):
+    m = re.search(r"message_(\d+)\.json$", str(path))
+    return int(m.group(1)) if m else 0
+
+def load_conversation(conv_dir, message_type):
+    """Fold every message_N.json of one conversation folder into a single row."""
+    files = sorted((f'{conv_dir}/{n}' for n in list_dir(conv_dir) if re.fullmatch(r'message_\d+\.json', n)), key=_message_file_number)
+    if not files:
+        return None
+
+    participants = []
+    participation = {}
+    timestamps = []
+    title = None
+    n_messages = n_links = n_reels = 0
+
+    for filepath in files:
+        for record in _iter_message_file(filepath):
+            kind = record[0]
+            if kind == 'participant':
+                name = fix_mojibake(record[1])
+                if name not in participants:
+                    participants.append(name)
+            elif kind == 'title':
+                title = title or fix_mojibake(record[1])
+            else:
+                _, sender, ts, link = record
+                sender = fix_mojibake(sender)
+                n_messages += 1
+                participation[sender] = participation.get(sender, 0) + 1
+                if ts is not None:
+                    timestamps.append(ts)
+                if link:
+                    n_links += 1
+                    if REEL_LINK.search(link):
+                        n_reels += 1
+
+    timestamps.sort()
+    return {
+        'conv_name': title or str(conv_dir).rstrip('/').rsplit('/', 1)[-1],
+        'participants': participants,
+        'count_total_interaction': n_messages,
+        'count_total_link_shared': n_links,
+        'count_total_reel_sent': n_reels,
+        'participants_participation': participation,
+        'timestamps': timestamps,
+        'message_type': message_type,
+    }
+
+CONVERSATION_COLUMNS = ['conv_name', 'participants', 'count_total_interaction', 'count_total_link_shared', 'count_total_reel_sent', 'participants_participation', 'timestamps', 'message_type', 'conv_id']
+
+@section_loader("conversations", ["df_all_conversations"], paths=["your_instagram_activity/messages/"])
+def load_conversations(data_path, conv_ids=None):
+    """
+    One row per conversation folder, identified by conv_id ('<message_type>/<folder>').
+    With `conv_ids`, only those conversations are parsed (incremental ingest).
+    """
+    columns = CONVERSATION_COLUMNS
+    try:
+        messages_root = f'{data_path}/your_instagram_activity/messages'
+        rows = []
+        # messages/<inbox|message_requests|...>/<conversation>/message_N.json
+        if conv_ids is None:
+            conv_ids = [f'{message_type}/{conv}'
+                        for message_type in list_dir(messages_root) if is_dir(f'{messages_root}/{message_type}')
+                        for conv in list_dir(f'{messages_root}/{message_type}') if is_dir(f'{messages_root}/{message_type}/{conv}')]
+        for conv_id in sorted(conv_ids):
+            row = load_conversation(f'{messages_root}/{conv_id}', conv_id.split('/', 1)[0])
+            if row is not None:
+                row['conv_id'] = conv_id
+                rows.append(row)
+        df_all_conversations = pd.DataFrame(rows, columns=columns)
+    except Exception as e:
+        print(f"⚠️ Error loading conversations: {e}")
+        df_all_conversations = pd.DataFrame(columns=columns)
+    return {"df_all_conversations": df_all_conversations}
+
+@section_loader("advertisers_enriched", ["advertisers_enriched"])
+def load_advertisers_enriched(data_path):
+    try:
+        advertisers_enriched = pd.read_csv(ENRICHED_PATH)
     except Exception as e:
         print(f"⚠️ Error loading enriched advertisers: {e}")
         advertisers_enriched = pd.DataFrame()
+    return {"advertisers_enriched": advertisers_enriched}
 
+def placeholder_sections():
     # Load all ads data with error handling...
     # (continuing in next message due to length)
     
     # For now, return placeholder for remaining data
-    df_all_ads = pd.DataFrame(columns=['author', 'timestamp', 'ads_type', 'date'])
-    information_youve_submitted_to_advertisers = []
-    substriction_status = "N/A"
-    advertisers_using_your_activity_or_information = pd.DataFrame()
-    other_categories_used_to_reach_you = []
-    
-    df_all_comments = pd.DataFrame(columns=['comment', 'media_owner', 'timestamp', 'comments_type', 'date'])
-    df_liked_comments = pd.DataFrame(columns=['href', 'timestamp', 'comment_owner'])
-    df_liked_posts = pd.DataFrame(columns=['href', 'timestamp', 'media_owner'])
-    df_all_conversations = pd.DataFrame(columns=['conv_name', 'participants', 'count_total_interaction', 'count_total_link_shared', 'count_total_reel_sent', 'participants_participation', 'timestamps', 'message_type'])
-    df_time_spent_on_ig = pd.DataFrame(columns=['session_timestamp', 'update_time', 'start_time', 'end_time', 'duration_sec'])
-    df_your_information_download_requests = {'download_count': 0, 'timestamps': []}
-    df_saved_collections = pd.DataFrame(columns=['title', 'value', 'href', 'creation_time', 'update_time', 'added_time', 'saved_type'])
-    df_saved_locations = pd.DataFrame(columns=['value', 'timestamp', 'lat', 'lon', 'saved_type'])
-    df_saved_posts = pd.DataFrame(columns=['media_owner', 'href', 'timestamp', 'saved_type'])
-    df_saved_music = pd.DataFrame()
-    df_story_likes = pd.DataFrame()
-
-    return (df_contacts, df_media, df_follows, df_devices, df_camera_info, df_locations_of_interest, possible_emails, profile_based_in, df_link_history, recommended_topics, signup_details, password_change_activity, df_last_known_location, df_logs, df_all_ads, substriction_status, information_youve_submitted_to_advertisers, advertisers_using_your_activity_or_information, other_categories_used_to_reach_you, advertisers_enriched,
-            df_all_comments, df_liked_comments, df_liked_posts, df_all_conversations,
-            df_time_spent_on_ig, df_your_information_download_requests, 
-            df_saved_collections, df_saved_locations, df_saved_posts, df_saved_music,
-            df_story_likes)
+    return {
+        "df_all_ads": pd.DataFrame(columns=['author', 'timestamp', 'ads_type', 'date']),
+        "information_youve_submitted_to_advertisers": [],
+        "substriction_status": "N/A",
+        "advertisers_using_your_activity_or_information": pd.DataFrame(),
+        "other_categories_used_to_reach_you": [],
+        "df_all_comments": pd.DataFrame(columns=['comment', 'media_owner', 'timestamp', 'comments_type', 'date']),
+        "df_liked_comments": pd.DataFrame(columns=['href', 'timestamp', 'comment_owner']),
+        "df_liked_posts": pd.DataFrame(columns=['href', 'timestamp', 'media_owner']),
+        "df_time_spent_on_ig": pd.DataFrame(columns=['session_timestamp', 'update_time', 'start_time', 'end_time', 'duration_sec']),
+        "df_your_information_download_requests": {'download_count': 0, 'timestamps': []},
+        "df_saved_collections": pd.DataFrame(columns=['title', 'value', 'href', 'creation_time', 'update_time', 'added_time', 'saved_type']),
+        "df_saved_locations": pd.DataFrame(columns=['value', 'timestamp', 'lat', 'lon', 'saved_type']),
+        "df_saved_posts": pd.DataFrame(columns=['media_owner', 'href', 'timestamp', 'saved_type']),
+        "df_saved_music": pd.DataFrame(),
+        "df_story_likes": pd.DataFrame(),
+    }
+
+def _run_section(name, data_path):
+    """Run one registered section on the export at data_path (module-level so it can be sent to a process pool)."""
+    return _SECTION_LOADERS[name](data_path)
+
+def run_sections(names=None, max_workers=LOAD_WORKERS, use_processes=False, data_path=None):
+    """
+    Run registered section loaders concurrently.
+
+    Args:
+        names: Sections to run (all registered sections by default)
+        max_workers: Pool size; 1 runs the sections sequentially
+        use_processes: Use a process pool instead of threads (JSON parsing holds the GIL)
+        data_path: Root of the Instagram export (DATA_PATH by default)
+
+    Returns:
+        Dict merging every section's {field: value}
+    """
+    names = list(_SECTION_LOADERS) if names is None else list(names)
+    data_path = data_path or DATA_PATH
+    results = {}
+    if max_workers is None or max_workers <= 1 or len(names) <= 1:
+        for name in names:
+            try:
+                results.update(_run_section(name, data_path))
+            except Exception as e:
+                print(f"⚠️ Error loading section {name}: {e}")
+        return results
+
+    pool_cls = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    with pool_cls(max_workers=max_workers) as pool:
+        futures = {pool.submit(_run_section, name, data_path): name for name in names}
+        for future in as_completed(futures):
+            try:
+                results.update(future.result())
+            except Exception as e:
+                print(f"⚠️ Error loading section {futures[future]}: {e}")
+    return results
+
+def load_sections(max_workers=LOAD_WORKERS, use_processes=False, data_path=None):
+    """Raw per-section results (follows and logs not yet concatenated)."""
+    results = placeholder_sections()
+    results.update(run_sections(max_workers=max_workers, use_processes=use_processes, data_path=data_path))
+    return results
+
+def merge_sections(results):
+    """Per-section results -> {field: value} (follows and logs concatenated)."""
+    results = dict(results)
+
+    # --- followers_and_following ---
+    follows_cols = ['follows_type', 'username', 'timestamp', 'href']
+    df_follows = pd.concat(
+        [results.pop(f"follows:{t}", pd.DataFrame(columns=follows_cols)) for _, _, t, _ in FOLLOWS_FILES],
+        ignore_index=True
+    )
+    results["df_follows"] = df_follows
+
+    # --- login/logout logs ---
+    logs_cols = ["log_type", "cookie_name", "ip_address", "port", "language", "timestamp", "user_agent"]
+    results["df_logs"] = pd.concat([
+        results.pop("logs:login", pd.DataFrame(columns=logs_cols)),
+        results.pop("logs:logout", pd.DataFrame(columns=logs_cols)),
+    ], ignore_index=True)
+
+    return results
+
+def assemble_sections(results):
+    """Turn per-section results into the load_data() tuple."""
+    results = merge_sections(results)
+    return tuple(results.get(field, pd.DataFrame()) for field in LOAD_DATA_FIELDS)
+
+def load_data(max_workers=LOAD_WORKERS, use_processes=False, data_path=None):
+    """Load all Instagram data with error tolerance (from DATA_PATH unless data_path is given)."""
+    return assemble_sections(load_sections(max_workers=max_workers, use_processes=use_processes, data_path=data_path))
 
 def fetch_and_cache():
     return
@@ -0,0 +1,104 @@
+# link history parsing: URLs and session times are parsed once per distinct value, with compiled (Arrow/RE2) regexes
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# same split as urllib.parse.urlparse: netloc only after '//', path up to '?' or '#'
+_URL_PATTERN = r"^(?:[A-Za-z][A-Za-z0-9+.-]*:)?(?://(?P<netloc>[^/?#]*))?(?P<path>[^?#]*)"
+# 'Jan 05, 2024 10:00:00am' (format "%b %d, %Y %I:%M:%S%p")
+_SESSION_PATTERN = (r"^\s*(?P<month>[A-Za-z]{3}) (?P<day>\d{1,2}), (?P<year>\d{4}) "
+                    r"(?P<hour>\d{1,2}):(?P<minute>\d{2}):(?P<second>\d{2}) ?(?P<ampm>[AaPp][Mm])\s*$")
+_MONTHS = pa.array(["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"])
+
+# public suffixes made of two labels (the registrable domain of news.bbc.co.uk is bbc.co.uk)
+SECOND_LEVEL_LABELS = {"co", "com", "net", "org", "gov", "edu", "ac", "gouv", "asso", "nom", "ne", "or", "go", "mil"}
+MULTI_PART_SUFFIXES = {"github.io", "blogspot.com", "herokuapp.com", "appspot.com", "netlify.app", "vercel.app",
+                       "pages.dev", "workers.dev", "cloudfront.net", "azurewebsites.net", "s3.amazonaws.com"}
+
+LINK_COLUMNS = ["Website_name", "domain", "path_depth"]
+
+# ------------- Helpers -------------------------------------------------------
+
+def _distinct(values: pd.Series) -> tuple:
+    """codes (-1 for missing) and the distinct non-null values as an Arrow string array."""
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    return codes, pa.array(np.asarray(uniques, dtype=object), type=pa.string(), from_pandas=True)
+
+def _expand(table: np.ndarray, codes: np.ndarray, missing) -> np.ndarray:
+    """One value per distinct input -> one value per row (missing where the input was missing)."""
+    return np.append(table, np.array([missing], dtype=table.dtype))[np.where(codes < 0, len(table), codes)]
+
+def registrable_domain(host: str) -> str:
+    """Host -> eTLD+1 ('m.news.bbc.co.uk' -> 'bbc.co.uk', 'www.instagram.com' -> 'instagram.com')."""
+    host = host.rsplit("@", 1)[-1].lower()
+    if host.startswith("["):  # IPv6
+        return host.split("]")[0] + "]"
+    host = host.split(":")[0].strip(".")
+    labels = host.split(".")
+    if len(labels) <= 2 or labels[-1].isdigit():  # already registrable, or IPv4
+        return host
+    suffix_len = 2 if (labels[-2] in SECOND_LEVEL_LABELS and len(labels[-1]) == 2) or ".".join(labels[-2:]) in MULTI_PART_SUFFIXES else 1
+    if ".".join(labels[-3:]) in MULTI_PART_SUFFIXES:
+        suffix_len = 3
+    return ".".join(labels[-(suffix_len + 1):])
+
+# ------------- Public functions ----------------------------------------------
+
+def split_urls(urls: pd.Series) -> pd.DataFrame:
+    """
+    Website name (urlparse netloc), registrable domain and path depth of every URL.
+
+    Args:
+        urls: Series of URLs (any index, NaN allowed)
+
+    Returns:
+        DataFrame with LINK_COLUMNS aligned with the input index (None / <NA> for missing URLs)
+    """
+    codes, uniques = _distinct(urls)
+    parts = pc.extract_regex(uniques, _URL_PATTERN)
+    netloc = parts.field("netloc")
+    depth = pc.count_substring_regex(parts.field("path"), "[^/]+")
+
+    # hosts repeat far more than URLs: the domain is computed once per host
+    host_codes, hosts = pd.factorize(netloc.to_numpy(zero_copy_only=False))
+    domains = np.array([registrable_domain(h) if h else "" for h in hosts], dtype=object)
+
+    out = pd.DataFrame({
+        "Website_name": _expand(netloc.to_numpy(zero_copy_only=False).astype(object), codes, None),
+        "domain": _expand(domains[host_codes] if len(domains) else np.array([], dtype=object), codes, None),
+        "path_depth": pd.array(_expand(depth.to_numpy(zero_copy_only=False).astype("int64"), codes, -1), dtype="Int16"),
+    }, index=urls.index)
+    out.loc[codes < 0, "path_depth"] = pd.NA
+    return out
+
+def parse_session_times(values: pd.Series) -> pd.Series:
+    """
+    Parse link history session times ('Jan 05, 2024 10:00:00am') without strptime.
+
+    Args:
+        values: Series of session time strings (NaN allowed)
+
+    Returns:
+        datetime64[ns] Series aligned with the input (NaT when missing or not in that format)
+    """
+    codes, uniques = _distinct(values)
+    parts = pc.extract_regex(uniques, _SESSION_PATTERN)
+    matched = parts.is_valid()
+    valid = matched.to_numpy(zero_copy_only=False)
+
+    def number(name: str) -> np.ndarray:
+        return pc.cast(pc.if_else(matched, parts.field(name), "0"), pa.int64()).to_numpy(zero_copy_only=False)
+
+    year, day, hour, minute, second = (number(n) for n in ["year", "day", "hour", "minute", "second"])
+    month = pc.fill_null(pc.index_in(pc.utf8_lower(parts.field("month")), value_set=_MONTHS), -1).to_numpy(zero_copy_only=False).astype("int64")
+    pm = pc.fill_null(pc.equal(pc.utf8_lower(parts.field("ampm")), "pm"), False).to_numpy(zero_copy_only=False)
+
+    month_start = ((year - 1970) * 12 + month).astype("datetime64[M]").astype("datetime64[D]")
+    month_days = (((year - 1970) * 12 + month + 1).astype("datetime64[M]").astype("datetime64[D]") - month_start).astype("int64")
+    ok = valid & (month >= 0) & (day >= 1) & (day <= month_days) & (hour >= 1) & (hour <= 12) & (minute < 60) & (second < 60)
+
+    seconds = (day - 1) * 86_400 + (hour % 12 + 12 * pm) * 3_600 + minute * 60 + second
+    parsed = month_start.astype("datetime64[ns]") + seconds.astype("timedelta64[s]")
+    parsed[~ok] = np.datetime64("NaT")
+    return pd.Series(_expand(parsed, codes, np.datetime64("NaT", "ns")), index=values.index, name=values.name)
@@ -0,0 +1,140 @@
+# one-pass file index of the export (path, size, mtime, ext, section), reused across reruns
+import os
+import threading
+import pandas as pd
+from typing import Dict, Iterable, List, Optional, Tuple
+from utils.export_fs import is_zip_path, zip_entries
+
+MANIFEST_COLUMNS = ["path", "size", "mtime_ns", "ext", "section"]
+IMAGE_EXTS = {"jpg", "jpeg", "png"}
+
+# data_path -> {dir relpath: (dir mtime_ns, [file rows], [subdir relpaths])}
+_manifest_cache: Dict[str, Dict[str, Tuple[int, List[tuple], List[str]]]] = {}
+_manifest_lock = threading.Lock()
+
+# ------------- Scanning ------------------------------------------------------
+
+def _scan_dir(data_path: str, rel: str) -> Tuple[int, List[tuple], List[str]]:
+    """List one directory: its mtime, its files as manifest rows, and its subfolders."""
+    full = os.path.join(data_path, rel) if rel else data_path
+    mtime = os.stat(full).st_mtime_ns
+    files, subdirs = [], []
+    with os.scandir(full) as it:
+        for entry in it:
+            # skip hidden files and our own cache folders if they live inside the export
+            if entry.name.startswith("."):
+                continue
+            entry_rel = f"{rel}/{entry.name}" if rel else entry.name
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry_rel)
+                elif entry.is_file():
+                    st = entry.stat()
+                    ext = os.path.splitext(entry.name)[1].lower().lstrip(".")
+                    section = entry_rel.split("/", 1)[0] if rel else ""
+                    files.append((entry_rel, st.st_size, st.st_mtime_ns, ext, section))
+            except OSError:
+                continue
+    return mtime, files, subdirs
+
+def _refresh(data_path: str, dirs: Dict[str, Tuple[int, List[tuple], List[str]]]) -> Dict[str, Tuple[int, List[tuple], List[str]]]:
+    """
+    Re-list only the folders whose mtime changed (a file was added, removed or renamed);
+    unchanged folders keep their rows. A file rewritten in place does not touch its folder's
+    mtime: invalidate_manifest() or refresh=True picks it up.
+    """
+    fresh = {}
+    stack = [""]
+    while stack:
+        rel = stack.pop()
+        known = dirs.get(rel)
+        try:
+            if known is not None and os.stat(os.path.join(data_path, rel) if rel else data_path).st_mtime_ns == known[0]:
+                entry = known
+            else:
+                entry = _scan_dir(data_path, rel)
+        except OSError:
+            continue
+        fresh[rel] = entry
+        stack.extend(entry[2])
+    return fresh
+
+def _zip_manifest(data_path: str) -> pd.DataFrame:
+    """Same rows, read from the archive's central directory (nothing is extracted)."""
+    rows = []
+    for rel, size, mtime in zip_entries(data_path):
+        if any(part.startswith(".") for part in rel.split("/")):
+            continue
+        name = rel.rsplit("/", 1)[-1]
+        ext = os.path.splitext(name)[1].lower().lstrip(".")
+        section = rel.split("/", 1)[0] if "/" in rel else ""
+        rows.append((rel, size, mtime, ext, section))
+    rows.sort()
+    return pd.DataFrame(rows, columns=MANIFEST_COLUMNS)
+
+# ------------- Public functions ----------------------------------------------
+
+def export_manifest(data_path: str, refresh: bool = False) -> pd.DataFrame:
+    """
+    Index every file of the export in a single walk.
+
+    Args:
+        data_path: Root of the Instagram export
+        refresh: Ignore the in-memory index and re-list every folder
+
+    Returns:
+        DataFrame with columns path (relative, '/'-separated), size, mtime_ns, ext
+        (lowercase, no dot) and section (top-level folder, '' for root files)
+    """
+    if data_path and is_zip_path(data_path):
+        return _zip_manifest(data_path)
+    if not data_path or not os.path.isdir(data_path):
+        return pd.DataFrame(columns=MANIFEST_COLUMNS)
+    key = os.path.abspath(data_path)
+    with _manifest_lock:
+        dirs = {} if refresh else _manifest_cache.get(key, {})
+        dirs = _refresh(data_path, dirs)
+        _manifest_cache[key] = dirs
+    rows = [row for _, files, _ in dirs.values() for row in files]
+    rows.sort()
+    return pd.DataFrame(rows, columns=MANIFEST_COLUMNS)
+
+def manifest_key(data_path: str, extra_files: Iterable[str] = ()) -> tuple:
+    """
+    Cheap change token: the mtime of every indexed folder (or of the ZIP) plus the extra files' (size, mtime).
+    Files added, removed or renamed change it; a file rewritten in place does not (see invalidate_manifest).
+    """
+    def _stat(path: str) -> tuple:
+        try:
+            st = os.stat(path)
+            return path, st.st_size, st.st_mtime_ns
+        except OSError:
+            return path, None, None
+
+    extra = tuple(_stat(f) for f in extra_files)
+    if not data_path or is_zip_path(data_path) or not os.path.isdir(data_path):
+        return (_stat(data_path) if data_path else None,) + extra
+    key = os.path.abspath(data_path)
+    with _manifest_lock:
+        dirs = _manifest_cache.get(key)
+    if dirs is None:
+        export_manifest(data_path)
+        with _manifest_lock:
+            dirs = _manifest_cache.get(key, {})
+    return tuple(_stat(os.path.join(data_path, rel) if rel else data_path) for rel in sorted(dirs)) + extra
+
+def invalidate_manifest(data_path: Optional[str] = None) -> None:
+    """Forget the cached index: the next export_manifest() lists every folder again."""
+    with _manifest_lock:
+        if data_path is None:
+            _manifest_cache.clear()
+        else:
+            _manifest_cache.pop(os.path.abspath(data_path), None)
+
+def manifest_summary(manifest: pd.DataFrame) -> dict:
+    """Welcome tab metrics: total size in bytes, file count and image count."""
+    return {
+        "total_size": int(manifest["size"].sum()),
+        "file_count": len(manifest),
+        "image_count": int(manifest["ext"].isin(IMAGE_EXTS).sum()),
+    }
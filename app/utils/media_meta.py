@@ -0,0 +1,319 @@
+# capture time, GPS, camera and resolution of the media files (EXIF for images, MP4/MOV boxes for videos)
+# read on a process pool in a background thread, cached on disk per (path, size, mtime) so a scan can resume
+import os
+import io
+import re
+import json
+import struct
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+import pandas as pd
+from PIL import Image
+from utils.cache import FileCache, file_keys, run_chunks
+from utils.export_fs import is_zip_path, open_binary, stat
+from utils.timeindex import LOCAL_TZ
+
+# ------------- Config --------------------------------------------------------
+MEDIA_META_CACHE_PATH = os.getenv("MEDIA_META_CACHE_PATH", "./data/.cache/media_meta.sqlite")
+MEDIA_META_MAX_BYTES = int(os.getenv("MEDIA_META_MAX_BYTES", 2 << 20))  # per file; headers only, never the pixels/frames
+MEDIA_META_WORKERS = int(os.getenv("MEDIA_META_WORKERS", min(8, os.cpu_count() or 1)))
+MEDIA_META_CHUNK = 64  # files per pool task, and per cache commit
+IMAGE_EXTS = {"jpg", "jpeg", "png", "webp", "tif", "tiff"}
+VIDEO_EXTS = {"mp4", "mov", "m4v"}
+
+META_FIELDS = ["taken_at", "lat", "lon", "camera_make", "camera_model", "width", "height", "duration_s", "error"]
+META_COLUMNS = ["path", "size", "mtime_ns", "kind"] + META_FIELDS
+_META_VERSION = 2  # bump when the extracted fields change: older cache rows are read again
+
+# EXIF tags
+_EXIF_IFD, _GPS_IFD = 0x8769, 0x8825
+_MAKE, _MODEL, _DATETIME = 0x010F, 0x0110, 0x0132
+_DATETIME_ORIGINAL, _DATETIME_DIGITIZED = 0x9003, 0x9004
+_GPS_LAT_REF, _GPS_LAT, _GPS_LON_REF, _GPS_LON = 1, 2, 3, 4
+
+_MP4_EPOCH = datetime(1904, 1, 1, tzinfo=timezone.utc)
+_ISO6709 = re.compile(r"([+-]\d+(?:\.\d+)?)([+-]\d+(?:\.\d+)?)")
+
+class ByteCapReached(Exception):
+    pass
+
+# ------------- Reading -------------------------------------------------------
+
+class _CappedReader(io.RawIOBase):
+    """Binary file wrapper that refuses to read more than `cap` bytes (forward seeks count inside a ZIP)."""
+
+    def __init__(self, f, cap: int, seek_costs: bool):
+        self.f, self.cap, self.seek_costs, self.used = f, cap, seek_costs, 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.f.tell()
+
+    def _spend(self, n: int) -> None:
+        self.used += n
+        if self.used > self.cap:
+            raise ByteCapReached(f"more than {self.cap} bytes needed")
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = self.cap - self.used + 1  # reading to the end always hits the cap
+        self._spend(size)
+        data = self.f.read(size)
+        self.used -= size - len(data)
+        return data
+
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if self.seek_costs:
+            # a compressed ZIP member is decompressed up to the target
+            target = {io.SEEK_SET: offset, io.SEEK_CUR: self.f.tell() + offset}.get(whence)
+            if target is None or target > self.f.tell():
+                self._spend((target - self.f.tell()) if target is not None else self.cap)
+        return self.f.seek(offset, whence)
+
+def _degrees(dms, ref) -> Optional[float]:
+    """EXIF (degrees, minutes, seconds) rationals + 'N'/'S'/'E'/'W' -> signed decimal degrees."""
+    try:
+        d, m, s = (float(x) for x in dms)
+    except (TypeError, ValueError, ZeroDivisionError):
+        return None
+    value = d + m / 60 + s / 3600
+    ref = ref.decode(errors="ignore") if isinstance(ref, bytes) else str(ref or "")
+    return -value if ref.strip().upper() in ("S", "W") else value
+
+def _exif_time(value) -> Optional[datetime]:
+    """'2023:07:14 18:02:11' (camera local time) -> naive datetime."""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(str(value).strip("\x00 ")[:19], "%Y:%m:%d %H:%M:%S")
+    except ValueError:
+        return None
+
+def _text(value) -> Optional[str]:
+    value = str(value).strip("\x00 ") if value is not None else ""
+    return value or None
+
+def _image_meta(f) -> dict:
+    # Image.open only parses the headers: EXIF, size, no pixel decoding
+    with Image.open(f) as img:
+        width, height = img.size
+        if img.format == "PNG":
+            # PngImageFile.getexif() decodes every pixel to look for an eXIf chunk after the image data:
+            # only a chunk found among the headers is used
+            exif = Image.Exif()
+            if img.info.get("exif"):
+                exif.load(img.info["exif"])
+        else:
+            exif = img.getexif()
+    sub, gps = exif.get_ifd(_EXIF_IFD), exif.get_ifd(_GPS_IFD)
+    lat = _degrees(gps.get(_GPS_LAT), gps.get(_GPS_LAT_REF)) if gps.get(_GPS_LAT) else None
+    lon = _degrees(gps.get(_GPS_LON), gps.get(_GPS_LON_REF)) if gps.get(_GPS_LON) else None
+    return {
+        "taken_at": _exif_time(sub.get(_DATETIME_ORIGINAL) or sub.get(_DATETIME_DIGITIZED) or exif.get(_DATETIME)),
+        "lat": lat,
+        "lon": lon,
+        "camera_make": _text(exif.get(_MAKE)),
+        "camera_model": _text(exif.get(_MODEL)),
+        "width": width,
+        "height": height,
+    }
+
+def _boxes(f, end: int):
+    """(type, payload start, box end) of the MP4 boxes between the current position and `end`."""
+    while f.tell() + 8 <= end:
+        start = f.tell()
+        size, kind = struct.unpack(">I4s", f.read(8))
+        header = 8
+        if size == 1:
+            size, header = struct.unpack(">Q", f.read(8))[0], 16
+        elif size == 0:
+            size = end - start
+        if size < header:
+            return
+        yield kind, start + header, start + size
+        f.seek(start + size)
+
+def _video_meta(f, file_size: int) -> dict:
+    meta = {}
+    for kind, payload, end in _boxes(f, file_size):
+        if kind != b"moov":
+            continue  # mdat and friends are skipped with a seek
+        for child, child_payload, child_end in _boxes(f, end):
+            if child == b"mvhd":
+                version = f.read(4)[0]
+                if version == 1:
+                    created, _, timescale, duration = struct.unpack(">QQIQ", f.read(28))
+                else:
+                    created, _, timescale, duration = struct.unpack(">IIII", f.read(16))
+                if created:
+                    utc = _MP4_EPOCH + timedelta(seconds=created)
+                    meta["taken_at"] = pd.Timestamp(utc).tz_convert(LOCAL_TZ).tz_localize(None).to_pydatetime()
+                meta["duration_s"] = duration / timescale if timescale else None
+            elif child == b"trak" and "width" not in meta:
+                for sub, sub_payload, _ in _boxes(f, child_end):
+                    if sub != b"tkhd":
+                        continue
+                    version = f.read(4)[0]
+                    f.seek(sub_payload + (4 + 32 if version == 1 else 4 + 20) + 52)  # to width/height (16.16)
+                    width, height = (v >> 16 for v in struct.unpack(">II", f.read(8)))
+                    if width and height:  # audio tracks have none
+                        meta["width"], meta["height"] = width, height
+            elif child == b"udta":
+                for sub, sub_payload, sub_end in _boxes(f, child_end):
+                    if sub == b"\xa9xyz":  # '+48.8566+002.3522/' (ISO 6709)
+                        m = _ISO6709.search(f.read(sub_end - sub_payload)[4:].decode(errors="ignore"))
+                        if m:
+                            meta["lat"], meta["lon"] = float(m.group(1)), float(m.group(2))
+        break
+    return meta
+
+def extract_metadata(path: str, max_bytes: int = MEDIA_META_MAX_BYTES) -> dict:
+    """
+    Metadata of one media file, reading at most max_bytes of it.
+
+    Args:
+        path: Image or video file, on disk or inside the export ZIP
+        max_bytes: Cap on the bytes read (or decompressed, in a ZIP)
+
+    Returns:
+        dict with META_FIELDS (None when absent; 'error' says why nothing could be read)
+    """
+    meta = dict.fromkeys(META_FIELDS)
+    ext = Path(path).suffix.lower().lstrip(".")
+    try:
+        size, _ = stat(path)
+        with open_binary(path) as raw:
+            f = _CappedReader(raw, max_bytes, seek_costs=is_zip_path(path))
+            if ext in VIDEO_EXTS:
+                meta.update(_video_meta(f, size))
+            elif ext in IMAGE_EXTS:
+                meta.update(_image_meta(f))
+            else:
+                meta["error"] = "unsupported"
+    except ByteCapReached as e:
+        meta["error"] = f"byte cap: {e}"
+    except Exception as e:
+        meta["error"] = f"{type(e).__name__}: {e}"
+    if isinstance(meta["taken_at"], datetime):
+        meta["taken_at"] = meta["taken_at"].isoformat()
+    return meta
+
+def _extract_chunk(paths: List[str], max_bytes: int) -> List[dict]:
+    return [extract_metadata(path, max_bytes) for path in paths]
+
+# ------------- Persistent cache (SQLite) -------------------------------------
+_meta_cache = FileCache(lambda: MEDIA_META_CACHE_PATH, "meta", ["meta TEXT"], _META_VERSION,
+                        encode=lambda meta: (json.dumps(meta),), decode=lambda row: json.loads(row[0]),
+                        label="media metadata cache")
+
+# ------------- Public functions ----------------------------------------------
+
+def _frame(keys: Dict[str, tuple], found: Dict[tuple, dict]) -> pd.DataFrame:
+    rows = []
+    for path, key in keys.items():
+        meta = found.get(key)
+        if meta is not None:
+            ext = Path(path).suffix.lower().lstrip(".")
+            rows.append((*key, "video" if ext in VIDEO_EXTS else "image", *(meta.get(f) for f in META_FIELDS)))
+    df = pd.DataFrame(rows, columns=META_COLUMNS)
+    df["taken_at"] = pd.to_datetime(df["taken_at"], errors="coerce")
+    for col in ["lat", "lon", "duration_s"]:
+        df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+    for col in ["width", "height"]:
+        df[col] = pd.to_numeric(df[col], errors="coerce").astype("Int32")
+    return df
+
+def cached_metadata(paths: Iterable[str]) -> pd.DataFrame:
+    """Metadata already in the cache for these files (unchanged since they were read), one row each."""
+    keys = file_keys(paths)
+    return _frame(keys, _meta_cache.get_many(list(keys.values())))
+
+def scan_media(paths: Iterable[str], max_workers: int = MEDIA_META_WORKERS, max_bytes: int = MEDIA_META_MAX_BYTES,
+               progress: Optional[Callable[[int, int], None]] = None) -> pd.DataFrame:
+    """
+    Read the metadata of the files not in cache yet, saving each chunk as soon as it is done.
+
+    Args:
+        paths: Media files (DATA_PATH/media/<relative_path>)
+        max_workers: Worker processes; 1 reads in the current process
+        max_bytes: Cap on the bytes read per file
+        progress: Called with (files done, total files) after each chunk
+
+    Returns:
+        DataFrame with META_COLUMNS, one row per readable file
+    """
+    keys = file_keys(paths)
+    found = _meta_cache.get_many(list(keys.values()))
+    todo = [path for path, key in keys.items() if key not in found]
+    done, total = len(keys) - len(todo), len(keys)
+    if progress:
+        progress(done, total)
+
+    for chunk, metas in run_chunks(_extract_chunk, todo, MEDIA_META_CHUNK, max_workers, max_bytes):
+        fresh = {keys[path]: meta for path, meta in zip(chunk, metas)}
+        _meta_cache.put_many(fresh)  # an interrupted scan restarts from here
+        found.update(fresh)
+        done += len(chunk)
+        if progress:
+            progress(done, total)
+    return _frame(keys, found)
+
+class MediaScan:
+    """scan_media() in a background thread; the dashboard reads its progress and the cache while it runs."""
+
+    def __init__(self, root: str, relative_paths: Iterable[str], max_workers: int = MEDIA_META_WORKERS):
+        """
+        Args:
+            root: Folder the paths are relative to (DATA_PATH/media)
+            relative_paths: df_media_prep['relative_path'] (unsupported extensions are left out)
+            max_workers: Worker processes
+        """
+        self.relative = {f"{root}/{rel}": rel for rel in relative_paths
+                         if isinstance(rel, str) and Path(rel).suffix.lower().lstrip(".") in IMAGE_EXTS | VIDEO_EXTS}
+        self.max_workers = max_workers
+        self.done, self.total = 0, len(self.relative)
+        self.error: Optional[str] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def _progress(self, done: int, total: int) -> None:
+        self.done, self.total = done, total
+
+    def _run(self) -> None:
+        try:
+            scan_media(list(self.relative), self.max_workers, progress=self._progress)
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+            print(f"⚠️ Warning: media metadata scan failed: {e}")
+
+    def start(self) -> "MediaScan":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="media-meta-scan", daemon=True)
+            self._thread.start()
+        return self
+
+    @property
+    def started(self) -> bool:
+        return self._thread is not None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def results(self) -> pd.DataFrame:
+        """What is in the cache so far (this scan or an earlier one), with the relative_path of each file."""
+        df = cached_metadata(self.relative)
+        df.insert(0, "relative_path", df["path"].map(self.relative))
+        return df
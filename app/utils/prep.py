@@ -1,14 +1,44 @@
 # cleaning, normalization, feature engineering
 import pandas as pd
-from urllib.parse import urlparse
+import pyarrow as pa
 from datetime import datetime
 import re
-from geopy.geocoders import Nominatim
-from user_agents import parse
+from utils.ua_parsing import parse_user_agents
+from utils.geocoding import geocode_many
+from utils.links import LINK_COLUMNS, split_urls, parse_session_times
+
+# preprocessed dataset -> raw dataset (also the preprocess_data keyword)
+PREP_STEPS = {
+    "clean_follows": "df_follows",
+    "clean_contacts": "df_contacts",
+    "df_media_prep": "df_media",
+    "df_link_history_prep": "df_link_history",
+    "df_locations_of_interest_prep": "df_locations_of_interest",
+    "df_last_known_location_prep": "df_last_known_location",
+    "df_devices_prep": "df_devices",
+    "df_time_spent_on_ig_prep": "df_time_spent_on_ig",
+    "df_logs_prep": "df_logs",
+}
+
+# media/<media_type>/<date folder: YYYYMM, YYYY-MM, YYYYMMDD...>/.../<filename>.<ext> (valid for re and RE2)
+MEDIA_PATH_PATTERN = (
+    r"^/*(?P<media_type>[^/]+)"
+    r"(?:/+(?:(?:(?P<year>\d{4})[^/\d]?(?P<month>\d{2})?[^/\d]?(?P<day>\d{2})?[^/]*|[^/]+)/+)?"
+    r"(?:[^/]+/+)*(?P<filename>[^/]*?(?:\.(?P<ext>[^./]+))?))?/*$"
+)
+ARROW_STRING = pd.ArrowDtype(pa.string())
 
 def date_str(timestamp):
     return datetime.fromtimestamp(timestamp)
 
+def _to_object(values: pd.Series) -> pd.Series:
+    """Arrow strings -> plain str/None column."""
+    return values.astype(object).where(values.notna(), None)
+
+def _to_int16(values: pd.Series) -> pd.Series:
+    """Arrow digit strings ('' or null when absent) -> Int16."""
+    return values.replace("", None).astype(pd.ArrowDtype(pa.int16())).astype("Int16")
+
 def preprocess_data( df_contacts=None, df_media=None, df_follows=None, df_devices=None, df_camera_info=None, df_locations_of_interest=None, possible_emails=None, profile_based_in=None, df_link_history=None, recommended_topics=None, signup_details=None, password_change_activity=None, df_last_known_location=None, df_logs=None, df_time_spent_on_ig=None):
     if df_contacts is not None and not df_contacts.empty:
         try:
@@ -52,60 +82,6 @@ def preprocess_data( df_contacts=None, df_media=None, df_follows=None, df_device
 
     if df_media is not None and not df_media.empty:
         try:
-            def _parse_path_bits(path: str) -> dict:
-                """Extract media_type, timestamp-like folder, filename, and extension from a relative path."""
-                if not isinstance(path, str) or not path.strip():
-                    return {"media_type": None, "ts_folder": None, "filename": None, "ext": None}
-
-                parts = [p for p in path.split("/") if p]
-                media_type = parts[0] if len(parts) >= 1 else None
-                ts_folder = parts[1] if len(parts) >= 2 else None
-                filename = parts[-1] if parts else None
-                ext = filename.split(".")[-1].lower() if filename and "." in filename else None
-
-                return {"media_type": media_type, "ts_folder": ts_folder, "filename": filename, "ext": ext}
-
-            def _normalize_timestamp(ts_folder: str) -> dict:
-                """
-                Converts folder-like timestamps such as '202404', '2021-08', '20210430' into structured info.
-                Uses date_str() for readable datetime values when possible.
-                """
-                if not ts_folder or not isinstance(ts_folder, str):
-                    return {"timestamp_str": None, "year": None, "month": None, "day": None, "year_month": None}
-
-                digits = re.sub(r"\D", "", ts_folder)  # e.g. '2021-08' → '202108'
-                year = month = day = None
-                timestamp_str = None
-                year_month = None
-
-                # Try YYYYMMDD
-                if len(digits) >= 8:
-                    year, month, day = int(digits[:4]), int(digits[4:6]), int(digits[6:8])
-                    timestamp_str = f"{year:04d}{month:02d}{day:02d}"
-                    try:
-                        year_month = date_str(datetime(year, month, 1).timestamp())
-                    except ValueError:
-                        year_month = None
-                    return {"timestamp_str": timestamp_str, "year": year, "month": month, "day": day, "year_month": year_month}
-
-                # Try YYYYMM
-                if len(digits) >= 6:
-                    year, month = int(digits[:4]), int(digits[4:6])
-                    timestamp_str = f"{year:04d}{month:02d}"
-                    try:
-                        year_month = date_str(datetime(year, month, 1).timestamp())
-                    except ValueError:
-                        year_month = None
-                    return {"timestamp_str": timestamp_str, "year": year, "month": month, "day": None, "year_month": year_month}
-
-                # Try YYYY only
-                if len(digits) >= 4:
-                    year = int(digits[:4])
-                    timestamp_str = f"{year:04d}"
-                    return {"timestamp_str": timestamp_str, "year": year, "month": None, "day": None, "year_month": None}
-
-                return {"timestamp_str": None, "year": None, "month": None, "day": None, "year_month": None}
-
             df = df_media.copy()
             df.columns = [c.strip().lower() for c in df.columns]
 
@@ -113,45 +89,27 @@ def preprocess_data( df_contacts=None, df_media=None, df_follows=None, df_device
                 if col not in df.columns:
                     df[col] = None
 
-            # Parse relative_path
-            if "relative_path" in df.columns and df["relative_path"].notna().any():
-                parsed = df["relative_path"].apply(_parse_path_bits).apply(pd.Series)
-                df["media_type"] = df["media_type"].fillna(parsed["media_type"])
-                df["filename"] = parsed["filename"]
-                df["ext"] = parsed["ext"]
-
-                # Normalize timestamp info from path
-                norm = parsed["ts_folder"].apply(_normalize_timestamp).apply(pd.Series)
-            else:
-                df["filename"] = None
-                df["ext"] = None
-                norm = pd.DataFrame({
-                    "timestamp_str": None,
-                    "year": None,
-                    "month": None,
-                    "day": None,
-                    "year_month": None
-                }, index=df.index)
-
-            # Fill year and timestamp
-            df["year"] = pd.to_numeric(df["year"], errors="coerce").astype("Int64")
-            df["year"] = df["year"].fillna(norm["year"]).astype("Int64")
-
-            def _clean_ts(x):
-                if pd.isna(x):
-                    return None
-                s = re.sub(r"\D", "", str(x))
-                return s if len(s) in (4, 6, 8) else None
-
-            df["timestamp"] = df["timestamp"].apply(_clean_ts).fillna(norm["timestamp_str"])
-            df["day"] = norm["day"].astype("Int64")
-            df["year_month"] = norm["year_month"]
-
-            # Backfill missing values from timestamp
-            if "timestamp" in df.columns and df["timestamp"].notna().any():
-                df.loc[df["year"].isna() & df["timestamp"].notna(), "year"] = (
-                    df["timestamp"].str[:4].astype("Int64")
-                )
+            # one regex pass over the paths (RE2 on Arrow strings): media_type/<date folder>/.../filename.ext
+            # unmatched optional groups come back as ''
+            parsed = df["relative_path"].astype("string").astype(ARROW_STRING).str.extract(MEDIA_PATH_PATTERN).replace("", None)
+            single = parsed["filename"].isna() & parsed["media_type"].notna()  # 'file.jpg': no folder at all
+            if single.any():
+                parsed.loc[single, "filename"] = parsed.loc[single, "media_type"]
+                parsed.loc[single, "ext"] = parsed.loc[single, "media_type"].str.extract(r"\.(?P<ext>[^.]+)$")["ext"]
+            df["media_type"] = df["media_type"].astype(object).fillna(parsed["media_type"].astype(object)).astype("category")
+            df["filename"] = _to_object(parsed["filename"])
+            df["ext"] = _to_object(parsed["ext"].str.lower())
+
+            # the YYYYMM folder load_data already captured wins, the date folder of the path is the fallback
+            digits = df["timestamp"].astype("string").astype(ARROW_STRING).str.replace(r"\D", "", regex=True)
+            from_path = parsed["year"] + parsed["month"].fillna("") + parsed["day"].fillna("")
+            timestamp = digits.where(digits.str.len().isin([4, 6, 8])).fillna(from_path)
+            df["timestamp"] = _to_object(timestamp)
+
+            df["year"] = pd.to_numeric(df["year"], errors="coerce").astype("Int16").fillna(_to_int16(timestamp.str[:4]))
+            df["month"] = _to_int16(timestamp.str[4:6])
+            df["day"] = _to_int16(timestamp.str[6:8])
+            df["year_month"] = pd.to_datetime(_to_object(timestamp.str[:6].where(timestamp.str.len() >= 6)), format="%Y%m", errors="coerce")
 
             return df
         except Exception as e:
@@ -210,37 +168,9 @@ def preprocess_data( df_contacts=None, df_media=None, df_follows=None, df_device
         try:
             df = df_devices.copy()
 
-            # Function to parse user agent
-            def extract_user_agent_info(ua_string):
-                try:
-                    ua = parse(ua_string)
-                    return pd.Series({
-                        'browser_family': ua.browser.family,
-                        'browser_version': ua.browser.version_string,
-                        'os_family': ua.os.family,
-                        'os_version': ua.os.version_string,
-                        'device_family': ua.device.family,
-                        'is_mobile': ua.is_mobile,
-                        'is_tablet': ua.is_tablet,
-                        'is_pc': ua.is_pc,
-                        'is_bot': ua.is_bot
-                    })
-                except Exception:
-                    return pd.Series({
-                        'browser_family': None,
-                        'browser_version': None,
-                        'os_family': None,
-                        'os_version': None,
-                        'device_family': None,
-                        'is_mobile': False,
-                        'is_tablet': False,
-                        'is_pc': False,
-                        'is_bot': False
-                    })
-
             if 'user_agent' in df.columns:
-                ua_df = df['user_agent'].apply(extract_user_agent_info)
-                df_processed = pd.concat([df, ua_df], axis=1)
+                # distinct UA strings are parsed once (cached on disk) and joined back
+                df_processed = pd.concat([df, parse_user_agents(df['user_agent'])], axis=1)
             else:
                 df_processed = df
                 
@@ -263,27 +193,11 @@ def preprocess_data( df_contacts=None, df_media=None, df_follows=None, df_device
             if "value" not in df.columns:
                 return pd.DataFrame(columns=["value", "latitude", "longitude"])
             
-            geolocator = Nominatim(user_agent="insta_dashboard")
-            latitudes, longitudes = [], []
-            
-            for loc in df["value"]:
-                if pd.isna(loc) or not loc:
-                    latitudes.append(None)
-                    longitudes.append(None)
-                    continue
-                    
-                try:
-                    location = geolocator.geocode(loc)
-                    if location:
-                        latitudes.append(location.latitude)
-                        longitudes.append(location.longitude)
-                    else:
-                        latitudes.append(None)
-                        longitudes.append(None)
-                except Exception:
-                    latitudes.append(None)
-                    longitudes.append(None)
-                    
+            # cache -> offline gazetteer -> Nominatim (see utils/geocoding.py)
+            coords = geocode_many(df["value"])
+            latitudes = [c[0] if c else None for c in coords]
+            longitudes = [c[1] if c else None for c in coords]
+
             df["latitude"] = latitudes
             df["longitude"] = longitudes
             
@@ -309,28 +223,18 @@ def preprocess_data( df_contacts=None, df_media=None, df_follows=None, df_device
             required_cols = ["Website_link_you_visited", "Website session start time", "Website session end time"]
             missing_cols = [col for col in required_cols if col not in df.columns]
             if missing_cols:
-                return pd.DataFrame(columns=["Website_name", "session_start", "session_end", "total_time_min"])
+                return pd.DataFrame(columns=LINK_COLUMNS + ["session_start", "session_end", "total_time_min"])
             
-            df["Website_name"] = df["Website_link_you_visited"].apply(
-                lambda x: urlparse(x).netloc if pd.notna(x) else None
-            )
-            df["session_start"] = pd.to_datetime(
-                df["Website session start time"],
-                format="%b %d, %Y %I:%M:%S%p",
-                errors="coerce"
-            )
-
-            df["session_end"] = pd.to_datetime(
-                df["Website session end time"],
-                format="%b %d, %Y %I:%M:%S%p",
-                errors="coerce"
-            )
+            # each distinct URL / time string is parsed once (Arrow regexes), see utils/links.py
+            df[LINK_COLUMNS] = split_urls(df["Website_link_you_visited"])
+            df["session_start"] = parse_session_times(df["Website session start time"])
+            df["session_end"] = parse_session_times(df["Website session end time"])
 
             df["total_time_min"] = (df["session_end"] - df["session_start"]).dt.total_seconds() / 60
 
             return df
         except Exception as e:
-            return pd.DataFrame(columns=["Website_name", "session_start", "session_end", "total_time_min"])
+            return pd.DataFrame(columns=LINK_COLUMNS + ["session_start", "session_end", "total_time_min"])
 
     if recommended_topics is not None:
         pass
@@ -340,8 +244,14 @@ def preprocess_data( df_contacts=None, df_media=None, df_follows=None, df_device
         pass
     if df_last_known_location is not None:
         pass
-    if df_logs is not None:
-        pass
+    if df_logs is not None and not df_logs.empty:
+        try:
+            df = df_logs.copy()
+            if 'user_agent' in df.columns:
+                df = pd.concat([df, parse_user_agents(df['user_agent'].replace('', None))], axis=1)
+            return df
+        except Exception as e:
+            return pd.DataFrame()
     
     if df_time_spent_on_ig is not None and not df_time_spent_on_ig.empty:
         try:
@@ -367,7 +277,29 @@ def preprocess_data( df_contacts=None, df_media=None, df_follows=None, df_device
     
     return
 
-def count_user_messages(df_all_conversations: pd.DataFrame) -> tuple:
+def find_main_user(df_all_conversations: pd.DataFrame, username: str = None) -> str:
+    """
+    Identify the account owner in the conversations.
+    Uses `username` (signup_details['Username']) when it appears among the participants,
+    otherwise the participant who shows up in the most duo conversations.
+    """
+    if df_all_conversations is None or df_all_conversations.empty or "participants" not in df_all_conversations.columns:
+        return "Unknown User"
+
+    participants = df_all_conversations["participants"]
+    participants = participants[participants.map(lambda x: isinstance(x, list))]
+    exploded = participants.explode()
+
+    if username and username != "N/A" and (exploded == username).any():
+        return username
+
+    # The main user is the one who appears most often in duo conversations
+    duo = exploded[participants.map(len).reindex(exploded.index) == 2]
+    if duo.empty:
+        return "Unknown User"
+    return duo.value_counts().idxmax()
+
+def count_user_messages(df_all_conversations: pd.DataFrame, username: str = None) -> tuple:
     """
     Identifies the owner user and counts sent and received messages.
     Returns: (sent_messages, received_messages)
@@ -376,45 +308,23 @@ def count_user_messages(df_all_conversations: pd.DataFrame) -> tuple:
         return 0, 0
     
     try:
-        def find_main_user(df_all_conversations: pd.DataFrame) -> str:
-            candidate_users = {}
-
-            for _, row in df_all_conversations.iterrows():
-                participants = row.get("participants")
-                if not isinstance(participants, list) or len(participants) != 2:
-                    continue
-
-                for user in participants:
-                    candidate_users[user] = candidate_users.get(user, 0) + 1
-
-            if not candidate_users:
-                return "Unknown User"
-
-            # The main user is the one who appears most often
-            main_user = max(candidate_users, key=candidate_users.get)
-            return main_user
-        
-        main_user = find_main_user(df_all_conversations)
-        
-        # Count sent and received messages
-        messages_envoyes = 0
-        messages_recus = 0
-        
-        for _, row in df_all_conversations.iterrows():
-            participation = row.get('participants_participation')
-            
-            if not participation or not isinstance(participation, dict):
-                continue
-                
-            # Messages sent by the main user
-            if main_user in participation:
-                messages_envoyes += participation[main_user]
-            
-            # Messages received (all messages from other participants)
-            for user, count in participation.items():
-                if user != main_user:
-                    messages_recus += count
-        
+        main_user = find_main_user(df_all_conversations, username)
+
+        # Flatten participants_participation ({user: count}) once into a long (user, count) frame
+        participation = df_all_conversations["participants_participation"]
+        participation = participation[participation.map(lambda x: isinstance(x, dict) and len(x) > 0)]
+        if participation.empty:
+            return 0, 0
+
+        long = pd.DataFrame({
+            "user": [u for d in participation for u in d.keys()],
+            "count": pd.to_numeric(pd.Series([c for d in participation for c in d.values()]), errors="coerce").fillna(0),
+        })
+        totals = long.groupby(long["user"] == main_user)["count"].sum()
+
+        # Messages sent by the main user / received from all other participants
+        messages_envoyes = int(totals.get(True, 0))
+        messages_recus = int(totals.get(False, 0))
         return messages_envoyes, messages_recus
     except Exception as e:
-        return 0, 0
\ No newline at end of file
+        return 0, 0
@@ -0,0 +1,194 @@
+# on-disk columnar snapshot of load_data() / preprocess outputs
+import os
+import re
+import json
+import shutil
+import hashlib
+import pandas as pd
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional
+from utils.manifest import export_manifest
+from utils.export_fs import is_zip_path
+
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "./data/.snapshot")
+SNAPSHOT_VERSION = 1  # bump when the on-disk layout changes
+
+# ------------- Fingerprint ---------------------------------------------------
+
+def export_fingerprint(data_path: str, extra_files: Iterable[str] = ()) -> Optional[str]:
+    """
+    Hash every file of the export manifest (relative path, size, mtime) plus optional extra files.
+
+    Args:
+        data_path: Root of the Instagram export
+        extra_files: Files outside the export that also feed load_data (e.g. enriched CSV)
+
+    Returns:
+        Hex digest, or None if the export folder does not exist
+    """
+    if not data_path or not (os.path.isdir(data_path) or is_zip_path(data_path)):
+        return None
+
+    h = hashlib.sha1(f"v{SNAPSHOT_VERSION}".encode())
+    manifest = export_manifest(data_path)
+    entries = [f"{p}|{s}|{m}" for p, s, m in zip(manifest["path"], manifest["size"], manifest["mtime_ns"])]
+    for extra in extra_files:
+        try:
+            st = os.stat(extra)
+            entries.append(f"@{extra}|{st.st_size}|{st.st_mtime_ns}")
+        except OSError:
+            entries.append(f"@{extra}|missing")
+
+    for e in sorted(entries):
+        h.update(e.encode("utf-8", "surrogateescape"))
+        h.update(b"\n")
+    return h.hexdigest()
+
+# ------------- Encoding ------------------------------------------------------
+
+def _is_columnar(df: pd.DataFrame) -> bool:
+    """Parquet mangles dict/set cells (dicts become structs with the union of keys)."""
+    if not all(isinstance(c, str) for c in df.columns) or not df.columns.is_unique:
+        return False
+    for col in df.columns:
+        if df[col].dtype != object:
+            continue
+        sample = df[col].dropna()
+        if sample.map(lambda v: isinstance(v, (dict, set, tuple))).any():
+            return False
+    return True
+
+def _write_frame(df: pd.DataFrame, folder: Path, key: str) -> dict:
+    if _is_columnar(df):
+        try:
+            df.to_parquet(folder / f"{key}.parquet", index=True)
+            return {"kind": "parquet", "file": f"{key}.parquet"}
+        except Exception as e:
+            print(f"⚠️ Warning: parquet snapshot failed for {key}, falling back to pickle: {e}")
+    df.to_pickle(folder / f"{key}.pkl")
+    return {"kind": "pickle", "file": f"{key}.pkl"}
+
+def _encode(obj: Any, folder: Path, key: str) -> dict:
+    """Recursively encode an object; DataFrames go to their own files."""
+    if isinstance(obj, pd.DataFrame):
+        return _write_frame(obj, folder, key)
+    if isinstance(obj, dict):
+        return {"kind": "dict", "items": [[k, _encode(v, folder, f"{key}.{i}")] for i, (k, v) in enumerate(obj.items())]}
+    if isinstance(obj, (set, frozenset)):
+        return {"kind": "set", "items": sorted(obj, key=str)}
+    if isinstance(obj, (list, tuple)) and any(isinstance(v, (pd.DataFrame, dict, set)) for v in obj):
+        return {"kind": "list", "items": [_encode(v, folder, f"{key}.{i}") for i, v in enumerate(obj)]}
+    if hasattr(obj, "item") and not isinstance(obj, (list, tuple)):
+        obj = obj.item()  # numpy scalars
+    return {"kind": "value", "value": obj}
+
+def _decode(spec: dict, folder: Path) -> Any:
+    kind = spec["kind"]
+    if kind == "parquet":
+        return pd.read_parquet(folder / spec["file"], memory_map=True)
+    if kind == "pickle":
+        return pd.read_pickle(folder / spec["file"])
+    if kind == "dict":
+        return {k: _decode(v, folder) for k, v in spec["items"]}
+    if kind == "set":
+        return set(spec["items"])
+    if kind == "list":
+        return [_decode(v, folder) for v in spec["items"]]
+    return spec["value"]
+
+# ------------- Public functions ----------------------------------------------
+
+def load_snapshot(name: str, fingerprint: str, fields: Iterable[str]) -> Optional[tuple]:
+    """Return the stored tuple for `name` if its fingerprint matches, else None."""
+    folder = Path(SNAPSHOT_DIR) / name
+    try:
+        with open(folder / "manifest.json", "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("fingerprint") != fingerprint or manifest.get("fields") != list(fields):
+            return None
+        return tuple(_decode(manifest["objects"][field], folder) for field in manifest["fields"])
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"⚠️ Warning: Could not read snapshot {name}: {e}")
+        return None
+
+def read_snapshot(name: str) -> Optional[dict]:
+    """Return the stored {field: value} for `name` whatever its fingerprint, or None."""
+    folder = Path(SNAPSHOT_DIR) / name
+    try:
+        with open(folder / "manifest.json", "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        return {field: _decode(manifest["objects"][field], folder) for field in manifest["fields"]}
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"⚠️ Warning: Could not read snapshot {name}: {e}")
+        return None
+
+def save_snapshot(name: str, fingerprint: str, fields: Iterable[str], values: tuple) -> None:
+    """Write `values` (one per field) to SNAPSHOT_DIR/name, replacing any older snapshot."""
+    fields = list(fields)
+    root = Path(SNAPSHOT_DIR)
+    folder = root / name
+    tmp = root / f".{name}.tmp"
+    try:
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True, exist_ok=True)
+        # field names become file names: keep them filesystem-safe (e.g. 'logs:login')
+        objects = {field: _encode(value, tmp, re.sub(r"[^\w.-]", "_", field)) for field, value in zip(fields, values)}
+        with open(tmp / "manifest.json", "w", encoding="utf-8") as f:
+            json.dump({"fingerprint": fingerprint, "fields": fields, "objects": objects}, f, default=str)
+        shutil.rmtree(folder, ignore_errors=True)
+        os.replace(tmp, folder)
+    except Exception as e:
+        print(f"⚠️ Warning: Could not write snapshot {name}: {e}")
+        shutil.rmtree(tmp, ignore_errors=True)
+
+def _parquet_files(spec: dict, folder: Path, label: str) -> dict:
+    if spec["kind"] == "parquet":
+        return {label: str((folder / spec["file"]).resolve())}
+    if spec["kind"] == "dict":
+        return {k: v for key, item in spec["items"] for k, v in _parquet_files(item, folder, f"{label}.{key}").items()}
+    return {}
+
+def snapshot_tables(name: str) -> dict:
+    """
+    Parquet files of a snapshot, to be scanned in place (e.g. by the SQL console) instead of read into pandas.
+
+    Returns:
+        {field: file path}, dict items as 'field.key'; frames stored as pickle are left out
+    """
+    folder = Path(SNAPSHOT_DIR) / name
+    try:
+        with open(folder / "manifest.json", "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"⚠️ Warning: Could not read snapshot {name}: {e}")
+        return {}
+    return {k: v for field in manifest["fields"] for k, v in _parquet_files(manifest["objects"][field], folder, field).items()}
+
+def snapshot_cached(name: str, builder: Callable[[], tuple], fields: Iterable[str], fingerprint: Optional[str]) -> tuple:
+    """
+    Load `name` from its snapshot when the fingerprint matches, otherwise build and store it.
+
+    Args:
+        name: Snapshot folder name (e.g. 'raw', 'prep')
+        builder: Zero-argument function returning a tuple aligned with `fields`
+        fields: Names of the tuple items
+        fingerprint: Export fingerprint; None disables the snapshot
+
+    Returns:
+        The tuple produced by `builder` (or read back from disk)
+    """
+    fields = list(fields)
+    if fingerprint:
+        cached = load_snapshot(name, fingerprint, fields)
+        if cached is not None:
+            return cached
+    values = builder()
+    if fingerprint:
+        save_snapshot(name, fingerprint, fields, values)
+    return values
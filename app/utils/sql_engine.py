@@ -0,0 +1,196 @@
+# embedded SQL over the export tables (optional duckdb): parquet snapshots are scanned in place, other frames through Arrow
+# tables are registered lazily: a dataset is only loaded when a query first names it
+# the connection is shared by every session and runs on the server: it is read-only and can only read the snapshots
+import os
+import re
+import json
+import time
+import threading
+import pandas as pd
+from typing import Callable, Dict, List, Optional, Union
+from utils.snapshot import SNAPSHOT_DIR
+
+# ------------- Config --------------------------------------------------------
+SQL_MEMORY_LIMIT = os.getenv("SQL_MEMORY_LIMIT", "1GB")  # for the whole connection, DuckDB spills or fails above it
+SQL_THREADS = int(os.getenv("SQL_THREADS", os.cpu_count() or 1))
+SQL_PAGE_SIZE = 100
+
+TableSource = Union[pd.DataFrame, List[str]]
+# loader of a lazily registered dataset -> {table name: source} (several tables for dict-valued datasets)
+TableLoader = Callable[[], Dict[str, TableSource]]
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+def sql_available() -> bool:
+    """True when the optional duckdb package is installed."""
+    try:
+        import duckdb  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+# ------------- Helpers -------------------------------------------------------
+
+def table_name(name: str) -> str:
+    """Dataset name -> SQL identifier ('clean_follows.df' -> 'clean_follows_df')."""
+    return re.sub(r"\W", "_", name).strip("_").lower()
+
+def _quote(value: str) -> str:
+    return "'" + str(value).replace("'", "''") + "'"
+
+def _to_arrow(df: pd.DataFrame):
+    """Arrow table of a frame; columns Arrow can't type (mixed dicts, sets...) are passed as JSON text."""
+    import pyarrow as pa
+    df = df.reset_index(drop=True)
+    df.columns = [str(c) for c in df.columns]
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        pass
+    df = df.copy()
+    for col in df.columns:
+        try:
+            pa.array(df[col], from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            df[col] = df[col].map(lambda v: None if v is None else json.dumps(v, default=str, ensure_ascii=False))
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+# ------------- Engine --------------------------------------------------------
+
+class SqlEngine:
+    """In-memory DuckDB database whose tables are views over parquet snapshots, or Arrow copies of in-memory frames."""
+
+    def __init__(self, memory_limit: str = SQL_MEMORY_LIMIT, threads: int = SQL_THREADS, allowed_dir: str = SNAPSHOT_DIR):
+        import duckdb
+        self.memory_limit = memory_limit
+        self.con = duckdb.connect(":memory:", config={"threads": threads, "memory_limit": memory_limit})
+        # no file access outside the snapshots (read_csv('/etc/...'), COPY ... TO, ATTACH, INSTALL),
+        # and no SET from a query can undo it
+        self.con.execute(f"SET allowed_directories = [{_quote(os.path.join(os.path.abspath(allowed_dir), ''))}]")
+        self.con.execute("SET enable_external_access = false")
+        self.con.execute("SET lock_configuration = true")
+        self.tables: Dict[str, str] = {}  # SQL name -> 'parquet' or 'arrow'
+        self.pending: Dict[str, tuple] = {}  # SQL name -> (dataset name, loader), not loaded yet
+        self._lock = threading.Lock()  # one connection, shared by every Streamlit session
+        self._load_lock = threading.Lock()  # one lazy load at a time (a dataset is never loaded twice)
+        self._last = None  # sql of the result kept in __last_result
+
+    def register(self, name: str, source: TableSource) -> Optional[str]:
+        """
+        Expose a dataset as a table.
+
+        Args:
+            name: Dataset name (made SQL-safe with table_name)
+            source: Parquet files (several are unioned by column name, scanned in place) or a DataFrame
+                (converted once to an Arrow table, a copy; columns Arrow can't type become JSON text)
+
+        Returns:
+            The SQL table name, or None if it could not be registered
+        """
+        sql_name = table_name(name)
+        try:
+            with self._lock:
+                self._last = None
+                if isinstance(source, pd.DataFrame):
+                    self.con.register(sql_name, _to_arrow(source))
+                    self.tables[sql_name] = "arrow"
+                else:
+                    files = "[" + ", ".join(_quote(f) for f in source) + "]"
+                    self.con.execute(
+                        f'CREATE OR REPLACE VIEW "{sql_name}" AS '
+                        # pandas stores non-default indexes as __index_level_N__ columns
+                        f"SELECT COLUMNS(c -> c NOT SIMILAR TO '__index_level_\\d+__') FROM read_parquet({files}, union_by_name = true)"
+                    )
+                    self.tables[sql_name] = "parquet"
+            return sql_name
+        except Exception as e:
+            print(f"⚠️ Warning: Could not register table {name}: {e}")
+            return None
+
+    def register_lazy(self, name: str, loader: TableLoader) -> str:
+        """
+        Declare a dataset without loading it: `loader` runs the first time a query names the dataset
+        (or a table of it, '<name>_<key>'), and its {table name: source} are registered then.
+
+        Returns:
+            The SQL name queries are matched against
+        """
+        sql_name = table_name(name)
+        with self._lock:
+            self.pending[sql_name] = (name, loader)
+        return sql_name
+
+    def load(self, sql_name: str) -> None:
+        """Run the loader of a pending dataset and register its tables (no-op once loaded)."""
+        with self._load_lock:
+            with self._lock:
+                entry = self.pending.pop(sql_name, None)
+            if entry is None:
+                return
+            name, loader = entry
+            try:
+                sources = loader() or {}
+            except Exception as e:
+                print(f"⚠️ Warning: Could not load table {name}: {e}")
+                return
+            for table, source in sources.items():
+                self.register(table, source)
+
+    def _load_referenced(self, sql: str) -> None:
+        words = {w.lower() for w in _IDENTIFIER.findall(sql)}
+        for sql_name in list(self.pending):
+            if any(w == sql_name or w.startswith(sql_name + "_") for w in words):
+                self.load(sql_name)
+
+    def schema(self) -> pd.DataFrame:
+        """One row per column of every registered table (table, column, type); pending datasets get a single row."""
+        with self._lock:
+            rows = []
+            for name in sorted(self.tables):
+                try:
+                    for col, col_type, *_ in self.con.execute(f'DESCRIBE "{name}"').fetchall():
+                        rows.append((name, col, col_type))
+                except Exception as e:
+                    rows.append((name, f"⚠️ {e}", ""))
+            rows.extend((name, "", "loaded on first query") for name in self.pending)
+        rows.sort(key=lambda row: row[0])
+        return pd.DataFrame(rows, columns=["table", "column", "type"])
+
+    def _check_select(self, sql: str) -> None:
+        """Raise ValueError unless `sql` is a single SELECT (or WITH ... SELECT) statement."""
+        import duckdb
+        with self._lock:
+            statements = self.con.extract_statements(sql)
+        if len(statements) != 1:
+            raise ValueError("Run one statement at a time")
+        if statements[0].type != duckdb.StatementType.SELECT:
+            raise ValueError(f"Only SELECT queries can be run, not {statements[0].type.name}")
+
+    def query(self, sql: str, page: int = 0, page_size: int = SQL_PAGE_SIZE) -> dict:
+        """
+        Run one SELECT statement and fetch a single page of its result.
+
+        Args:
+            sql: Query text (SELECT or WITH ... SELECT; anything else raises ValueError)
+            page: Zero-based page number
+            page_size: Rows per page; only these rows are converted to pandas
+
+        Returns:
+            {'rows': DataFrame of the page, 'total_rows': int, 'elapsed': seconds}
+        """
+        start = time.perf_counter()
+        sql = sql.strip().rstrip(";")
+        self._check_select(sql)
+        self._load_referenced(sql)
+        with self._lock:
+            # turning pages of the same query reads the stored result instead of running it again
+            if self._last != sql:
+                self._last = None
+                # the result is materialized once inside DuckDB (columnar, spilled to disk if needed)
+                self.con.execute("DROP TABLE IF EXISTS __last_result")
+                self.con.sql(sql).create("__last_result")
+                self._last = sql
+            total = self.con.execute("SELECT count(*) FROM __last_result").fetchone()[0]
+            rows = self.con.execute(
+                "SELECT * FROM __last_result LIMIT ? OFFSET ?", [page_size, max(page, 0) * page_size]
+            ).df()
+        return {"rows": rows, "total_rows": total, "elapsed": time.perf_counter() - start}
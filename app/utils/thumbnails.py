@@ -0,0 +1,179 @@
+# gallery thumbnails: resized WebP images and first-frame posters for videos, in a content-addressed cache
+# the content digest of each (path, size, mtime) is kept in a SQLite index, so a restart does not re-read the files
+import os
+import io
+import shutil
+import hashlib
+import tempfile
+import subprocess
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterable, Optional, Tuple
+
+from PIL import Image, ImageOps
+from utils.cache import FileCache
+from utils.export_fs import is_zip_path, open_binary, read_bytes, stat
+
+# ------------- Config --------------------------------------------------------
+THUMB_DIR = os.getenv("THUMB_DIR", "./data/.cache/thumbs")
+THUMB_INDEX_PATH = os.getenv("THUMB_INDEX_PATH", "./data/.cache/thumb_index.sqlite")
+THUMB_SIZE = int(os.getenv("THUMB_SIZE", 320))  # longest side, in pixels
+THUMB_QUALITY = 70
+THUMB_WORKERS = int(os.getenv("THUMB_WORKERS", min(8, os.cpu_count() or 1)))
+IMAGE_EXTS = {"jpg", "jpeg", "png", "webp", "heic"}
+VIDEO_EXTS = {"mp4", "mov"}
+
+# (path, size, mtime_ns) -> thumbnail path (None: could not be generated)
+_thumb_index: Dict[Tuple[str, int, int], Optional[str]] = {}
+
+# ------------- Helpers -------------------------------------------------------
+
+def _file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha1()
+    with open_binary(path) as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _thumb_path(digest: str, folder: str = THUMB_DIR) -> Path:
+    # sharded by the first two hex chars so no folder grows too large
+    return Path(folder) / digest[:2] / f"{digest}_{THUMB_SIZE}.webp"
+
+def _video_poster(path: str) -> Optional[Image.Image]:
+    """First frame of a video, with OpenCV if installed, else the ffmpeg binary."""
+    if is_zip_path(path):
+        # decoders want a real file: copy just this member to a temporary one
+        with tempfile.NamedTemporaryFile(suffix=Path(path).suffix) as tmp:
+            with open_binary(path) as src:
+                shutil.copyfileobj(src, tmp)
+            tmp.flush()
+            return _video_poster(tmp.name)
+
+    try:
+        import cv2
+        capture = cv2.VideoCapture(path)
+        try:
+            ok, frame = capture.read()
+        finally:
+            capture.release()
+        if ok:
+            return Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    except ImportError:
+        pass
+
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        return None
+    result = subprocess.run(
+        [ffmpeg, "-v", "error", "-i", path, "-frames:v", "1", "-f", "image2pipe", "-vcodec", "png", "-"],
+        capture_output=True, timeout=30,
+    )
+    if result.returncode != 0 or not result.stdout:
+        return None
+    return Image.open(io.BytesIO(result.stdout))
+
+def make_thumbnail(path: str, folder: str = THUMB_DIR, digest: Optional[str] = None) -> Optional[str]:
+    """
+    Build (or reuse) the WebP thumbnail of one media file.
+
+    Args:
+        path: Image or video file
+        folder: Cache root; thumbnails are named after the sha1 of the file content
+        digest: That sha1 when already known (the file is then only read if the thumbnail is missing)
+
+    Returns:
+        Path of the thumbnail, or None if the file could not be decoded
+    """
+    ext = Path(path).suffix.lower().lstrip(".")
+    try:
+        target = _thumb_path(digest or _file_digest(path), folder)
+        if target.exists():
+            return str(target)
+
+        if ext in VIDEO_EXTS:
+            img = _video_poster(path)
+            if img is None:
+                return None
+        else:
+            img = Image.open(io.BytesIO(read_bytes(path)) if is_zip_path(path) else path)
+            img.draft("RGB", (THUMB_SIZE, THUMB_SIZE))  # JPEG: decode at reduced scale
+            img = ImageOps.exif_transpose(img)
+
+        img = img.convert("RGB")
+        img.thumbnail((THUMB_SIZE, THUMB_SIZE))
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_suffix(f".{os.getpid()}.tmp")
+        img.save(tmp, "WEBP", quality=THUMB_QUALITY, method=4)
+        os.replace(tmp, target)
+        return str(target)
+    except Exception as e:
+        print(f"⚠️ Warning: Could not build thumbnail for {path}: {e}")
+        return None
+
+def _build(path: str, folder: str, digest: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """(content digest, thumbnail path) of one file, for the digest index."""
+    try:
+        digest = digest or _file_digest(path)
+    except Exception as e:
+        print(f"⚠️ Warning: Could not read {path}: {e}")
+        return None, None
+    return digest, make_thumbnail(path, folder, digest)
+
+# ------------- Digest index (SQLite) -----------------------------------------
+_digest_index = FileCache(lambda: THUMB_INDEX_PATH, "digests", ["digest TEXT"], 1,
+                          encode=lambda digest: (digest,), decode=lambda row: row[0], label="thumbnail index")
+
+# ------------- Public functions ----------------------------------------------
+
+def get_thumbnails(paths: Iterable[str], max_workers: int = THUMB_WORKERS, folder: str = THUMB_DIR) -> Dict[str, Optional[str]]:
+    """
+    Thumbnails for a batch of media files, built on a process pool when missing.
+
+    Args:
+        paths: Media files (e.g. one gallery page)
+        max_workers: Worker processes; 1 builds in the current process
+        folder: Cache root
+
+    Returns:
+        {path: thumbnail path or None}
+    """
+    thumbs, keys = {}, {}
+    for path in dict.fromkeys(paths):
+        try:
+            key = (path, *stat(path))
+        except OSError:
+            thumbs[path] = None
+            continue
+        cached = _thumb_index.get(key, "")
+        if cached != "" and (cached is None or os.path.exists(cached)):
+            thumbs[path] = cached
+        else:
+            keys[path] = key
+
+    # known content: the thumbnail is found by name, without reading the file
+    digests = _digest_index.get_many(list(keys.values()))
+    todo = {}
+    for path, key in keys.items():
+        digest = digests.get(key)
+        target = _thumb_path(digest, folder) if digest else None
+        if target is not None and target.exists():
+            _thumb_index[key] = thumbs[path] = str(target)
+        else:
+            todo[path] = digest
+
+    if len(todo) == 1 or max_workers <= 1:
+        built = {path: _build(path, folder, digest) for path, digest in todo.items()}
+    elif todo:
+        built = {}
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(todo))) as pool:
+            futures = {pool.submit(_build, path, folder, digest): path for path, digest in todo.items()}
+            for future in as_completed(futures):
+                built[futures[future]] = future.result()
+    else:
+        built = {}
+
+    _digest_index.put_many({keys[path]: digest for path, (digest, _) in built.items() if digest and not todo[path]})
+    for path, (_, thumb) in built.items():
+        _thumb_index[keys[path]] = thumb
+        thumbs[path] = thumb
+    return thumbs
@@ -0,0 +1,207 @@
+# pre-aggregated event counts and durations by (source, type, day), rolled up to week/month/year on demand
+import numpy as np
+import pandas as pd
+from typing import Optional
+from utils.timeindex import LOCAL_TZ, TimeIndexed
+
+CUBE_COLUMNS = ["source", "type", "day", "count", "duration"]
+
+# cube source -> datasets it is built from (raw names from load_data or prep names from preprocess_data)
+CUBE_INPUTS = {
+    "activity": ["df_all_comments", "df_liked_comments", "df_liked_posts", "df_story_likes", "df_saved_posts", "df_all_conversations"],
+    "media": ["df_media_prep"],
+    "saved": ["df_saved_collections", "df_saved_posts", "df_saved_music"],
+    "screen_time": ["df_time_spent_on_ig_prep"],
+    "logs": ["df_logs"],
+    "follows": ["df_follows"],
+}
+
+# ------------- Events --------------------------------------------------------
+# each extractor returns (day, type[, duration]) rows, one per event; days are naive midnights
+
+def _empty_events() -> pd.DataFrame:
+    return pd.DataFrame({"day": pd.Series(dtype="datetime64[ns]"), "type": pd.Series(dtype=object)})
+
+def _local_day(dt: pd.Series) -> pd.Series:
+    """UTC datetimes -> calendar day in LOCAL_TZ (naive)."""
+    return dt.dt.tz_convert(LOCAL_TZ).dt.tz_localize(None).dt.normalize()
+
+def _activity_events(df_all_comments=None, df_liked_comments=None, df_liked_posts=None,
+                     df_story_likes=None, df_saved_posts=None, df_all_conversations=None) -> pd.DataFrame:
+    dfs = {
+        "Comments": df_all_comments,
+        "Liked Comments": df_liked_comments,
+        "Liked Posts": df_liked_posts,
+        "Story Likes": df_story_likes,
+        "Saved Posts": df_saved_posts,
+        "Conversations": df_all_conversations,
+    }
+    frames = []
+    for name, df in dfs.items():
+        if df is None or df.empty:
+            continue
+        if "date" in df.columns:
+            dt = pd.to_datetime(df["date"], errors="coerce", utc=True)
+        elif "timestamp" in df.columns:
+            dt = pd.to_datetime(pd.to_numeric(df["timestamp"], errors="coerce"), unit="s", utc=True)
+        elif "timestamps" in df.columns:  # conversations: first message timestamp, in ms
+            first = df["timestamps"].map(lambda x: x[0] if isinstance(x, (list, np.ndarray)) and len(x) else None)
+            dt = pd.to_datetime(pd.to_numeric(first, errors="coerce"), unit="ms", utc=True)
+        else:
+            continue
+        frames.append(pd.DataFrame({"day": _local_day(dt), "type": name}))
+    return pd.concat(frames, ignore_index=True) if frames else _empty_events()
+
+def media_month(df_media_prep: pd.DataFrame) -> pd.Series:
+    """Media folders are named YYYYMM: month precision, as the 1st of the month (NaT when undated)."""
+    return pd.to_datetime(df_media_prep["timestamp"].astype(str).str[:6], format="%Y%m", errors="coerce")
+
+def media_day(df_media_prep: pd.DataFrame, media_meta: pd.DataFrame) -> pd.Series:
+    """Capture day from the file metadata (see utils/media_meta.py), the folder month when there is none."""
+    taken = df_media_prep["relative_path"].map(media_meta.dropna(subset=["taken_at"]).set_index("relative_path")["taken_at"])
+    return pd.to_datetime(taken).dt.normalize().fillna(media_month(df_media_prep))
+
+def _media_events(df_media_prep=None, media_meta=None) -> pd.DataFrame:
+    if df_media_prep is None or df_media_prep.empty or "timestamp" not in df_media_prep.columns:
+        return _empty_events()
+    has_meta = media_meta is not None and not media_meta.empty
+    day = media_day(df_media_prep, media_meta) if has_meta else media_month(df_media_prep)
+    return pd.DataFrame({"day": day, "type": df_media_prep["media_type"].astype(object)})
+
+def _saved_events(df_saved_collections=None, df_saved_posts=None, df_saved_music=None) -> pd.DataFrame:
+    frames = []
+    if df_saved_collections is not None and not df_saved_collections.empty and "added_time" in df_saved_collections.columns:
+        collections = df_saved_collections
+        if "title" in collections.columns:
+            collections = collections[collections["title"].isna()]
+        day = pd.to_datetime(collections["added_time"], errors="coerce").dt.normalize()
+        frames.append(pd.DataFrame({"day": day, "type": "Collections"}))
+    if df_saved_posts is not None and not df_saved_posts.empty and "timestamp" in df_saved_posts.columns:
+        day = pd.to_datetime(pd.to_numeric(df_saved_posts["timestamp"], errors="coerce"), unit="s").dt.normalize()
+        frames.append(pd.DataFrame({"day": day, "type": "Posts/Reels"}))
+    if df_saved_music is not None and not df_saved_music.empty:
+        col = next((c for c in ["string_map_data.Created At.timestamp", "timestamp"] if c in df_saved_music.columns), None)
+        if col:
+            day = pd.to_datetime(pd.to_numeric(df_saved_music[col], errors="coerce"), unit="s").dt.normalize()
+            frames.append(pd.DataFrame({"day": day, "type": "Music"}))
+    return pd.concat(frames, ignore_index=True) if frames else _empty_events()
+
+def _screen_time_events(df_time_spent_on_ig_prep=None) -> pd.DataFrame:
+    df = df_time_spent_on_ig_prep
+    if df is None or df.empty or "date" not in df.columns:
+        return _empty_events()
+    return pd.DataFrame({
+        "day": pd.to_datetime(df["date"]).dt.normalize(),
+        "type": "Sessions",
+        "duration": pd.to_numeric(df["duration_sec"], errors="coerce").fillna(0),
+    })
+
+def _logs_events(df_logs=None) -> pd.DataFrame:
+    if df_logs is None or df_logs.empty or "timestamp" not in df_logs.columns:
+        return _empty_events()
+    ts = pd.to_numeric(df_logs["timestamp"], errors="coerce")
+    unit = "ms" if ts.dropna().median() > 1e11 else "s"
+    event = df_logs["log_type"].astype(str).str.lower().str.strip() if "log_type" in df_logs.columns else pd.Series("login", index=df_logs.index)
+    event = event.where(event.isin(["login", "logout"]), "login")
+    return pd.DataFrame({"day": _local_day(pd.to_datetime(ts, unit=unit, utc=True)), "type": event})
+
+def _follows_events(df_follows=None) -> pd.DataFrame:
+    if df_follows is None or df_follows.empty or not {"timestamp", "follows_type", "username"} <= set(df_follows.columns):
+        return _empty_events()
+    df = df_follows[df_follows["follows_type"].isin(["followers", "followings"])].copy()
+    df["dt"] = pd.to_datetime(pd.to_numeric(df["timestamp"], errors="coerce"), unit="s")
+    # someone who followed, unfollowed and followed again only counts once, on the first date
+    df = df.sort_values("dt").drop_duplicates(subset=["follows_type", "username"], keep="first")
+    return pd.DataFrame({"day": df["dt"].dt.normalize(), "type": df["follows_type"]})
+
+_EVENTS = {
+    "activity": _activity_events,
+    "media": _media_events,
+    "saved": _saved_events,
+    "screen_time": _screen_time_events,
+    "logs": _logs_events,
+    "follows": _follows_events,
+}
+
+# ------------- Public functions ----------------------------------------------
+
+def build_cube(source: str, **datasets) -> pd.DataFrame:
+    """
+    Aggregate one source's events per (type, day). Done once per dataset; every chart rolls this up.
+
+    Args:
+        source: Key of CUBE_INPUTS
+        **datasets: The frames listed in CUBE_INPUTS[source], by name
+
+    Returns:
+        DataFrame with CUBE_COLUMNS, sorted by day (duration in seconds, 0 when not applicable)
+    """
+    try:
+        events = _EVENTS[source](**datasets).dropna(subset=["day", "type"])
+    except Exception as e:
+        print(f"⚠️ Warning: Could not build the {source} time cube: {e}")
+        events = _empty_events()
+    if "duration" not in events.columns:
+        events["duration"] = 0.0
+    cube = (
+        events.groupby(["type", "day"], as_index=False, sort=False)
+        .agg(count=("duration", "size"), duration=("duration", "sum"))
+        .sort_values(["day", "type"], kind="stable")
+        .reset_index(drop=True)
+    )
+    cube.insert(0, "source", source)
+    cube["count"] = cube["count"].astype("int64")
+    cube["duration"] = cube["duration"].astype("float64")
+    return cube[CUBE_COLUMNS]
+
+def period_start(days: pd.Series, freq: str) -> pd.Series:
+    """First day of the day/week (Monday)/month/year each day falls in; freq ∈ {'D','W','M','Y'}."""
+    if freq == "D":
+        return days
+    if freq == "W":
+        return days - pd.to_timedelta(days.dt.weekday, unit="D")
+    if freq in ("M", "Y"):
+        return pd.Series(days.values.astype(f"datetime64[{freq}]").astype("datetime64[ns]"), index=days.index)
+    raise ValueError("freq must be 'D', 'W', 'M' or 'Y'")
+
+def rollup(cube: pd.DataFrame, freq: str = "M", date_range: tuple = None, types: Optional[list] = None,
+           fill: bool = False) -> pd.DataFrame:
+    """
+    Counts and durations per (type, period) for a date range.
+
+    Args:
+        cube: Output of build_cube (sorted by day)
+        freq: 'D', 'W', 'M' or 'Y'
+        date_range: Optional (start_date, end_date), both days included
+        types: Keep only these types
+        fill: Add zero rows for the empty periods between the first and last one, per type
+
+    Returns:
+        DataFrame with columns type, period, count, duration, cum_count, cum_duration (sorted by period)
+    """
+    columns = ["type", "period", "count", "duration", "cum_count", "cum_duration"]
+    if cube is None or cube.empty:
+        return pd.DataFrame(columns=columns)
+
+    # the cube is sorted by day: the range is two binary searches, not a scan
+    cube = TimeIndexed(cube, "day", presorted=True).between(date_range)
+    if types is not None:
+        cube = cube[cube["type"].isin(types)]
+    if cube.empty:
+        return pd.DataFrame(columns=columns)
+
+    agg = (
+        cube.assign(period=period_start(cube["day"], freq))
+        .groupby(["type", "period"], as_index=False)[["count", "duration"]]
+        .sum()
+    )
+    if fill:
+        step = {"D": "D", "W": "W-MON", "M": "MS", "Y": "YS"}[freq]
+        full = pd.date_range(agg["period"].min(), agg["period"].max(), freq=step)
+        idx = pd.MultiIndex.from_product([agg["type"].unique(), full], names=["type", "period"])
+        agg = agg.set_index(["type", "period"]).reindex(idx, fill_value=0).reset_index()
+
+    agg = agg.sort_values(["period", "type"], kind="stable").reset_index(drop=True)
+    agg["cum_count"] = agg.groupby("type")["count"].cumsum()
+    agg["cum_duration"] = agg.groupby("type")["duration"].cumsum()
+    return agg[columns]
@@ -0,0 +1,81 @@
+# date range queries on frames sorted once by an int64 epoch: two binary searches and a slice, no mask, no copy
+import numpy as np
+import pandas as pd
+from typing import Optional
+
+LOCAL_TZ = "Europe/Paris"
+_NAT = np.iinfo(np.int64).min  # int64 view of NaT
+
+def to_epoch_ns(times: pd.Series, unit: Optional[str] = None, tz: str = LOCAL_TZ) -> np.ndarray:
+    """
+    Timestamps -> int64 nanoseconds of the wall-clock time in `tz`.
+
+    Args:
+        times: Datetimes (naive = already local, or tz-aware), date strings, or epoch numbers
+        unit: 's' or 'ms' for epoch numbers (default: guessed, ms above 1e11)
+        tz: Timezone the calendar days of the date filter refer to
+
+    Returns:
+        int64 array aligned with `times`, NaT/unparseable values as the int64 minimum
+    """
+    if pd.api.types.is_numeric_dtype(times) and not pd.api.types.is_bool_dtype(times):
+        numbers = pd.to_numeric(times, errors="coerce")
+        if unit is None:
+            unit = "ms" if numbers.dropna().median() > 1e11 else "s"
+        dt = pd.to_datetime(numbers, unit=unit, utc=True)
+    elif isinstance(times.dtype, pd.DatetimeTZDtype) or pd.api.types.is_datetime64_dtype(times):
+        dt = times
+    else:
+        dt = pd.to_datetime(times, errors="coerce")
+    if isinstance(dt.dtype, pd.DatetimeTZDtype):
+        dt = dt.dt.tz_convert(tz).dt.tz_localize(None)
+    return dt.to_numpy(dtype="datetime64[ns]").view("int64")
+
+def date_bounds(date_range: tuple) -> tuple:
+    """(start_date, end_date) from the date filter -> [start, end) epochs covering both days entirely."""
+    start = pd.Timestamp(date_range[0]).tz_localize(None).normalize()
+    end = pd.Timestamp(date_range[1]).tz_localize(None).normalize() + pd.Timedelta(days=1)
+    return start.value, end.value
+
+class TimeIndexed:
+    """A DataFrame kept sorted by a tz-normalized int64 epoch, for date range slicing."""
+
+    def __init__(self, df: pd.DataFrame, column: Optional[str] = None, times: Optional[pd.Series] = None,
+                 unit: Optional[str] = None, tz: str = LOCAL_TZ, presorted: bool = False):
+        """
+        Args:
+            df: Frame to index (rows without a valid time are dropped)
+            column: Time column of `df`, or
+            times: Times aligned with `df` (when they are derived, e.g. from a YYYYMM folder name)
+            unit, tz: See to_epoch_ns
+            presorted: `df` is already sorted by time and has no missing time (skips the sort)
+        """
+        epoch = to_epoch_ns(df[column] if times is None else times, unit, tz)
+        if presorted:
+            self.frame, self.epoch = df, epoch
+        else:
+            order = np.argsort(epoch, kind="stable")
+            # NaT is the smallest int64: missing times sort first, skip them
+            order = order[np.searchsorted(epoch[order], _NAT, side="right"):]
+            self.frame = df.take(order).reset_index(drop=True)
+            self.epoch = epoch[order]
+
+    def __len__(self) -> int:
+        return len(self.epoch)
+
+    @property
+    def empty(self) -> bool:
+        return len(self.epoch) == 0
+
+    def slice_bounds(self, date_range: tuple) -> tuple:
+        """Positions [lo, hi) of the rows whose day falls in date_range."""
+        start, end = date_bounds(date_range)
+        return (int(np.searchsorted(self.epoch, start, side="left")),
+                int(np.searchsorted(self.epoch, end, side="left")))
+
+    def between(self, date_range: tuple = None) -> pd.DataFrame:
+        """Rows within date_range (start and end days included); every row if no full range is given."""
+        if not date_range or len(date_range) != 2:
+            return self.frame
+        lo, hi = self.slice_bounds(date_range)
+        return self.frame.iloc[lo:hi]
@@ -0,0 +1,133 @@
+# shared user-agent parsing: each distinct UA string is parsed once, then joined back to every row
+import os
+import json
+import threading
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import user_agents
+from utils.cache import SqliteStore
+
+# ------------- Config --------------------------------------------------------
+UA_CACHE_PATH = os.getenv("UA_CACHE_PATH", "./data/.cache/user_agents.sqlite")
+UA_MEMO_SIZE = 50_000
+# below this many unparsed UAs a process pool costs more than it saves
+UA_POOL_THRESHOLD = 2_000
+
+UA_FIELDS = ["browser_family", "browser_version", "os_family", "os_version", "device_family",
+             "is_mobile", "is_tablet", "is_pc", "is_bot"]
+_EMPTY = (None, None, None, None, None, False, False, False, False)
+# cache entries are only valid for the parser version that produced them
+_PARSER_VERSION = getattr(user_agents, "VERSION", None) and ".".join(map(str, user_agents.VERSION))
+
+# ------------- Parsing -------------------------------------------------------
+
+def parse_one(ua_string: str) -> tuple:
+    """UA string -> values in UA_FIELDS order (empty values when it can't be parsed)."""
+    try:
+        ua = user_agents.parse(ua_string)
+        return (ua.browser.family, ua.browser.version_string, ua.os.family, ua.os.version_string,
+                ua.device.family, ua.is_mobile, ua.is_tablet, ua.is_pc, ua.is_bot)
+    except Exception:
+        return _EMPTY
+
+# in-process LRU memo in front of the persistent cache
+_memo: "OrderedDict[str, tuple]" = OrderedDict()
+_memo_lock = threading.Lock()
+
+def _memo_get(ua_string: str) -> Optional[tuple]:
+    with _memo_lock:
+        values = _memo.get(ua_string)
+        if values is not None:
+            _memo.move_to_end(ua_string)
+        return values
+
+def _memo_put_many(parsed: dict) -> None:
+    with _memo_lock:
+        _memo.update(parsed)
+        while len(_memo) > UA_MEMO_SIZE:
+            _memo.popitem(last=False)
+
+# ------------- Persistent cache (SQLite) -------------------------------------
+_store = SqliteStore(
+    lambda: UA_CACHE_PATH,
+    lambda conn: conn.execute("CREATE TABLE IF NOT EXISTS ua (ua TEXT, version TEXT, parsed TEXT, PRIMARY KEY (ua, version))"),
+    "user-agent cache",
+)
+
+def _persistent_get_many(ua_strings: list, chunk_size: int = 500) -> dict:
+    conn = _store.connection()
+    if conn is None:
+        return {}
+    found = {}
+    with _store.lock:
+        for i in range(0, len(ua_strings), chunk_size):
+            chunk = ua_strings[i:i + chunk_size]
+            rows = conn.execute(
+                f"SELECT ua, parsed FROM ua WHERE version IS ? AND ua IN ({','.join('?' * len(chunk))})",
+                (_PARSER_VERSION, *chunk),
+            ).fetchall()
+            found.update((ua, tuple(json.loads(parsed))) for ua, parsed in rows)
+    return found
+
+def _persistent_put_many(parsed: dict) -> None:
+    conn = _store.connection()
+    if conn is None or not parsed:
+        return
+    with _store.lock:
+        conn.executemany(
+            "INSERT OR REPLACE INTO ua (ua, version, parsed) VALUES (?, ?, ?)",
+            [(ua, _PARSER_VERSION, json.dumps(values)) for ua, values in parsed.items()],
+        )
+        conn.commit()
+
+# ------------- Public functions ----------------------------------------------
+
+def parse_user_agents(user_agent_strings: pd.Series, max_workers: int = None) -> pd.DataFrame:
+    """
+    Parse a column of UA strings.
+
+    Args:
+        user_agent_strings: Series of UA strings (any index, NaN allowed)
+        max_workers: Process pool size for the UAs not in cache (default: cpu count, 1 = in process)
+
+    Returns:
+        DataFrame with UA_FIELDS plus device_type ('Mobile', 'Tablet', 'PC', 'Bot', 'Other'),
+        aligned with the input index
+    """
+    codes, uniques = pd.factorize(user_agent_strings, use_na_sentinel=True)
+
+    parsed, missing = {}, []
+    for ua in uniques:
+        known = _memo_get(ua) if isinstance(ua, str) else _EMPTY
+        if known is None:
+            missing.append(ua)
+        else:
+            parsed[ua] = known
+
+    stored = _persistent_get_many(missing) if missing else {}
+    _memo_put_many(stored)
+    parsed.update(stored)
+    todo = [ua for ua in missing if ua not in stored]
+    if todo:
+        workers = max_workers or os.cpu_count() or 1
+        if workers > 1 and len(todo) >= UA_POOL_THRESHOLD:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                fresh = dict(zip(todo, pool.map(parse_one, todo, chunksize=256)))
+        else:
+            fresh = {ua: parse_one(ua) for ua in todo}
+        _persistent_put_many(fresh)
+        _memo_put_many(fresh)
+        parsed.update(fresh)
+
+    # one row per distinct UA (+ a trailing empty row for NaN), then a single take() per column
+    table = pd.DataFrame([parsed[ua] for ua in uniques] + [_EMPTY], columns=UA_FIELDS)
+    out = table.take(np.where(codes < 0, len(uniques), codes)).set_axis(user_agent_strings.index)
+    out["device_type"] = np.select(
+        [out["is_bot"].astype(bool), out["is_tablet"].astype(bool), out["is_mobile"].astype(bool), out["is_pc"].astype(bool)],
+        ["Bot", "Tablet", "Mobile", "PC"], default="Other",
+    )
+    return out
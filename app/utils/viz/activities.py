@@ -4,60 +4,12 @@ import altair as alt
 import streamlit as st
 import numpy as np
 import matplotlib.pyplot as plt
-
-# ------- Helper functions --------
-
-def filter_by_date_range(df: pd.DataFrame, date_column: str, date_range: tuple) -> pd.DataFrame:
-    """
-    Filter a dataframe by date range without modifying the original.
-    
-    Args:
-        df: DataFrame to filter
-        date_column: Name of the date column
-        date_range: Tuple of (start_date, end_date)
-    
-    Returns:
-        Filtered DataFrame copy
-    """
-    if not date_range or len(date_range) != 2:
-        return df
-    
-    df_filtered = df.copy()
-    
-    # Ensure the date column is datetime
-    if not pd.api.types.is_datetime64_any_dtype(df_filtered[date_column]):
-        df_filtered[date_column] = pd.to_datetime(df_filtered[date_column], errors='coerce')
-    
-    # Convert filter dates to datetime and handle timezone
-    start_date = pd.to_datetime(date_range[0])
-    end_date = pd.to_datetime(date_range[1])
-    
-    # If the column has timezone info, localize the filter dates to match
-    if df_filtered[date_column].dt.tz is not None:
-        # Get the timezone from the column
-        tz = df_filtered[date_column].dt.tz
-        # Localize start and end dates to the same timezone
-        if start_date.tz is None:
-            start_date = start_date.tz_localize('UTC').tz_convert(tz)
-        else:
-            start_date = start_date.tz_convert(tz)
-            
-        if end_date.tz is None:
-            end_date = end_date.tz_localize('UTC').tz_convert(tz)
-        else:
-            end_date = end_date.tz_convert(tz)
-    
-    return df_filtered[(df_filtered[date_column] >= start_date) & (df_filtered[date_column] <= end_date)]
+from utils.timecube import rollup
 
 # ------- activities --------
 
 def total_activities_over_time(
-    df_all_comments=None,
-    df_liked_comments=None,
-    df_liked_posts=None,
-    df_story_likes=None,
-    df_saved_posts=None,
-    df_all_conversations=None,
+    activity_cube: pd.DataFrame,
     cumulative: bool = True,
     monthly: bool = True,  # True = agrégation par mois, False = par jour
     title: str = "Total Instagram Activities Over Time",
@@ -68,74 +20,25 @@ def total_activities_over_time(
     Altair line chart showing activity over time (cumulative or per period),
     with optional log-scale on Y.
 
+    - activity_cube    -> build_cube("activity", ...) (comments, likes, saves, conversations par jour)
     - cumulative=True  -> courbe cumulée
     - cumulative=False -> valeurs par période (mois ou jour)
     - monthly=True     -> agrégation mensuelle ('M'), sinon journalière ('D')
     - use_log_y=True   -> échelle Y logarithmique
     """
 
-    # --- Collect available dataframes dynamically ---
-    dfs = {
-        "Comments": df_all_comments,
-        "Liked Comments": df_liked_comments,
-        "Liked Posts": df_liked_posts,
-        "Story Likes": df_story_likes,
-        "Saved Posts": df_saved_posts,
-        "Conversations": df_all_conversations,
-    }
-
-    frames = []
-    for name, df in dfs.items():
-        if df is None or df.empty:
-            continue
-        temp = df.copy()
-
-        # choose column to extract time
-        if "date" in temp.columns:
-            temp["date"] = pd.to_datetime(temp["date"], errors="coerce", utc=True)
-        elif "timestamp" in temp.columns:
-            temp["date"] = pd.to_datetime(temp["timestamp"], unit="s", errors="coerce", utc=True)
-        elif "timestamps" in temp.columns:  # conversation case (list of timestamps)
-            temp["date"] = pd.to_datetime(
-                temp["timestamps"].apply(lambda x: x[0] if isinstance(x, list) else None),
-                unit="ms", errors="coerce", utc=True
-            )
-        else:
-            continue
-
-        temp["activity_type"] = name
-        frames.append(temp[["date", "activity_type"]])
-
-    if not frames:
+    if activity_cube is None or activity_cube.empty:
         st.warning("⚠️ No activity data available.")
         return None
 
-    all_data = (
-        pd.concat(frames, ignore_index=True)
-        .dropna(subset=["date"])
-        .assign(date=lambda d: d["date"].dt.tz_convert("Europe/Paris"))
-    )
-    
-    # Apply date range filter if provided
-    if date_range:
-        all_data = filter_by_date_range(all_data, "date", date_range)
-
     # --- Choose granularity: month or day ---
     freq = "M" if monthly else "D"
     period_col = "period_month" if monthly else "period_day"
-    all_data[period_col] = all_data["date"].dt.to_period(freq).dt.to_timestamp()
-
-    # --- Aggregate counts per period & type ---
     agg = (
-        all_data.groupby(["activity_type", period_col])
-        .size()
-        .reset_index(name="count")
-        .sort_values(period_col)
+        rollup(activity_cube, freq, date_range=date_range)
+        .rename(columns={"type": "activity_type", "period": period_col})
     )
 
-    # --- Cumulative if requested ---
-    agg["cum_count"] = agg.groupby("activity_type")["count"].cumsum()
-
     y_col = "cum_count" if cumulative else "count"
     y_label = ("Cumulative count" if cumulative else ("New per month" if monthly else "New per day"))
 
@@ -538,25 +441,18 @@ def request_corr0(df_all_conversations: pd.DataFrame) -> plt.Figure:
     return fig
 
 
-def scroll_hist(df_time_spent_on_ig_prep: pd.DataFrame, color: str = "blues", date_range: tuple = None) -> alt.Chart:
+def scroll_hist(screen_time_cube: pd.DataFrame, color: str = "blues", date_range: tuple = None) -> alt.Chart:
     """
     Histogram of total time spent on Instagram grouped by day.
-    Assumes the dataframe is already preprocessed with 'date' and 'duration_sec' columns.
+    Reads the per-day session durations of build_cube("screen_time", ...).
     
     Args:
-        df_time_spent_on_ig_prep: Preprocessed dataframe
+        screen_time_cube: Time cube of the time spent dataset
         color: Color scheme for the bars
         date_range: Optional tuple of (start_date, end_date) to filter data
     """
-    df = df_time_spent_on_ig_prep.copy()
-    
-    # Apply date range filter if provided
-    if date_range and len(date_range) == 2:
-        start_date, end_date = pd.to_datetime(date_range[0]), pd.to_datetime(date_range[1])
-        df = df[(df["date"] >= start_date) & (df["date"] <= end_date)]
-    
-    daily_time = df.groupby("date", as_index=False)["duration_sec"].sum()
-    daily_time["duration_min"] = daily_time["duration_sec"] / 60
+    daily_time = rollup(screen_time_cube, "D", date_range=date_range).rename(columns={"period": "date"})
+    daily_time["duration_min"] = daily_time["duration"] / 60
     
     chart = (
         alt.Chart(daily_time)
@@ -576,110 +472,23 @@ def scroll_hist(df_time_spent_on_ig_prep: pd.DataFrame, color: str = "blues", da
     return chart
 
 
-def saved_media_by_time(saved_collections: pd.DataFrame, saved_posts: pd.DataFrame, saved_music: pd.DataFrame, by_saved: str, date_range: tuple = None) -> alt.Chart:
+def saved_media_by_time(saved_cube: pd.DataFrame, by_saved: str, date_range: tuple = None) -> alt.Chart:
     """Show saved media activity across all types grouped by time period"""
-    time_data = []
-    
-    # Process saved collections
-    if not saved_collections.empty:
-        collections = saved_collections[saved_collections['title'].isna()].copy()
-        collections['added_time'] = pd.to_datetime(collections['added_time'])
-        collections = collections.dropna(subset=['added_time'])
-        
-        # Apply date filter if provided
-        if date_range:
-            collections = filter_by_date_range(collections, 'added_time', date_range)
-        
-        if by_saved == "years":
-            collections['period'] = collections['added_time'].dt.year.astype(str)
-            x_title = 'Year'
-        elif by_saved == "months":
-            collections['period'] = collections['added_time'].dt.to_period('M').astype(str)
-            x_title = 'Month'
-        elif by_saved == "weeks":
-            collections['period'] = collections['added_time'].dt.strftime('%Y-W%U')
-            x_title = 'Week'
-        else:  # default to months
-            collections['period'] = collections['added_time'].dt.to_period('M').astype(str)
-            x_title = 'Month'
-            
-        time_collections = collections.groupby('period').size().reset_index(name='count')
-        time_collections['type'] = 'Collections'
-        time_data.append(time_collections)
-    
-    # Process saved posts
-    if not saved_posts.empty:
-        posts = saved_posts.copy()
-        posts['timestamp'] = pd.to_datetime(posts['timestamp'], unit='s')
-        
-        # Apply date filter if provided
-        if date_range:
-            posts = filter_by_date_range(posts, 'timestamp', date_range)
-
-        if by_saved == "years":
-            posts['period'] = posts['timestamp'].dt.year.astype(str)
-        elif by_saved == "months":
-            posts['period'] = posts['timestamp'].dt.to_period('M').astype(str)
-        elif by_saved == "weeks":
-            posts['period'] = posts['timestamp'].dt.strftime('%Y-W%U')
-        else:  # default to months
-            posts['period'] = posts['timestamp'].dt.to_period('M').astype(str)
-            
-        time_posts = posts.groupby('period').size().reset_index(name='count')
-        time_posts['type'] = 'Posts/Reels'
-        time_data.append(time_posts)
-    
-    # Process saved music
-    if not saved_music.empty:
-        music = saved_music.copy()
-        # Try different timestamp columns
-        timestamp_cols = ['string_map_data.Created At.timestamp', 'timestamp']
-        timestamp_col = None
-        for col in timestamp_cols:
-            if col in music.columns:
-                timestamp_col = col
-                break
-        
-        if timestamp_col:
-            music['timestamp'] = pd.to_datetime(music[timestamp_col], unit='s')
-            music = music.dropna(subset=['timestamp'])
-            
-            # Apply date filter if provided
-            if date_range:
-                music = filter_by_date_range(music, 'timestamp', date_range)
-            
-            if by_saved == "years":
-                music['period'] = music['timestamp'].dt.year.astype(str)
-            elif by_saved == "months":
-                music['period'] = music['timestamp'].dt.to_period('M').astype(str)
-            elif by_saved == "weeks":
-                music['period'] = music['timestamp'].dt.strftime('%Y-W%U')
-            else:  # default to months
-                music['period'] = music['timestamp'].dt.to_period('M').astype(str)
-                
-            time_music = music.groupby('period').size().reset_index(name='count')
-            time_music['type'] = 'Music'
-            time_data.append(time_music)
-    
-    if not time_data:
-        return None
-    
-    # Combine all data
-    combined_data = pd.concat(time_data, ignore_index=True)
-    
-    # Sort by period for better visualization
     if by_saved == "years":
-        combined_data = combined_data.sort_values('period')
-    elif by_saved == "months":
-        # Convert to datetime for proper sorting
-        combined_data['sort_key'] = pd.to_datetime(combined_data['period'])
-        combined_data = combined_data.sort_values('sort_key')
-        combined_data = combined_data.drop('sort_key', axis=1)
+        freq, label_format, x_title = "Y", "%Y", "Year"
     elif by_saved == "weeks":
-        # Sort weeks properly
-        combined_data['sort_key'] = combined_data['period']
-        combined_data = combined_data.sort_values('sort_key')
-        combined_data = combined_data.drop('sort_key', axis=1)
+        freq, label_format, x_title = "W", "%Y-W%W", "Week"
+    elif by_saved == "days":
+        freq, label_format, x_title = "D", "%Y-%m-%d", "Day"
+    else:  # default to months
+        freq, label_format, x_title = "M", "%Y-%m", "Month"
+
+    # rollup returns the periods in chronological order
+    combined_data = rollup(saved_cube, freq, date_range=date_range)
+    if combined_data.empty:
+        return None
+    combined_data["period"] = combined_data["period"].dt.strftime(label_format)
+    combined_data = combined_data[["period", "type", "count"]]
     
     # Create chart based on grouping type
     if by_saved == "weeks":
@@ -711,17 +520,17 @@ def saved_media_by_time(saved_collections: pd.DataFrame, saved_posts: pd.DataFra
 
 # --------- link history charts -------
 
-def website_bar(df_link_history : pd.DataFrame) -> alt.Chart:
-    agg = (
-    df_link_history.groupby("Website_name", as_index=False)
-    .agg(
-        visit_count=("Website_name", "size"),
-        total_time_min=("total_time_min", "sum")
-    )
-    .sort_values("visit_count", ascending=False)
-)
+def website_bar(df_link_history : pd.DataFrame, by: str = "Website_name") -> alt.Chart:
+    # factorize + bincount : une seule passe sur les visites (1M de lignes < 1 s)
+    codes, names = pd.factorize(df_link_history[by])
+    minutes = df_link_history["total_time_min"].fillna(0).to_numpy(dtype=float)
+    known = codes >= 0
+    agg = pd.DataFrame({
+        "Website_name": names,
+        "visit_count": np.bincount(codes[known], minlength=len(names)),
+        "total_time_min": np.bincount(codes[known], weights=minutes[known], minlength=len(names)),
+    }).sort_values("visit_count", ascending=False)
 
-    
     chart = (
         alt.Chart(agg)
         .mark_bar()
@@ -1,80 +1,25 @@
 import numpy as np
 import pandas as pd
 import altair as alt
-
-# ---------- helpers ----------
-
-def filter_by_date_range(df: pd.DataFrame, date_column: str, date_range: tuple) -> pd.DataFrame:
-    """
-    Filter a dataframe by date range without modifying the original.
-    
-    Args:
-        df: DataFrame to filter
-        date_column: Name of the date column
-        date_range: Tuple of (start_date, end_date)
-    
-    Returns:
-        Filtered DataFrame copy
-    """
-    if not date_range or len(date_range) != 2:
-        return df
-    
-    df_filtered = df.copy()
-    
-    # Ensure the date column is datetime
-    if not pd.api.types.is_datetime64_any_dtype(df_filtered[date_column]):
-        df_filtered[date_column] = pd.to_datetime(df_filtered[date_column], errors='coerce')
-    
-    # Convert filter dates to datetime and handle timezone
-    start_date = pd.to_datetime(date_range[0])
-    end_date = pd.to_datetime(date_range[1])
-    
-    # If the column has timezone info, localize the filter dates to match
-    if df_filtered[date_column].dt.tz is not None:
-        # Get the timezone from the column
-        tz = df_filtered[date_column].dt.tz
-        # Localize start and end dates to the same timezone
-        if start_date.tz is None:
-            start_date = start_date.tz_localize('UTC').tz_convert(tz)
-        else:
-            start_date = start_date.tz_convert(tz)
-            
-        if end_date.tz is None:
-            end_date = end_date.tz_localize('UTC').tz_convert(tz)
-        else:
-            end_date = end_date.tz_convert(tz)
-    
-    return df_filtered[(df_filtered[date_column] >= start_date) & (df_filtered[date_column] <= end_date)]
+from utils.timecube import media_month, rollup
+from utils.timeindex import TimeIndexed
+from vega_datasets import data
 
 # ---------- media -----------
 
-def media_cumulative_line(df: pd.DataFrame, date_range: tuple = None) -> alt.Chart:
+def media_cumulative_line(media_cube: pd.DataFrame, date_range: tuple = None, freq: str = "M") -> alt.Chart:
     """
     Line chart showing cumulative count of posts (or archived_posts) and stories over time.
+    Per month from the folder names (YYYYMM), per day (freq='D') once the capture dates were read.
     """
     # Keep only posts and stories
-    media = df[df["media_type"].isin(["posts", "archived_posts", "stories"])].copy()
-
-    if media.empty:
-        return alt.Chart(pd.DataFrame({"msg": ["No media data"]})).mark_text().encode(text="msg")
-
-    media["timestamp"] = media["timestamp"].astype(str)
-    media["date"] = pd.to_datetime(media["timestamp"].str[:6], format="%Y%m", errors="coerce")
-    
-    # Apply date filter if provided
-    if date_range:
-        media = filter_by_date_range(media, 'date', date_range)
-
-    # Aggregate counts
-    media["count"] = 1
     media = (
-        media.groupby(["date", "media_type"], as_index=False)["count"]
-        .sum()
-        .sort_values("date")
+        rollup(media_cube, freq, date_range=date_range, types=["posts", "archived_posts", "stories"])
+        .rename(columns={"type": "media_type", "period": "date"})
     )
 
-    # Cumulative sum by type
-    media["cum_count"] = media.groupby("media_type")["count"].cumsum()
+    if media.empty:
+        return alt.Chart(pd.DataFrame({"msg": ["No media data"]})).mark_text().encode(text="msg")
 
     chart = (
         alt.Chart(media)
@@ -98,36 +43,29 @@ def media_cumulative_line(df: pd.DataFrame, date_range: tuple = None) -> alt.Cha
     )
     return chart
 
-def media_frequency_histogram(df: pd.DataFrame, by: str = "months", media_type=["stories"], color="oranges", date_range: tuple = None) -> alt.Chart:
+def media_frequency_histogram(media_cube: pd.DataFrame, by: str = "months", media_type=["stories"], color="oranges", date_range: tuple = None) -> alt.Chart:
     """
     Histogram of posts/stories frequency grouped by year, month, or week.
-    The DataFrame must have a 'timestamp' column formatted as YYYYMM or YYYYMMDD.
+    Rolls up the media time cube (one row per media type and month).
     """
-
-    selected_medias = df[df["media_type"].isin(media_type)]
-
-    if selected_medias.empty:
-        return alt.Chart(pd.DataFrame({"msg": ["No story data"]})).mark_text().encode(text="msg")
-
-    # Parse timestamp safely
-    selected_medias["timestamp"] = selected_medias["timestamp"].astype(str)
-    selected_medias["date"] = pd.to_datetime(selected_medias["timestamp"].str[:6], format="%Y%m", errors="coerce")
-    
-    # Apply date filter if provided
-    if date_range:
-        selected_medias = filter_by_date_range(selected_medias, 'date', date_range)
-
     # Choose grouping level
     if by == "years":
-        selected_medias["period"] = selected_medias["date"].dt.year.astype(str)
+        freq, label_format = "Y", "%Y"
     elif by == "months":
-        selected_medias["period"] = selected_medias["date"].dt.to_period("M").astype(str)
+        freq, label_format = "M", "%Y-%m"
     elif by == "weeks":
-        selected_medias["period"] = selected_medias["date"].dt.to_period("W").astype(str)
+        freq, label_format = "W", "%Y-%m-%d"
     else:
         raise ValueError("Parameter 'by' must be 'year', 'month', or 'week'.")
 
-    agg = selected_medias.groupby("period", as_index=False).size().rename(columns={"size": "count"})
+    agg = rollup(media_cube, freq, date_range=date_range, types=media_type)
+
+    if agg.empty:
+        return alt.Chart(pd.DataFrame({"msg": ["No story data"]})).mark_text().encode(text="msg")
+
+    # several media types can share a period
+    agg = agg.groupby("period", as_index=False)["count"].sum()
+    agg["period"] = agg["period"].dt.strftime(label_format)
 
     chart = (
         alt.Chart(agg)
@@ -146,20 +84,18 @@ def media_frequency_histogram(df: pd.DataFrame, by: str = "months", media_type=[
     )
     return chart
 
-def media_type_bar(df: pd.DataFrame, date_range: tuple = None) -> alt.Chart:
-    # Make a copy to avoid modifying original
-    df_filtered = df.copy()
-    
-    # Apply date filter if provided and if there's a date column
-    # Note: media_type_bar typically works on the full dataset
-    # but we can filter by timestamp if needed
-    if date_range and 'timestamp' in df_filtered.columns:
-        df_filtered["timestamp_str"] = df_filtered["timestamp"].astype(str)
-        df_filtered["date"] = pd.to_datetime(df_filtered["timestamp_str"].str[:6], format="%Y%m", errors="coerce")
-        df_filtered = filter_by_date_range(df_filtered, 'date', date_range)
+def media_type_bar(df: pd.DataFrame, date_range: tuple = None, index: TimeIndexed = None) -> alt.Chart:
+    """
+    Media count per type. Without a date range every media is counted, including the
+    undated ones (profile picture...); with one, `index` (df sorted by month) is sliced.
+    """
+    df_filtered = df
+    if date_range:
+        index = index if index is not None else TimeIndexed(df, times=media_month(df))
+        df_filtered = index.between(date_range)
     
     agg = (
-        df_filtered.groupby("media_type", as_index=False)
+        df_filtered.groupby("media_type", as_index=False, observed=True)
           .size()
           .rename(columns={"size": "count"})
           .sort_values("count", ascending=False)
@@ -185,3 +121,35 @@ def media_type_bar(df: pd.DataFrame, date_range: tuple = None) -> alt.Chart:
     )
     return chart
 
+
+def media_map(media_meta: pd.DataFrame, date_range: tuple = None) -> alt.Chart:
+    """
+    Where the photos and videos were taken (GPS of their metadata, see utils/media_meta.py),
+    filtered on the capture day.
+    """
+    located = media_meta.dropna(subset=["lat", "lon"])
+    if date_range:
+        located = TimeIndexed(located, "taken_at").between(date_range)
+    if located.empty:
+        return alt.Chart(pd.DataFrame({"msg": ["No geotagged media"]})).mark_text().encode(text="msg")
+
+    points = located[["relative_path", "kind", "taken_at", "lat", "lon", "camera_model"]].copy()
+    points["camera_model"] = points["camera_model"].fillna("Unknown")
+
+    countries = alt.topo_feature(data.world_110m.url, "countries")
+    background = alt.Chart(countries).mark_geoshape(fill="#eeeeee", stroke="white")
+    dots = alt.Chart(points).mark_circle(size=60, opacity=0.7).encode(
+        longitude="lon:Q",
+        latitude="lat:Q",
+        color=alt.Color("kind:N", title="Media"),
+        tooltip=[
+            alt.Tooltip("relative_path:N", title="File"),
+            alt.Tooltip("taken_at:T", title="Taken on", format="%Y-%m-%d %H:%M"),
+            alt.Tooltip("camera_model:N", title="Camera"),
+        ],
+    )
+    return (
+        (background + dots)
+        .project("equirectangular")
+        .properties(title="Where your media were taken", width=700, height=400)
+    )
@@ -1,50 +1,12 @@
 import numpy as np
 import pandas as pd
 import altair as alt
+from utils.timecube import rollup
 
-# ---------- helpers ----------
+WEEKDAYS_FR = {0:"Lundi",1:"Mardi",2:"Mercredi",3:"Jeudi",4:"Vendredi",5:"Samedi",6:"Dimanche"}
+MONTHS_FR = ["Janvier","Février","Mars","Avril","Mai","Juin","Juillet","Août","Septembre","Octobre","Novembre","Décembre"]
 
-def filter_by_date_range(df: pd.DataFrame, date_column: str, date_range: tuple) -> pd.DataFrame:
-    """
-    Filter a dataframe by date range without modifying the original.
-    
-    Args:
-        df: DataFrame to filter
-        date_column: Name of the date column
-        date_range: Tuple of (start_date, end_date)
-    
-    Returns:
-        Filtered DataFrame copy
-    """
-    if not date_range or len(date_range) != 2:
-        return df
-    
-    df_filtered = df.copy()
-    
-    # Ensure the date column is datetime
-    if not pd.api.types.is_datetime64_any_dtype(df_filtered[date_column]):
-        df_filtered[date_column] = pd.to_datetime(df_filtered[date_column], errors='coerce')
-    
-    # Convert filter dates to datetime and handle timezone
-    start_date = pd.to_datetime(date_range[0])
-    end_date = pd.to_datetime(date_range[1])
-    
-    # If the column has timezone info, localize the filter dates to match
-    if df_filtered[date_column].dt.tz is not None:
-        # Get the timezone from the column
-        tz = df_filtered[date_column].dt.tz
-        # Localize start and end dates to the same timezone
-        if start_date.tz is None:
-            start_date = start_date.tz_localize('UTC').tz_convert(tz)
-        else:
-            start_date = start_date.tz_convert(tz)
-            
-        if end_date.tz is None:
-            end_date = end_date.tz_localize('UTC').tz_convert(tz)
-        else:
-            end_date = end_date.tz_convert(tz)
-    
-    return df_filtered[(df_filtered[date_column] >= start_date) & (df_filtered[date_column] <= end_date)]
+# ---------- helpers ----------
 
 def _auto_to_datetime(ts_series: pd.Series) -> pd.Series:
     """Convertit epoch en datetime Europe/Paris. Auto-détection s (<=1e11) vs ms (>1e11)."""
@@ -65,17 +27,15 @@ def _preprocess(df: pd.DataFrame) -> pd.DataFrame:
     df["ts"] = _auto_to_datetime(df["timestamp"])
     df["year"] = df["ts"].dt.year
 
-    weekday_map = {0:"Lundi",1:"Mardi",2:"Mercredi",3:"Jeudi",4:"Vendredi",5:"Samedi",6:"Dimanche"}
     df["weekday_num"] = df["ts"].dt.weekday
-    df["weekday"] = df["weekday_num"].map(weekday_map)
+    df["weekday"] = df["weekday_num"].map(WEEKDAYS_FR)
 
     # label months lisible et triable
     df["ym"] = df["ts"].dt.to_period("M").astype(str)  # "2025-10"
     try:
         month_fr = df["ts"].dt.month_name(locale="fr_FR").str.capitalize()
     except Exception:
-        months_fr = ["Janvier","Février","Mars","Avril","Mai","Juin","Juillet","Août","Septembre","Octobre","Novembre","Décembre"]
-        month_fr = df["ts"].dt.month.map(lambda m: months_fr[m-1])
+        month_fr = df["ts"].dt.month.map(lambda m: MONTHS_FR[m-1])
     df["months"] = df["ym"] + " · " + month_fr
 
     # borne l’événement
@@ -90,42 +50,37 @@ def _preprocess(df: pd.DataFrame) -> pd.DataFrame:
 
     return df
 
-def _group_counts(df: pd.DataFrame, by: str):
+# ---------- security charts ----------
+
+def login_logout_hist(logs_cube: pd.DataFrame, by: str = "months", date_range: tuple = None) -> alt.Chart:
+    """
+    Histogramme logins (vert) / logouts (rouge, valeurs négatives) sur le même graphe.
+    by ∈ {"months","days","years"}. Agrège le cube des logs (comptes par jour, heure de Paris).
+    """
+    freq = {"months": "M", "days": "D", "years": "Y"}.get(by)
+    if freq is None:
+        raise ValueError("by must be 'months', 'days' or 'years'")
+    agg = rollup(logs_cube, freq, date_range=date_range).rename(columns={"type": "event"})
+    if agg.empty:
+        return None
+
+    # mêmes libellés que _preprocess, calculés sur les périodes et non sur chaque événement
     if by == "months":
         key = "months"
-        # ordre basé sur "YYYY-MM · Nom"
-        order = sorted(df[key].unique(), key=lambda s: s.split(" · ")[0])
+        month_names = agg["period"].dt.month.map(lambda m: MONTHS_FR[m - 1])
+        agg[key] = agg["period"].dt.strftime("%Y-%m") + " · " + month_names
+        order = sorted(agg[key].unique(), key=lambda s: s.split(" · ")[0])
     elif by == "days":
         key = "weekday"
-        order = ["Lundi","Mardi","Mercredi","Jeudi","Vendredi","Samedi","Dimanche"]
-    elif by == "years":
-        key = "year"
-        order = sorted(df[key].unique().tolist())
+        agg[key] = agg["period"].dt.weekday.map(WEEKDAYS_FR)
+        order = list(WEEKDAYS_FR.values())
     else:
-        raise ValueError("by must be 'months', 'days' or 'years'")
+        key = "year"
+        agg[key] = agg["period"].dt.year
+        order = sorted(agg[key].unique().tolist())
 
-    grp = (
-        df.groupby([key, "event"], as_index=False)
-          .size()
-          .rename(columns={"size":"count"})
-    )
+    grp = agg.groupby([key, "event"], as_index=False)["count"].sum()
     grp["count_signed"] = np.where(grp["event"].eq("logout"), -grp["count"], grp["count"])
-    return grp, key, order
-
-# ---------- security charts ----------
-
-def login_logout_hist(df: pd.DataFrame, by: str = "months", date_range: tuple = None) -> alt.Chart:
-    """
-    Histogramme logins (vert) / logouts (rouge, valeurs négatives) sur le même graphe.
-    by ∈ {"months","days","years"}.
-    """
-    dfp = _preprocess(df)
-    
-    # Apply date filter if provided
-    if date_range:
-        dfp = filter_by_date_range(dfp, 'ts', date_range)
-    
-    grp, key, order = _group_counts(dfp, by)
 
     color_scale = alt.Scale(domain=["login","logout"], range=["#22c55e","#ef4444"])
 
@@ -225,3 +180,36 @@ def password_activity_bar(l: list[dict]) -> alt.Chart:
     )
 
     return chart
+
+def user_agent_breakdown_bar(df_logs_prep: pd.DataFrame, by: str = "device_type", top_n: int = 10) -> alt.Chart:
+    """
+    Login / logout events per device type, OS or browser (columns added by preprocess_data(df_logs=...)).
+    by ∈ {"device_type","os_family","browser_family"}.
+    """
+    if by not in df_logs_prep.columns:
+        return None
+    df = df_logs_prep.assign(
+        category=df_logs_prep[by].fillna("Unknown"),
+        event=df_logs_prep["log_type"].astype(str).str.lower(),
+    )
+    counts = df.groupby(["category", "event"], as_index=False).size().rename(columns={"size": "count"})
+    top = counts.groupby("category")["count"].sum().nlargest(top_n).index
+    counts = counts[counts["category"].isin(top)]
+
+    color_scale = alt.Scale(domain=["login","logout"], range=["#22c55e","#ef4444"])
+    chart = (
+        alt.Chart(counts)
+        .mark_bar()
+        .encode(
+            y=alt.Y("category:N", sort="-x", title=by.replace("_", " ").capitalize()),
+            x=alt.X("count:Q", title="Events"),
+            color=alt.Color("event:N", title="Type", scale=color_scale),
+            tooltip=[
+                alt.Tooltip("category:N", title=by.replace("_", " ").capitalize()),
+                alt.Tooltip("event:N", title="Type"),
+                alt.Tooltip("count:Q", title="Events"),
+            ],
+        )
+        .properties(height=30 * max(len(top), 3))
+    )
+    return chart
@@ -1,68 +1,213 @@
+import os
 import json
 import pandas as pd
 import numpy as np
 import re
 import matplotlib.pyplot as plt
-from sklearn.cluster import KMeans
+from joblib import Parallel, delayed
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.metrics import pairwise_distances, silhouette_score
 from collections import Counter
 
-# Lazy loading de gensim - ne sera chargé que si nécessaire
+# Pruned word2vec: float16 matrix + vocab, opened with mmap_mode='r'
+W2V_MODEL_NAME = 'word2vec-google-news-300'
+W2V_DIR = os.getenv("W2V_DIR", "./data/.cache/w2v")
+# optional local copy of the full model (e.g. GoogleNews-vectors-negative300.bin.gz), used instead of the download
+W2V_SOURCE_PATH = os.getenv("W2V_SOURCE_PATH")
+# most frequent words kept on top of the topic vocabulary
+W2V_HEAD_SIZE = int(os.getenv("W2V_HEAD_SIZE", 100_000))
+
+_VECTORS_FILE = "vectors.f16.npy"
+_VOCAB_FILE = "vocab.json"
+_ABSENT_FILE = "absent.json"  # topic words looked up in the full model but not found there
+
+def _tokenize(topic):
+    # Lowercase
+    topic = topic.lower()
+    topic = re.sub(r'[^a-z\s]', '', topic)  # Remove anything that's not a letter or space
+    return [w for w in topic.split(' ') if w]
+
+class PrunedVectors:
+    """Read-only subset of a KeyedVectors model backed by a memory-mapped float16 matrix."""
+
+    def __init__(self, vectors, index_to_key, absent=()):
+        self.vectors = vectors
+        self.index_to_key = index_to_key
+        self.key_to_index = {w: i for i, w in enumerate(index_to_key)}
+        self.vector_size = vectors.shape[1]
+        self.absent = set(absent)
+
+    def __contains__(self, word):
+        return word in self.key_to_index
+
+    def __getitem__(self, word):
+        return np.asarray(self.vectors[self.key_to_index[word]], dtype=np.float32)
+
+    def missing_words(self, topics):
+        """Words of `topics` neither in the matrix nor known to be absent from the full model."""
+        return {w for topic in topics for w in _tokenize(topic)} - self.key_to_index.keys() - self.absent
+
+    @classmethod
+    def load(cls, folder=W2V_DIR):
+        vectors = np.load(os.path.join(folder, _VECTORS_FILE), mmap_mode='r')
+        with open(os.path.join(folder, _VOCAB_FILE), 'r', encoding='utf-8') as f:
+            index_to_key = json.load(f)
+        if len(index_to_key) != vectors.shape[0]:
+            raise ValueError(f"{_VOCAB_FILE} does not match {_VECTORS_FILE} ({len(index_to_key)} vs {vectors.shape[0]} words)")
+        try:
+            with open(os.path.join(folder, _ABSENT_FILE), 'r', encoding='utf-8') as f:
+                absent = json.load(f)
+        except OSError:
+            absent = ()
+        return cls(vectors, index_to_key, absent)
+
+def _load_full_model():
+    """Full gensim KeyedVectors: local W2V_SOURCE_PATH if set, otherwise gensim.downloader."""
+    if W2V_SOURCE_PATH:
+        from gensim.models import KeyedVectors
+        binary = not W2V_SOURCE_PATH.endswith(('.txt', '.txt.gz'))
+        return KeyedVectors.load_word2vec_format(W2V_SOURCE_PATH, binary=binary)
+    import gensim.downloader as api
+    return api.load(W2V_MODEL_NAME)
+
+def _replace_file(path, write):
+    """write(f) into a temporary file next to `path`, then rename it over `path`."""
+    tmp = f"{path}.tmp"
+    with open(tmp, 'wb') as f:
+        write(f)
+    os.replace(tmp, path)
+
+def build_pruned_vectors(topics=(), head_size=W2V_HEAD_SIZE, folder=W2V_DIR, keep=(), absent=()):
+    """
+    Build step: keep the words seen in `topics` plus the `head_size` most frequent
+    words of the full model (and the `keep` words of a previous build), and store them
+    as float16 .npy + vocab index. Topic words the full model lacks go to the absent list.
+    """
+    full = _load_full_model()
+    words = list(full.index_to_key[:head_size])  # gensim vocab is frequency ranked
+    seen = set(words)
+    absent = set(absent)
+    for word in [*keep, *(w for topic in topics for w in _tokenize(topic))]:
+        if word in seen or word in absent:
+            continue
+        if word in full.key_to_index:
+            words.append(word)
+            seen.add(word)
+        else:
+            absent.add(word)
+
+    os.makedirs(folder, exist_ok=True)
+    matrix = np.asarray(full.vectors[[full.key_to_index[w] for w in words]], dtype=np.float16)
+    # each file is swapped in whole; load() rejects a vocab/matrix pair from two different builds
+    _replace_file(os.path.join(folder, _VECTORS_FILE), lambda f: np.save(f, matrix))
+    _replace_file(os.path.join(folder, _VOCAB_FILE), lambda f: f.write(json.dumps(words).encode('utf-8')))
+    _replace_file(os.path.join(folder, _ABSENT_FILE), lambda f: f.write(json.dumps(sorted(absent)).encode('utf-8')))
+    return PrunedVectors.load(folder)
+
+# Lazy loading - ne sera chargé que si nécessaire
 _wv = None
 
-def _load_word2vec_model():
-    """Charge le modèle word2vec uniquement quand nécessaire"""
+def _load_word2vec_model(topics=()):
+    """Charge le modèle word2vec uniquement quand nécessaire (pruned mmap, built on first use, extended for new topic words)"""
     global _wv
     if _wv is None:
-        import gensim.downloader as api
-        _wv = api.load('word2vec-google-news-300')
+        try:
+            _wv = PrunedVectors.load()
+        except (OSError, ValueError):
+            _wv = build_pruned_vectors(topics)
+            return _wv
+    if _wv.missing_words(topics):
+        keep, absent = _wv.index_to_key, _wv.absent
+        _wv = None  # close the memory map before its file is replaced
+        _wv = build_pruned_vectors(topics, keep=keep, absent=absent)
     return _wv
 
-def generate_clusters(recommended_topics, n_clusters=10):
+def embed_topics(topics, wv):
+    """
+    Mean word vector of every topic, in one pass: tokenize all topics, gather all
+    known words with a single index into wv.vectors, then average per topic (segment mean).
+    Topics without any known word get a zero vector. Row i matches topics[i].
+    """
+    key_to_index = wv.key_to_index
+    word_idx, segment = [], []
+    for i, topic in enumerate(topics):
+        for word in _tokenize(topic):
+            j = key_to_index.get(word)
+            if j is not None:
+                word_idx.append(j)
+                segment.append(i)
+
+    sums = np.zeros((len(topics), wv.vector_size), dtype=np.float32)
+    if word_idx:
+        segment = np.asarray(segment)
+        vecs = np.asarray(wv.vectors[np.asarray(word_idx)], dtype=np.float32)
+        # segment ids are sorted: sum each run of rows with one reduceat
+        starts = np.flatnonzero(np.r_[True, segment[1:] != segment[:-1]])
+        sums[segment[starts]] = np.add.reduceat(vecs, starts, axis=0)
+    counts = np.bincount(np.asarray(segment, dtype=np.int64), minlength=len(topics))
+    return sums / np.maximum(counts, 1)[:, None]
+
+# topics the candidate k's are fitted and scored on (the winner then labels every topic)
+K_SEARCH_SAMPLE = 2000
+
+def _fit_kmeans(vectors, k, random_state=0, n_init=3):
+    return MiniBatchKMeans(n_clusters=k, random_state=random_state, n_init=n_init, batch_size=1024).fit(vectors)
+
+def _score_k(sample, distances, k):
+    model = _fit_kmeans(sample, k, n_init=1)
+    if len(set(model.labels_)) < 2:
+        return -1.0, model
+    return silhouette_score(distances, model.labels_, metric="precomputed"), model
+
+def select_n_clusters(vectors, min_k=2, max_k=15, n_jobs=-1, sample_size=K_SEARCH_SAMPLE, random_state=0):
+    """
+    Pick k with the best silhouette score. Candidate k's are fitted (n_init=1) and scored
+    in parallel on a sample of at most `sample_size` vectors, whose pairwise distances are computed once.
+    Returns (k, fitted model), the model being None when there was nothing to choose from.
+    """
+    if len(vectors) > sample_size:
+        rng = np.random.default_rng(random_state)
+        vectors = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+    n_distinct = len(np.unique(vectors, axis=0))
+    max_k = min(max_k, n_distinct - 1)
+    if max_k < min_k:
+        return max(1, min(n_distinct, min_k)), None
+    candidates = list(range(min_k, max_k + 1))
+    distances = pairwise_distances(vectors)
+    results = Parallel(n_jobs=n_jobs, prefer="threads")(delayed(_score_k)(vectors, distances, k) for k in candidates)
+    best = int(np.argmax([score for score, _ in results]))
+    return candidates[best], results[best][1]
+
+def generate_clusters(recommended_topics, n_clusters=None, max_clusters=15):
+    """
+    Cluster topics by their mean word vector.
+    n_clusters=None picks k automatically (silhouette on a sample), otherwise it is capped
+    to the number of distinct topic vectors.
+    """
+    recommended_topics = list(recommended_topics)
     # Charge le modèle seulement quand cette fonction est appelée
-    wv = _load_word2vec_model()
-    
-    def preprocess_topic(topic):
-        # Lowercase
-        topic = topic.lower()
-        topic = re.sub(r'[^a-z\s]', '', topic)  # Remove anything that's not a letter or space
-        topic = topic.split(' ')
-        return topic
-
-    preprocessed_topics = [preprocess_topic(topic) for topic in recommended_topics]
-
-    def get_average_vector(topic, wv):
-        # If topic is already a list, use it directly
-        if isinstance(topic, str):
-            words = topic.split()
-        else:
-            words = topic
-        
-        word_vectors = []
-        for word in words:
-            try:
-                word_vectors.append(wv[word])
-            except KeyError:
-                continue
-        if word_vectors:
-            return np.mean(word_vectors, axis=0)
-        else:
-            return np.zeros(wv.vector_size)
-
-    topic_vectors = { " ".join(topic) if isinstance(topic, list) else topic: get_average_vector(topic, wv) for topic in preprocessed_topics }
+    wv = _load_word2vec_model(recommended_topics)
 
-    # Get the topic vectors as a list
-    vectors = list(topic_vectors.values())
+    vectors = embed_topics(recommended_topics, wv)
 
-    # Apply KMeans clustering
-    kmeans = KMeans(n_clusters=n_clusters, random_state=0).fit(vectors)
+    n_distinct = len(np.unique(vectors, axis=0)) if len(vectors) else 0
+    model = None
+    if n_clusters is None:
+        n_clusters, model = select_n_clusters(vectors, max_k=max_clusters)
+    n_clusters = max(1, min(n_clusters, n_distinct))
 
     # Get the cluster labels for each topic
-    labels = kmeans.labels_
+    if n_clusters == 1:
+        labels = np.zeros(len(recommended_topics), dtype=int)
+    elif model is not None and model.n_clusters == n_clusters:
+        labels = model.predict(vectors)  # the search already fitted this k
+    else:
+        labels = _fit_kmeans(vectors, n_clusters).labels_
 
     # Map each topic to its cluster
     clusters = {i: [] for i in range(n_clusters)}
-    for i, label in enumerate(labels):
-        clusters[label].append(recommended_topics[i])
+    for topic, label in zip(recommended_topics, labels):
+        clusters[int(label)].append(topic)
 
     def create_cluster_name(cluster_topics):
 